@@ -7,3 +7,24 @@ from .imports import *
 from .groups import *
 from .gateways import *
 from .gateway import *
+from .admin import *
+from .transport import *
+from .retry import *
+from .async_client import *
+from .rate_limit import *
+from .authentication import *
+from .activity_logs import *
+from .ingestion import *
+from .columnar import *
+from .payload import *
+from .spool import *
+from .validation import *
+from .activity_harvester import *
+from .activity_sync import *
+from .activity_store import *
+from .inventory import *
+from .metadata_cache import *
+from .resolver import *
+from .refresh_orchestrator import *
+from .refresh_poller import *
+from .refresh_scheduler import *
@@ -104,7 +104,7 @@ class ActivityEvent:
         activity_id = dictionary.get(cls.activity_id_key)
         distribution_method = dictionary.get(cls.distribution_method_key)
 
-        return cls(id, name, is_readonly, is_on_dedicated_capacity, 
+        return cls(activity_event_id, name, is_readonly, is_on_dedicated_capacity, 
                  record_type, creation_time, operation, organization_id,
                  user_type, user, workload, user_id, activity,
                  item_name, workspace_name, dataset_name, report_name,
@@ -0,0 +1,151 @@
+# -*- coding: future_fstrings -*-
+import datetime
+import collections
+
+from concurrent.futures import ThreadPoolExecutor
+
+from .rate_limit import RateLimiter
+
+
+class ActivityLogHarvester:
+    """
+    Fetches the activity events of a date range that may span many days.
+
+    The activity events API only accepts windows within a single UTC day, so the range is split into day windows,
+    or smaller windows for busy days, which are fetched concurrently by a pool of worker threads. Each window is
+    fetched through ActivityLogs, so requests wait for the client's RateLimiter. To stay within the 200 requests per
+    hour of the API, the harvester installs a RateLimiter on the client if it has none, and adds the activity events
+    budget of RateLimiter.powerbi_defaults() to it if it lacks one.
+
+    Events are yielded in time order. Windows never overlap, so sorting the events of each window and yielding the
+    windows in order merges them.
+    """
+    default_max_workers = 4
+    default_window = datetime.timedelta(days=1)
+
+    def __init__(self, activity_logs, max_workers=None, window=None):
+        """
+        Constructs a harvester
+
+        :param activity_logs: The ActivityLogs operations module to fetch events with, e.g. client.activity_logs
+        :param max_workers: The number of windows fetched concurrently; defaults to 4
+        :param window: The length of the windows as a timedelta of at most a day, or a callable given the date of a
+        day and returning the window length for that day, e.g. to split busy days into hours; defaults to a day
+        """
+        if max_workers is None:
+            max_workers = self.default_max_workers
+
+        if window is None:
+            window = self.default_window
+
+        self.activity_logs = activity_logs
+        self.max_workers = max_workers
+        self.window = window
+
+        self._limit_activity_events()
+
+    def _limit_activity_events(self):
+        transport = getattr(getattr(self.activity_logs, 'client', None), 'transport', None)
+        if transport is None:
+            return
+
+        if transport.rate_limiter is None:
+            transport.rate_limiter = RateLimiter()
+
+        if transport.rate_limiter.get_budget(RateLimiter.activity_events_budget) is None:
+            transport.rate_limiter.add_budget(RateLimiter.activity_events_budget, RateLimiter.activity_events_per_hour,
+                                              3600.0, RateLimiter.activity_events_pattern)
+
+    @staticmethod
+    def to_utc(value):
+        """
+        :param value: A date or datetime; naive datetimes are taken as UTC
+        :return: The value as a UTC datetime, the midnight starting a date
+        """
+        if not isinstance(value, datetime.datetime):
+            return datetime.datetime(value.year, value.month, value.day, tzinfo=datetime.timezone.utc)
+
+        if value.tzinfo is None:
+            return value.replace(tzinfo=datetime.timezone.utc)
+
+        return value.astimezone(datetime.timezone.utc)
+
+    def window_length(self, day):
+        """
+        :param day: The date of a day
+        :return: The length of the windows the day is split into
+        """
+        length = self.window(day) if callable(self.window) else self.window
+
+        if length <= datetime.timedelta(0) or length > datetime.timedelta(days=1):
+            raise ValueError(f'Activity event windows must be longer than 0 and at most a day, got {length}')
+
+        return length
+
+    def iter_windows(self, start, end):
+        """
+        Splits a time range into windows that do not cross a UTC midnight
+        :param start: The start of the range, a date or datetime; naive datetimes are taken as UTC
+        :param end: The exclusive end of the range, a date or datetime; a date ends the range at its midnight
+        :return: A generator of (start, end) tuples of UTC datetimes, whose end is the last second of the window
+        """
+        start = self.to_utc(start).replace(microsecond=0)
+        end = self.to_utc(end)
+        one_second = datetime.timedelta(seconds=1)
+
+        while start < end:
+            midnight = datetime.datetime.combine(start.date() + datetime.timedelta(days=1), datetime.time(),
+                                                 tzinfo=datetime.timezone.utc)
+            window_end = min(start + self.window_length(start.date()), midnight, end)
+
+            # the end time of the API is inclusive and has a resolution of a second
+            yield start, window_end - one_second
+            start = window_end
+
+    def _fetch_window(self, st, et, filter):
+        events = list(self.activity_logs.iter_activity_events(st, et, filter))
+        events.sort(key=lambda event: event['CreationTime'])
+
+        return events
+
+    def iter_windows_events(self, start, end, filter=None):
+        """
+        Fetches the events of a time range window by window
+        :param start: The start of the range, a date or datetime; naive datetimes are taken as UTC
+        :param end: The exclusive end of the range, a date or datetime
+        :param filter: The optional filter string, see ActivityLogs.get_activity_logs
+        :return: A generator of ((start, end), events) tuples in time order, the events of each window sorted by
+        CreationTime
+        """
+        windows = self.iter_windows(start, end)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = collections.deque()
+
+            try:
+                # keep the pool busy, but only hold a bounded number of fetched windows in memory
+                for window in windows:
+                    pending.append((window, executor.submit(self._fetch_window, window[0], window[1], filter)))
+
+                    if len(pending) >= self.max_workers * 2:
+                        window, future = pending.popleft()
+                        yield window, future.result()
+
+                while pending:
+                    window, future = pending.popleft()
+                    yield window, future.result()
+            finally:
+                # the generator was closed early or a window failed, don't fetch the windows not started yet
+                for _, future in pending:
+                    future.cancel()
+
+    def harvest(self, start, end, filter=None):
+        """
+        Fetches the events of a time range in time order
+        :param start: The start of the range, a date or datetime; naive datetimes are taken as UTC
+        :param end: The exclusive end of the range, a date or datetime
+        :param filter: The optional filter string, see ActivityLogs.get_activity_logs
+        :return: A generator of activity event dicts
+        """
+        for _, events in self.iter_windows_events(start, end, filter):
+            yield from events
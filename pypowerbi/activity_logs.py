@@ -1,10 +1,9 @@
 # -*- coding: future_fstrings -*-
-import requests
-
-import datetime
 
 from requests.exceptions import HTTPError
 
+from .utils import parse_powerbi_datetime
+
 
 class ActivityLogs:
 
@@ -16,92 +15,153 @@ class ActivityLogs:
         self.group_part = "admin"   # This is always admin. Not really a group, but follows the
                                     # format of the rest of the library code
 
-    def get_activity_logs(self, st, et=None, filter=None):
-        """
-        Get's the activity log for the specified date or date range. If et is None, it will get all logs (from midnight
-        to 11:59:59 UTC) for the date specified by st. If et is set, it will retrieve logs from st-et. Note that the
-        Power BI Activity Service currently supports only retrieving one day of logs at a time.
-
-        "filter" is a string parameter that's sent to the service to filter the types of events returned. For example,
-        "Activity eq 'viewreport' and UserId eq 'john@contoso.com'" gets report views for john(contoso.com).
-        Right now the service only supports the operators ['eq', 'and'].
-
-        NOTE: It appears that only data from December 15th, 2019 and on can be retrieved by the API as of the writing
-        of this code. This isn't an official limitation I've found in the documentation, but seems to be the case.
-
-        NOTE: This API allows at most 200 Requests per hour.
-
-        For a good overview of the service, see https://powerbi.microsoft.com/en-us/blog/the-power-bi-activity-log-makes-it-easy-to-download-activity-data-for-custom-usage-reporting/
+    # the time format of the startDateTime and endDateTime parameters
+    date_time_format = '%Y-%m-%dT%H:%M:%S'
 
-        :param st: The date to retrieve usage for (python datetime).
-        :param et: The date to retrieve usage for (python datetime).
-        :param filter: A string that defines a filter for retrieving the information. See the Power BI REST API
-                       Documentation for details.
-        :return:
+    @classmethod
+    def activity_events_query(cls, st, et=None, filter=None):
+        """
+        Forms the query string of an activity events request
+        :param st: The date or start time to retrieve events for (python datetime)
+        :param et: The optional end time; if None, the whole day of st is retrieved
+        :param filter: The optional filter string
+        :return: The query string, without the leading '?'
         """
-        # TODO: It would be nice if the available parameters for the "filter" function were defined somewhere in code.
-
         if et is None:
             dt_str = st.strftime("%Y-%m-%d")
             st_dt_str = f"{dt_str}T00:00:00"
             et_dt_str = f"{dt_str}T23:59:59"
         else:
-            st_dt_str = st.strftime("%Y-%m-%dT:%H%M%S")
-            et_dt_str = et.strftime("%Y-%m-%dT:%H%M%S")
+            st_dt_str = st.strftime(cls.date_time_format)
+            et_dt_str = et.strftime(cls.date_time_format)
 
-        # https://api.powerbi.com/v1.0/myorg/admin/activityevents?startDateTime='{st_dt_str}'&endDateTime='{et_dt_str}'
-
-        # form the url
-        filter_snippet = f"startDateTime='{st_dt_str}'&endDateTime='{et_dt_str}'"
-        url = f'{self.base_url}/{self.group_part}/{self.activities_events_snippet}?{filter_snippet}'
+        query = f"startDateTime='{st_dt_str}'&endDateTime='{et_dt_str}'"
 
         if filter is not None:
-            url += f"$filter={filter}"
+            query += f"&$filter={filter}"
 
-        # form the headers
-        headers = self.client.auth_header
+        return query
 
-        # get the response
-        response = requests.get(url, headers=headers)
+    @classmethod
+    def convert_activity_event(cls, event):
+        """
+        Converts the CreationTime of an activity event dict to a UTC python datetime, in place
+        :param event: The activity event dict
+        :return: The event
+        """
+        event["CreationTime"] = parse_powerbi_datetime(event["CreationTime"], utc=True)
 
-        # 200 is the only successful code, raise an exception on any other response code
-        if response.status_code != 200:
-            raise HTTPError(response, f'Get Datasets request returned http error: {response.json()}')
+        return event
 
-        response_obj = response.json()
+    def iter_activity_event_pages(self, st, et=None, filter=None, continuation_uri=None):
+        """
+        Fetches the pages of activity events of a date or date range one after the other, following the
+        continuation uri of each page. Pages are fetched lazily, as the generator is consumed.
 
-        event_entities = response_obj["activityEventEntities"]
-        continuation_uri = response_obj["continuationUri"]
-        continuation_token = response_obj["continuationToken"]
+        :param st: The date to retrieve usage for (python datetime).
+        :param et: The date to retrieve usage for (python datetime).
+        :param filter: A string that defines a filter for retrieving the information, see get_activity_logs
+        :param continuation_uri: The optional continuation uri of a page to resume from; st, et and filter are then
+        ignored, the uri carries them
+        :return: A generator of ActivityEventsPages, with the CreationTime of their events still unconverted
+        """
+        # https://api.powerbi.com/v1.0/myorg/admin/activityevents?startDateTime='{st_dt_str}'&endDateTime='{et_dt_str}'
 
-        activity_events = event_entities
+        # form the url
+        if continuation_uri is not None:
+            url = continuation_uri
+        else:
+            url = f'{self.base_url}/{self.group_part}/{self.activities_events_snippet}?' \
+                  f'{self.activity_events_query(st, et, filter)}'
+
+        # form the headers
+        headers = self.client.auth_header
 
         # Even if nothing is returned, it takes around 24 tries until no continuation token is returned.
         # (This is how Microsoft says the API is to be used.)
         # It seems to send the first set of actual data around 12-15 calls in. This doesn't seem to change even if you
         # slow down the API calls (in total number of calls required or when the first set of actual data is returned).
+        while url is not None:
+            # get the response
+            response = self.client.transport.get(url, headers=headers)
 
-        cont_count = 1
-        while continuation_token is not None:
+            # 200 is the only successful code, raise an exception on any other response code
+            if response.status_code != 200:
+                raise HTTPError(response, f'Get activity events request returned http error: {response.json()}')
 
-            response = requests.get(continuation_uri, headers=headers)
-            response_obj = response.json()
+            page = ActivityEventsPage.from_dict(response.json())
+            yield page
 
-            event_entities = response_obj["activityEventEntities"]
-            continuation_uri = response_obj["continuationUri"]
-            continuation_token = response_obj["continuationToken"]
+            # the service keeps handing out continuation tokens until the last page
+            url = page.continuation_uri if page.continuation_token is not None else None
+            # the token may have been refreshed while the caller processed the page
+            headers = self.client.auth_header
 
-            activity_events.extend(event_entities)
-            # print(f"{cont_count}: {len(event_entities)}")
-            cont_count += 1
+    def iter_activity_events(self, st, et=None, filter=None):
+        """
+        Fetches the activity events of a date or date range page by page, converting their CreationTime as they
+        arrive, so only one page of events is held in memory at a time.
 
-        # print(f"Took {cont_count} tries to exhaust continuation token for {len(activity_events)} events.")
+        :param st: The date to retrieve usage for (python datetime).
+        :param et: The date to retrieve usage for (python datetime).
+        :param filter: A string that defines a filter for retrieving the information, see get_activity_logs
+        :return: A generator of activity event dicts
+        """
+        for page in self.iter_activity_event_pages(st, et, filter):
+            for event in page.events:
+                yield self.convert_activity_event(event)
 
-        # Convert Datetime Strings to Python datetimes
-        _date_fmt_str = '%Y-%m-%dT%H:%M:%S'
-        for event in activity_events:
-            event["CreationTime"] = datetime.datetime.strptime(event["CreationTime"], _date_fmt_str)
-            # Change the Timezone to UTC
-            event["CreationTime"] = event["CreationTime"].replace(tzinfo=datetime.timezone.utc)
+    def get_activity_logs(self, st, et=None, filter=None):
+        """
+        Get's the activity log for the specified date or date range. If et is None, it will get all logs (from midnight
+        to 11:59:59 UTC) for the date specified by st. If et is set, it will retrieve logs from st-et. Note that the
+        Power BI Activity Service currently supports only retrieving one day of logs at a time.
 
-        return activity_events
+        "filter" is a string parameter that's sent to the service to filter the types of events returned. For example,
+        "Activity eq 'viewreport' and UserId eq 'john@contoso.com'" gets report views for john(contoso.com).
+        Right now the service only supports the operators ['eq', 'and'].
+
+        NOTE: It appears that only data from December 15th, 2019 and on can be retrieved by the API as of the writing
+        of this code. This isn't an official limitation I've found in the documentation, but seems to be the case.
+
+        NOTE: This API allows at most 200 Requests per hour. Construct the client with
+        rate_limiter=RateLimiter.powerbi_defaults() to have requests wait for that budget instead of being throttled.
+
+        NOTE: All events are held in memory at once; use iter_activity_events to process them page by page.
+
+        For a good overview of the service, see https://powerbi.microsoft.com/en-us/blog/the-power-bi-activity-log-makes-it-easy-to-download-activity-data-for-custom-usage-reporting/
+
+        :param st: The date to retrieve usage for (python datetime).
+        :param et: The date to retrieve usage for (python datetime).
+        :param filter: A string that defines a filter for retrieving the information. See the Power BI REST API
+                       Documentation for details.
+        :return: The list of activity event dicts
+        """
+        # TODO: It would be nice if the available parameters for the "filter" function were defined somewhere in code.
+        return list(self.iter_activity_events(st, et, filter))
+
+
+class ActivityEventsPage:
+    """
+    A single page of an activity events response
+    """
+    events_key = 'activityEventEntities'
+    continuation_uri_key = 'continuationUri'
+    continuation_token_key = 'continuationToken'
+    last_result_set_key = 'lastResultSet'
+
+    @classmethod
+    def from_dict(cls, dictionary):
+        return cls(events=dictionary.get(cls.events_key) or [],
+                   continuation_uri=dictionary.get(cls.continuation_uri_key),
+                   continuation_token=dictionary.get(cls.continuation_token_key),
+                   last_result_set=dictionary.get(cls.last_result_set_key))
+
+    def __init__(self, events, continuation_uri=None, continuation_token=None, last_result_set=None):
+        self.events = events
+        self.continuation_uri = continuation_uri
+        self.continuation_token = continuation_token
+        self.last_result_set = last_result_set
+
+    def __repr__(self):
+        return f'<ActivityEventsPage {len(self.events)} events, continuation token {self.continuation_token}>'
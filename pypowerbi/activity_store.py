@@ -0,0 +1,437 @@
+# -*- coding: future_fstrings -*-
+import os
+import json
+import zlib
+import heapq
+import bisect
+import datetime
+import threading
+import collections
+
+from .activity_event import ActivityEvent
+from .utils import parse_powerbi_datetime
+from .activity_harvester import ActivityLogHarvester
+
+
+class ActivityEventSegment:
+    """
+    An immutable, column-wise block of activity events of a single UTC day, sorted by CreationTime.
+
+    String columns are dictionary encoded, a column holding the index of each value in a list of the distinct
+    values, and the indexed columns keep the rows of each of their distinct values. Segments are stored as zlib
+    compressed json.
+    """
+    time_column = 'CreationTime'
+
+    def __init__(self, times, columns, indexes):
+        """
+        :param times: The sorted CreationTimes of the events, as UTC POSIX timestamps
+        :param columns: A dict of column name to either {'values': [...]} or, for dictionary encoded string columns,
+        {'dictionary': [...], 'codes': [...]}, where a code of None is a missing value
+        :param indexes: A dict of column name to the list of rows of each code of the column's dictionary
+        """
+        self.times = times
+        self.columns = columns
+        self.indexes = indexes
+        # the code of each value of the dictionary encoded columns, built on first lookup
+        self._codes = {}
+
+    def __len__(self):
+        return len(self.times)
+
+    @classmethod
+    def from_events(cls, events, indexed_columns=()):
+        """
+        Encodes events into a segment
+        :param events: The event dicts, with their CreationTime as a datetime
+        :param indexed_columns: The names of the string columns to index
+        :return: The segment
+        """
+        events = sorted(events, key=lambda event: event[cls.time_column])
+        times = [event[cls.time_column].timestamp() for event in events]
+
+        names = []
+        seen = set()
+        for event in events:
+            for name in event:
+                if name != cls.time_column and name not in seen:
+                    seen.add(name)
+                    names.append(name)
+
+        columns = {}
+        indexes = {}
+        for name in names:
+            values = [event.get(name) for event in events]
+
+            if not all(value is None or isinstance(value, str) for value in values):
+                columns[name] = {'values': values}
+                continue
+
+            dictionary = []
+            codes_by_value = {}
+            codes = []
+            for value in values:
+                if value is None:
+                    codes.append(None)
+                    continue
+
+                code = codes_by_value.get(value)
+                if code is None:
+                    code = len(dictionary)
+                    codes_by_value[value] = code
+                    dictionary.append(value)
+                codes.append(code)
+
+            columns[name] = {'dictionary': dictionary, 'codes': codes}
+
+            if name in indexed_columns:
+                rows = [[] for _ in dictionary]
+                for row, code in enumerate(codes):
+                    if code is not None:
+                        rows[code].append(row)
+                indexes[name] = rows
+
+        return cls(times, columns, indexes)
+
+    @classmethod
+    def from_bytes(cls, data):
+        state = json.loads(zlib.decompress(data))
+
+        return cls(state['times'], state['columns'], state['indexes'])
+
+    def to_bytes(self):
+        state = {
+            'times': self.times,
+            'columns': self.columns,
+            'indexes': self.indexes,
+        }
+
+        return zlib.compress(json.dumps(state, separators=(',', ':')).encode('utf-8'))
+
+    def code_of(self, name, value):
+        """
+        :return: The dictionary code of a value of a string column, None if the segment does not hold the value
+        """
+        codes = self._codes.get(name)
+        if codes is None:
+            column = self.columns.get(name)
+            if column is None or 'dictionary' not in column:
+                return None
+
+            codes = {dictionary_value: code for code, dictionary_value in enumerate(column['dictionary'])}
+            self._codes[name] = codes
+
+        return codes.get(value)
+
+    def select(self, start=None, end=None, equals=None):
+        """
+        Selects rows by time range and column values
+        :param start: The optional UTC timestamp the rows start at, inclusive
+        :param end: The optional UTC timestamp the rows end at, exclusive
+        :param equals: An optional dict of column name to the value the rows must have
+        :return: The sorted list of selected rows
+        """
+        low = 0 if start is None else bisect.bisect_left(self.times, start)
+        high = len(self.times) if end is None else bisect.bisect_left(self.times, end)
+        if low >= high:
+            return []
+
+        rows = None
+        scans = []
+        for name, value in (equals or {}).items():
+            column = self.columns.get(name)
+            if column is None:
+                return []
+
+            if 'dictionary' not in column:
+                scans.append((column['values'], value))
+                continue
+
+            code = self.code_of(name, value)
+            if code is None:
+                return []
+
+            if name in self.indexes:
+                # intersect the posting lists of the indexed columns
+                matches = self.indexes[name][code]
+                rows = set(matches) if rows is None else rows.intersection(matches)
+            else:
+                scans.append((column['codes'], code))
+
+        if rows is None:
+            candidates = range(low, high)
+        else:
+            candidates = sorted(row for row in rows if low <= row < high)
+
+        if scans:
+            candidates = [row for row in candidates if all(values[row] == value for values, value in scans)]
+
+        return list(candidates)
+
+    def event(self, row, names=None):
+        """
+        Decodes a single event
+        :param row: The row of the event
+        :param names: The optional names of the columns to decode; all columns if None
+        :return: The event dict
+        """
+        event = {self.time_column: datetime.datetime.fromtimestamp(self.times[row], datetime.timezone.utc)}
+
+        for name, column in self.columns.items():
+            if names is not None and name not in names:
+                continue
+
+            if 'dictionary' in column:
+                code = column['codes'][row]
+                value = column['dictionary'][code] if code is not None else None
+            else:
+                value = column['values'][row]
+
+            if value is not None:
+                event[name] = value
+
+        return event
+
+
+class ActivityEventStore:
+    """
+    Local store of activity events, e.g. as yielded by ActivityLogs.iter_activity_events or passed to the handler of
+    an ActivityLogSync.
+
+    Events are partitioned by the UTC day of their CreationTime, every write adding a compressed, column-wise
+    ActivityEventSegment to the directory of each day it holds events of. The UserId and Activity columns are
+    indexed, so queries by user, activity and time range read only the matching rows of the segments of the days
+    queried. The most recently used segments are kept decoded in memory, so repeated queries don't decompress them
+    again.
+
+    Events are stored once per Id: write() skips events whose Id the store holds already, e.g. a page replayed by an
+    ActivityLogSync after a crash, and compact() drops the duplicates a compaction interrupted before it removed the
+    segments it merged left behind.
+    """
+    segment_suffix = '.seg'
+    day_format = '%Y-%m-%d'
+    default_cached_segments = 256
+
+    default_indexed_columns = (ActivityEvent.user_id_key, ActivityEvent.activity_key)
+
+    def __init__(self, directory, indexed_columns=None, cached_segments=None):
+        """
+        Constructs an activity event store
+
+        :param directory: The directory of the store, created if it does not exist
+        :param indexed_columns: The names of the string columns to index; defaults to UserId and Activity
+        :param cached_segments: The number of decoded segments kept in memory; defaults to 256
+        """
+        if indexed_columns is None:
+            indexed_columns = self.default_indexed_columns
+
+        if cached_segments is None:
+            cached_segments = self.default_cached_segments
+
+        self.directory = directory
+        self.indexed_columns = tuple(indexed_columns)
+        self.cached_segments = cached_segments
+
+        # decoded segments by path, least recently used first
+        self._segments = collections.OrderedDict()
+        self._lock = threading.Lock()
+        # serializes writes and compactions, so an Id written concurrently is stored once
+        self._write_lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def event_dict(cls, event):
+        """
+        Converts an event to the dict stored
+        :param event: An activity event dict or ActivityEvent, whose CreationTime is a datetime or a string
+        :return: The event dict, with its CreationTime as a UTC datetime
+        """
+        if isinstance(event, ActivityEvent):
+            event = {getattr(ActivityEvent, name): getattr(event, name[:-len('_key')])
+                     for name in dir(ActivityEvent) if name.endswith('_key')}
+            event = {key: value for key, value in event.items() if value is not None}
+        else:
+            event = dict(event)
+
+        creation_time = event[ActivityEventSegment.time_column]
+        if isinstance(creation_time, str):
+            creation_time = parse_powerbi_datetime(creation_time, utc=True)
+        elif creation_time.tzinfo is None:
+            creation_time = creation_time.replace(tzinfo=datetime.timezone.utc)
+        event[ActivityEventSegment.time_column] = creation_time.astimezone(datetime.timezone.utc)
+
+        return event
+
+    def days(self):
+        """
+        :return: The sorted list of the dates the store holds events of
+        """
+        return sorted(datetime.datetime.strptime(name, self.day_format).date() for name in os.listdir(self.directory)
+                      if os.path.isdir(os.path.join(self.directory, name)))
+
+    def write(self, events):
+        """
+        Adds events to the store, skipping the events whose Id is stored already
+        :param events: An iterable of activity event dicts or ActivityEvents
+        :return: The number of events written
+        """
+        days = {}
+        for event in events:
+            event = self.event_dict(event)
+            days.setdefault(event[ActivityEventSegment.time_column].date(), []).append(event)
+
+        written = 0
+        with self._write_lock:
+            for day, day_events in days.items():
+                segments = [self._load(path) for path in self._segment_paths(day)]
+                day_events = self._unique(day_events, segments)
+                if day_events:
+                    self._write_segment(day, ActivityEventSegment.from_events(day_events, self.indexed_columns))
+                    written += len(day_events)
+
+        return written
+
+    def compact(self, day):
+        """
+        Merges the segments of a day into one, which makes queries on days written to in many small batches faster
+        :param day: The date of the day
+        """
+        with self._write_lock:
+            paths = self._segment_paths(day)
+            if len(paths) < 2:
+                return
+
+            events = self._unique(segment.event(row) for segment in (self._load(path) for path in paths)
+                                  for row in range(len(segment)))
+            self._write_segment(day, ActivityEventSegment.from_events(events, self.indexed_columns))
+
+            with self._lock:
+                for path in paths:
+                    os.remove(path)
+                    self._segments.pop(path, None)
+
+    def query(self, start=None, end=None, user_id=None, activity=None, item_name=None, columns=None, **equals):
+        """
+        Finds events
+        :param start: The optional date or datetime the events start at, inclusive; naive datetimes are taken as UTC
+        :param end: The optional date or datetime the events end at, exclusive
+        :param user_id: The optional UserId of the events
+        :param activity: The optional Activity of the events
+        :param item_name: The optional ItemName of the events
+        :param columns: The optional names of the columns to return; all columns if None
+        :param equals: Further column names and the values the events must have
+        :return: A generator of the event dicts in time order
+        """
+        if user_id is not None:
+            equals[ActivityEvent.user_id_key] = user_id
+        if activity is not None:
+            equals[ActivityEvent.activity_key] = activity
+        if item_name is not None:
+            equals[ActivityEvent.item_name_key] = item_name
+
+        start = self._as_utc(start)
+        end = self._as_utc(end)
+        start_timestamp = start.timestamp() if start is not None else None
+        end_timestamp = end.timestamp() if end is not None else None
+        names = set(columns) if columns is not None else None
+
+        for day in self.days():
+            if start is not None and day < start.date():
+                continue
+            if end is not None and datetime.datetime.combine(day, datetime.time(), datetime.timezone.utc) >= end:
+                break
+
+            # merge the events of the day's segments in time order
+            selections = []
+            for path in self._segment_paths(day):
+                segment = self._load(path)
+                rows = segment.select(start_timestamp, end_timestamp, equals)
+                if rows:
+                    selections.append(self._iter_selection(segment, rows))
+
+            for _, segment, row in heapq.merge(*selections, key=lambda selection: selection[0]):
+                yield segment.event(row, names)
+
+    def count(self, start=None, end=None, user_id=None, activity=None, item_name=None, **equals):
+        """
+        Counts events, see query
+        :return: The number of matching events
+        """
+        return sum(1 for _ in self.query(start, end, user_id, activity, item_name, columns=(), **equals))
+
+    @staticmethod
+    def _unique(events, segments=()):
+        """
+        :return: The list of the events whose Id is neither held by one of the segments nor repeated by an earlier
+        event; events without an Id are all kept
+        """
+        seen = set()
+        unique = []
+        for event in events:
+            event_id = event.get(ActivityEvent.id_key)
+            if event_id is not None:
+                if event_id in seen or any(segment.code_of(ActivityEvent.id_key, event_id) is not None
+                                           for segment in segments):
+                    continue
+                seen.add(event_id)
+
+            unique.append(event)
+
+        return unique
+
+    @staticmethod
+    def _iter_selection(segment, rows):
+        for row in rows:
+            yield segment.times[row], segment, row
+
+    @staticmethod
+    def _as_utc(value):
+        return ActivityLogHarvester.to_utc(value) if value is not None else None
+
+    def _day_directory(self, day):
+        return os.path.join(self.directory, day.strftime(self.day_format))
+
+    def _segment_paths(self, day):
+        day_directory = self._day_directory(day)
+        if not os.path.isdir(day_directory):
+            return []
+
+        return [os.path.join(day_directory, name) for name in sorted(os.listdir(day_directory))
+                if name.endswith(self.segment_suffix)]
+
+    def _write_segment(self, day, segment):
+        day_directory = self._day_directory(day)
+        os.makedirs(day_directory, exist_ok=True)
+
+        with self._lock:
+            paths = self._segment_paths(day)
+            number = int(os.path.basename(paths[-1])[:-len(self.segment_suffix)]) + 1 if paths else 0
+            path = os.path.join(day_directory, f'{number:08d}{self.segment_suffix}')
+
+            # write to a temporary file, then swap it in, so queries never read a partial segment
+            temp_path = f'{path}.tmp'
+            with open(temp_path, 'wb') as segment_file:
+                segment_file.write(segment.to_bytes())
+            os.replace(temp_path, path)
+
+            self._cache(path, segment)
+
+    def _load(self, path):
+        with self._lock:
+            segment = self._segments.get(path)
+            if segment is None:
+                with open(path, 'rb') as segment_file:
+                    segment = ActivityEventSegment.from_bytes(segment_file.read())
+
+            self._cache(path, segment)
+
+            return segment
+
+    def _cache(self, path, segment):
+        # called with the lock held
+        self._segments[path] = segment
+        self._segments.move_to_end(path)
+
+        while len(self._segments) > self.cached_segments:
+            self._segments.popitem(last=False)
@@ -0,0 +1,138 @@
+# -*- coding: future_fstrings -*-
+import os
+import json
+import datetime
+
+from .activity_logs import ActivityLogs
+from .activity_harvester import ActivityLogHarvester
+
+
+class ActivityLogSync:
+    """
+    Incremental, resumable sync of activity events.
+
+    Events are fetched window by window, as by the ActivityLogHarvester but one window at a time, and handed to a
+    handler page by page. After each page is handled, the window and the continuation uri of the next page are saved
+    to a local state file, and once a window is finished the time synced up to is saved. A sync that fails, or a
+    process that stops, resumes from the first page not handled yet, and later syncs only fetch events newer than
+    the last finished window. A page handled just before a failure to save the state is handed over again.
+
+    The state file is json: {"filter": ..., "synced_until": ..., "window": [start, end], "continuation_uri": ...,
+    "continuation_token": ...}, times in iso format.
+    """
+    # the activity log is not complete right away, recent events are left for the next sync
+    default_lag = datetime.timedelta(hours=1)
+
+    def __init__(self, activity_logs, state_path, start=None, filter=None, window=None, lag=None):
+        """
+        Constructs an activity log sync
+
+        :param activity_logs: The ActivityLogs operations module to fetch events with, e.g. client.activity_logs
+        :param state_path: The path of the state file, created by the first sync
+        :param start: The date or datetime the first sync starts at; only used while there is no state file
+        :param filter: The optional filter string, see ActivityLogs.get_activity_logs; cannot change between syncs
+        :param window: The window length, see ActivityLogHarvester; defaults to a day
+        :param lag: How far behind the current time a sync stops by default; defaults to an hour
+        """
+        if lag is None:
+            lag = self.default_lag
+
+        self.activity_logs = activity_logs
+        self.state_path = state_path
+        self.start = start
+        self.filter = filter
+        self.lag = lag
+        self.harvester = ActivityLogHarvester(activity_logs, max_workers=1, window=window)
+
+    @property
+    def synced_until(self):
+        """
+        The UTC time events have been synced up to, None before the first sync
+        """
+        state = self._load_state()
+        if state is None:
+            return None
+
+        return datetime.datetime.fromisoformat(state['synced_until'])
+
+    def sync(self, handler, until=None):
+        """
+        Fetches the events from where the last sync stopped
+        :param handler: A callable given the list of events of each page, with their CreationTime converted; the
+        page is checkpointed once it returns
+        :param until: The optional date or datetime to sync up to; defaults to the current time minus the lag
+        :return: The number of events handed to the handler
+        """
+        state = self._load_state()
+
+        if state is None:
+            if self.start is None:
+                raise ValueError(f'No sync state at {self.state_path}, a start is required for the first sync')
+
+            state = {
+                'filter': self.filter,
+                'synced_until': ActivityLogHarvester.to_utc(self.start).isoformat(),
+                'window': None,
+                'continuation_uri': None,
+                'continuation_token': None,
+            }
+            self._save_state(state)
+        elif state['filter'] != self.filter:
+            raise ValueError(f'The sync state at {self.state_path} was created with filter {state["filter"]!r}, '
+                             f'not {self.filter!r}')
+
+        if until is None:
+            until = datetime.datetime.now(datetime.timezone.utc) - self.lag
+
+        event_count = 0
+
+        # finish the window an earlier sync was interrupted in first
+        if state['window'] is not None:
+            st, et = (datetime.datetime.fromisoformat(x) for x in state['window'])
+            event_count += self._sync_window(handler, state, st, et, state['continuation_uri'])
+
+        synced_until = datetime.datetime.fromisoformat(state['synced_until'])
+        for st, et in self.harvester.iter_windows(synced_until, until):
+            event_count += self._sync_window(handler, state, st, et)
+
+        return event_count
+
+    def _sync_window(self, handler, state, st, et, continuation_uri=None):
+        event_count = 0
+
+        for page in self.activity_logs.iter_activity_event_pages(st, et, self.filter, continuation_uri):
+            if page.events:
+                handler([ActivityLogs.convert_activity_event(event) for event in page.events])
+                event_count += len(page.events)
+
+            if page.continuation_token is not None:
+                state['window'] = [st.isoformat(), et.isoformat()]
+                state['continuation_uri'] = page.continuation_uri
+                state['continuation_token'] = page.continuation_token
+                self._save_state(state)
+
+        # the end of a window is its last second
+        state['synced_until'] = (et + datetime.timedelta(seconds=1)).isoformat()
+        state['window'] = None
+        state['continuation_uri'] = None
+        state['continuation_token'] = None
+        self._save_state(state)
+
+        return event_count
+
+    def _load_state(self):
+        if not os.path.exists(self.state_path):
+            return None
+
+        with open(self.state_path, 'r') as state_file:
+            return json.load(state_file)
+
+    def _save_state(self, state):
+        # write to a temporary file, then swap it in, so a crash never leaves a torn state file
+        temp_path = f'{self.state_path}.tmp'
+        with open(temp_path, 'w') as state_file:
+            json.dump(state, state_file)
+            state_file.flush()
+            os.fsync(state_file.fileno())
+
+        os.replace(temp_path, self.state_path)
@@ -1,8 +1,9 @@
 # -*- coding: future_fstrings -*-
-import requests
 import json
 import urllib.parse
 
+from concurrent.futures import ThreadPoolExecutor
+
 from requests.exceptions import HTTPError
 from .group import Group
 from .group_user import GroupUser
@@ -27,6 +28,9 @@ class Admin:
     get_datasets_value_key = 'value'
     get_activity_events_value_key = 'activityEventEntities'
 
+    # the service returns at most this many groups per request
+    max_groups_page_size = 5000
+
     def __init__(self, client):
         self.client = client
         self.base_url = f'{self.client.api_url}/{self.client.api_version_snippet}/{self.client.api_myorg_snippet}'
@@ -40,6 +44,55 @@ class Admin:
         :return: list
             The list of groups
         """
+        return self.groups_from_get_groups_response(self._get_groups_response(top, expand_str, filter_str, skip))
+
+    def iter_groups(self, expand=None, filter=None, page_size=5000, prefetch=True):
+        """
+        Fetches all groups page by page, using $top and $skip, creating the Group objects lazily
+        :param expand: Optional OData expand string, e.g. 'reports,datasets,users'
+        :param filter: Optional OData filter string to filter results
+        :param page_size: The number of groups requested per page, at most 5000
+        :param prefetch: If True, the next page is requested while the groups of the current one are consumed
+        :return: A generator of groups
+        """
+        # a short page ends the paging, so a page size the service caps would end it after the first page
+        if not 1 <= page_size <= self.max_groups_page_size:
+            raise ValueError(f'page_size must be between 1 and {self.max_groups_page_size}, got {page_size}')
+
+        return self._iter_groups(expand, filter, page_size, prefetch)
+
+    def _iter_groups(self, expand, filter, page_size, prefetch):
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+
+        def fetch(skip):
+            return json.loads(self._get_groups_response(page_size, expand, filter, skip).text)
+
+        try:
+            skip = 0
+            page = fetch(skip)
+
+            while True:
+                entries = page[self.get_reports_value_key]
+                # a short page is the last one
+                last_page = len(entries) < page_size
+                skip += len(entries)
+
+                next_page = executor.submit(fetch, skip) if executor is not None and not last_page else None
+
+                # drop the page's reference to the entries, so the groups already consumed can be freed
+                del page
+                for entry in entries:
+                    yield Group.from_dict(entry)
+
+                if last_page:
+                    return
+
+                page = next_page.result() if next_page is not None else fetch(skip)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False)
+
+    def _get_groups_response(self, top=5000, expand_str=None, filter_str=None, skip=None):
         query_parameters = []
 
         if top:
@@ -66,15 +119,13 @@ class Admin:
         # form the headers
         headers = self.client.auth_header
         # get the response
-        response = requests.get(url, headers=headers)
-        #print(url, headers, response)
+        response = self.client.transport.get(url, headers=headers)
 
         # 200 is the only successful code, raise an exception on any other response code
         if response.status_code != 200:
-            print(response.content)
             raise HTTPError(response, f'Get Groups request returned http error: {response.json()}')
 
-        return self.groups_from_get_groups_response(response)
+        return response
 
     def get_group_users(self, group_id):
         """
@@ -91,7 +142,7 @@ class Admin:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.get(url, headers=headers)
+        response = self.client.transport.get(url, headers=headers)
         # 200 - OK. Indicates success. List of users.
         if response.status_code == 200:
             users = self.users_from_get_group_users_response(response)
@@ -118,7 +169,7 @@ class Admin:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.get(url, headers=headers)
+        response = self.client.transport.get(url, headers=headers)
 
         # 200 - OK. Indicates success. List of reports.
         if response.status_code == 200:
@@ -142,7 +193,7 @@ class Admin:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.get(url, headers=headers)
+        response = self.client.transport.get(url, headers=headers)
         # 200 - OK. Indicates success. List of users.
         if response.status_code == 200:
             users = self.users_from_get_report_users_response(response)
@@ -169,7 +220,7 @@ class Admin:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.get(url, headers=headers)
+        response = self.client.transport.get(url, headers=headers)
 
         # 200 is the only successful code, raise an exception on any other response code
         if response.status_code != 200:
@@ -191,7 +242,7 @@ class Admin:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.get(url, headers=headers)
+        response = self.client.transport.get(url, headers=headers)
         # 200 - OK. Indicates success. List of users.
         if response.status_code == 200:
             users = self.users_from_get_dataset_users_response(response)
@@ -233,7 +284,7 @@ class Admin:
         # form the headers
         headers = self.client.auth_header
         # get the response
-        response = requests.get(url, headers=headers)
+        response = self.client.transport.get(url, headers=headers)
 
         # 200 is the only successful code, raise an exception on any other response code
         if response.status_code != 200:
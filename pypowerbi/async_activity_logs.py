@@ -0,0 +1,74 @@
+# -*- coding: future_fstrings -*-
+from requests.exceptions import HTTPError
+
+from .activity_logs import ActivityLogs, ActivityEventsPage
+
+
+class AsyncActivityLogs:
+    """
+    Asynchronous counterpart of ActivityLogs
+    """
+    activities_events_snippet = 'activityevents'
+    group_part = 'admin'
+
+    def __init__(self, client):
+        self.client = client
+        self.base_url = f'{self.client.api_url}/{self.client.api_version_snippet}/{self.client.api_myorg_snippet}'
+
+    async def iter_activity_event_pages(self, st, et=None, filter=None, continuation_uri=None):
+        """
+        Fetches the pages of activity events one after the other, see ActivityLogs.iter_activity_event_pages
+
+        :param st: The date to retrieve usage for (python datetime).
+        :param et: The date to retrieve usage for (python datetime).
+        :param filter: A string that defines a filter for retrieving the information
+        :param continuation_uri: The optional continuation uri of a page to resume from
+        :return: An async generator of ActivityEventsPages
+        """
+        # form the url
+        if continuation_uri is not None:
+            url = continuation_uri
+        else:
+            url = f'{self.base_url}/{self.group_part}/{self.activities_events_snippet}?' \
+                  f'{ActivityLogs.activity_events_query(st, et, filter)}'
+
+        # continuation pages depend on each other and are fetched one after the other
+        while url is not None:
+            # get the response
+            response = await self.client.transport.get(url, headers=self.client.auth_header)
+
+            # 200 is the only successful code, raise an exception on any other response code
+            if response.status_code != 200:
+                raise HTTPError(response, f'Get activity events request returned http error: {response.json()}')
+
+            page = ActivityEventsPage.from_dict(response.json())
+            yield page
+
+            url = page.continuation_uri if page.continuation_token is not None else None
+
+    async def iter_activity_events(self, st, et=None, filter=None):
+        """
+        Fetches the activity events page by page, see ActivityLogs.iter_activity_events
+
+        :param st: The date to retrieve usage for (python datetime).
+        :param et: The date to retrieve usage for (python datetime).
+        :param filter: A string that defines a filter for retrieving the information
+        :return: An async generator of activity event dicts
+        """
+        async for page in self.iter_activity_event_pages(st, et, filter):
+            for event in page.events:
+                yield ActivityLogs.convert_activity_event(event)
+
+    async def get_activity_logs(self, st, et=None, filter=None):
+        """
+        Get's the activity log for the specified date or date range, see ActivityLogs.get_activity_logs
+
+        NOTE: This API allows at most 200 Requests per hour.
+
+        :param st: The date to retrieve usage for (python datetime).
+        :param et: The date to retrieve usage for (python datetime).
+        :param filter: A string that defines a filter for retrieving the information. See the Power BI REST API
+                       Documentation for details.
+        :return: The list of activity event dicts
+        """
+        return [event async for event in self.iter_activity_events(st, et, filter)]
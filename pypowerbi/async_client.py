@@ -0,0 +1,99 @@
+# -*- coding: future_fstrings -*-
+
+from .client import PowerBIClient
+from .retry import RetryPolicy
+from .authentication import TokenProvider
+from .async_transport import AsyncTransport
+from .async_datasets import AsyncDatasets
+from .async_reports import AsyncReports
+from .async_groups import AsyncGroups
+from .async_gateways import AsyncGateways
+from .async_imports import AsyncImports
+from .async_activity_logs import AsyncActivityLogs
+
+
+class AsyncPowerBIClient:
+    """
+    asyncio client mirroring PowerBIClient. Every operation is a coroutine returning the same model objects as the
+    synchronous client, and all of them share one non-blocking, connection-pooled AsyncTransport.
+
+    The client-side conveniences built on the synchronous operations are not mirrored: the MetadataCache listings and
+    the find_*_by_name lookups, and Datasets.wait_for_refresh(es), which polls on threads.
+    """
+    default_resource_url = PowerBIClient.default_resource_url
+    default_api_url = PowerBIClient.default_api_url
+    default_authority_url = PowerBIClient.default_authority_url
+
+    api_version_snippet = PowerBIClient.api_version_snippet
+    api_myorg_snippet = PowerBIClient.api_myorg_snippet
+
+    def __init__(self, api_url, token, transport=None, retry_policy=None, rate_limiter=None, max_concurrency=None):
+        """
+        Constructs an async client
+
+        :param api_url: The api_url, usually 'https://api.powerbi.com'
+        :param token: The adal token dict or TokenProvider to authenticate with
+        :param transport: The optional transport shared by all operation modules; defaults to a new AsyncTransport
+        :param retry_policy: The optional RetryPolicy applied to every request; a new transport defaults to
+        RetryPolicy(), a given transport keeps its own policy unless this is set
+        :param rate_limiter: The optional RateLimiter every request waits for, e.g. RateLimiter.powerbi_defaults()
+        :param max_concurrency: The maximum number of requests in flight for a new transport; defaults to 100
+        """
+        self.api_url = api_url
+        self.token = token
+
+        if transport is None:
+            if retry_policy is None:
+                retry_policy = RetryPolicy()
+            transport = AsyncTransport(max_concurrency=max_concurrency, retry_policy=retry_policy)
+        elif retry_policy is not None:
+            transport.retry_policy = retry_policy
+
+        if rate_limiter is not None:
+            transport.rate_limiter = rate_limiter
+
+        self.transport = transport
+
+        self.datasets = AsyncDatasets(self)
+        self.reports = AsyncReports(self)
+        self.imports = AsyncImports(self)
+        self.groups = AsyncGroups(self)
+        self.gateways = AsyncGateways(self)
+        self.activity_logs = AsyncActivityLogs(self)
+
+    @property
+    def token(self):
+        return self.token_provider.token
+
+    @token.setter
+    def token(self, token):
+        if not isinstance(token, TokenProvider):
+            token = TokenProvider(token)
+
+        self.token_provider = token
+
+    @property
+    def auth_header(self):
+        # background refreshing providers renew the token on their own thread, keeping this lookup non-blocking
+        return self.token_provider.auth_header
+
+    @property
+    def retry_policy(self):
+        return self.transport.retry_policy
+
+    @property
+    def rate_limiter(self):
+        return self.transport.rate_limiter
+
+    async def close(self):
+        """
+        Closes the pooled connections of the client's transport and stops background token refreshes
+        """
+        await self.transport.close()
+        self.token_provider.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
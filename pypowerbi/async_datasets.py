@@ -0,0 +1,453 @@
+# -*- coding: future_fstrings -*-
+import json
+
+from requests.exceptions import HTTPError
+from pypowerbi.utils import convert_datetime_fields
+
+from .dataset import Dataset, DatasetEncoder, TableEncoder, RefreshScheduleRequest
+from .payload import PayloadEncoder
+from .datasets import Datasets
+
+
+class AsyncDatasets:
+    """
+    Asynchronous counterpart of Datasets, returning the same model objects
+    """
+    # url snippets
+    groups_snippet = 'groups'
+    datasets_snippet = 'datasets'
+    tables_snippet = 'tables'
+    rows_snippet = 'rows'
+    parameters_snippet = 'parameters'
+    set_parameters_snippet = 'Default.UpdateParameters'
+    bind_gateway_snippet = 'Default.BindToGateway'
+    datasources_snippet = 'datasources'
+    refreshes_snippet = 'refreshes'
+    refresh_schedule_snippet = 'refreshSchedule'
+
+    # the response header holding the request id of a refresh
+    request_id_header = 'RequestId'
+
+    def __init__(self, client):
+        self.client = client
+        self.base_url = f'{self.client.api_url}/{self.client.api_version_snippet}/{self.client.api_myorg_snippet}'
+        self.payload_encoder = PayloadEncoder()
+
+    def _groups_part(self, group_id):
+        # group_id can be none, account for it
+        if group_id is None:
+            return '/'
+
+        return f'/{self.groups_snippet}/{group_id}/'
+
+    async def count(self, group_id=None):
+        """
+        Evaluates the number of datasets
+        :param group_id: The optional group id
+        :return: The number of datasets as returned by the API
+        """
+        return len(await self.get_datasets(group_id))
+
+    async def has_dataset(self, dataset_id, group_id=None):
+        """
+        Evaluates if the dataset exists
+        :param dataset_id: The id of the dataset to evaluate
+        :param group_id: The optional group id
+        :return: True if the dataset exists, False otherwise
+        """
+        datasets = await self.get_datasets(group_id)
+
+        return any(dataset.id == str(dataset_id) for dataset in datasets)
+
+    async def get_datasets(self, group_id=None):
+        """
+        Fetches all datasets
+        :param group_id: The optional group id to get datasets from
+        :return: The list of the datasets found
+        """
+        # form the url
+        url = f'{self.base_url}{self._groups_part(group_id)}{self.datasets_snippet}'
+        # form the headers
+        headers = self.client.auth_header
+
+        # get the response
+        response = await self.client.transport.get(url, headers=headers)
+
+        # 200 is the only successful code, raise an exception on any other response code
+        if response.status_code != 200:
+            raise HTTPError(response, f'Get Datasets request returned http error: {response.json()}')
+
+        return Datasets.datasets_from_get_datasets_response(response)
+
+    async def get_dataset(self, dataset_id, group_id=None):
+        """
+        Gets a single dataset
+        :param dataset_id: The id of the dataset to get
+        :param group_id: The optional id of the group to get the dataset from
+        :return: The dataset returned by the API
+        """
+        # form the url
+        url = f'{self.base_url}{self._groups_part(group_id)}{self.datasets_snippet}/{dataset_id}'
+        # form the headers
+        headers = self.client.auth_header
+
+        # get the response
+        response = await self.client.transport.get(url, headers=headers)
+
+        # 200 is the only successful code, raise an exception on any other response code
+        if response.status_code != 200:
+            raise HTTPError(response, f'Get Datasets request returned http error: {response.json()}')
+
+        return Dataset.from_dict(json.loads(response.text))
+
+    async def post_dataset(self, dataset, group_id=None):
+        """
+        Posts a single dataset
+        :param dataset: The dataset to push
+        :param group_id: The optional group id to push the dataset to
+        :return: The pushed dataset as returned by the API
+        """
+        # form the url
+        url = f'{self.base_url}{self._groups_part(group_id)}{self.datasets_snippet}'
+        # form the headers
+        headers = self.client.auth_header
+        # form the json dict
+        json_dict = DatasetEncoder().default(dataset)
+
+        # get the response
+        response = await self.client.transport.post(url, headers=headers, json=json_dict)
+
+        # 201 - Created. The request was fulfilled and a new Dataset was created.
+        if response.status_code != 201:
+            raise HTTPError(response, f'Post Datasets request returned http code: {response.json()}')
+
+        return Dataset.from_dict(json.loads(response.text))
+
+    async def delete_dataset(self, dataset_id, group_id=None):
+        """
+        Deletes a dataset
+        :param dataset_id: The id of the dataset to delete
+        :param group_id: The optional group id to delete the dataset from
+        """
+        # form the url
+        url = f'{self.base_url}{self._groups_part(group_id)}{self.datasets_snippet}/{dataset_id}'
+        # form the headers
+        headers = self.client.auth_header
+
+        # get the response
+        response = await self.client.transport.delete(url, headers=headers)
+
+        # 200 is the only successful code
+        if response.status_code != 200:
+            raise HTTPError(response, f'Delete Dataset request returned http error: {response.json()}')
+
+    async def delete_all_datasets(self, group_id=None):
+        """
+        Deletes all datasets
+        :param group_id: The optional group id of the group to delete all datasets from
+        """
+        # get all the datasets and delete each one
+        datasets = await self.get_datasets(group_id)
+        for dataset in datasets:
+            await self.delete_dataset(dataset.id, group_id)
+
+    async def get_tables(self, dataset_id, group_id=None):
+        """
+        Gets tables from a dataset
+        :param dataset_id: The id of the dataset which to get tables from
+        :param group_id: The optional id of the group which to get tables from
+        :return: A list of tables from the given group and dataset
+        """
+        # form the url
+        url = f'{self.base_url}{self._groups_part(group_id)}{self.datasets_snippet}/{dataset_id}/' \
+              f'{self.tables_snippet}'
+        # form the headers
+        headers = self.client.auth_header
+
+        # get the response
+        response = await self.client.transport.get(url, headers=headers)
+
+        # 200 is the only successful code, raise an exception on any other response code
+        if response.status_code != 200:
+            raise HTTPError(response, f'Get Datasets request returned http error: {response.json()}')
+
+        return Datasets.tables_from_get_tables_response(response)
+
+    async def put_table(self, dataset_id, table_name, table, group_id=None):
+        """
+        Updates the metadata and schema of a table of a push dataset
+        :param dataset_id: The id of the dataset to put the table in
+        :param table_name: The name of the table to put
+        :param table: The table object to update
+        :param group_id: The optional id of the group to put the table in
+        """
+        # form the url
+        url = f'{self.base_url}{self._groups_part(group_id)}{self.datasets_snippet}/{dataset_id}/' \
+              f'{self.tables_snippet}/{table_name}'
+        # form the headers
+        headers = self.client.auth_header
+        # form the json dict
+        json_dict = TableEncoder().default(table)
+
+        # get the response
+        response = await self.client.transport.put(url, headers=headers, json=json_dict)
+
+        # 200 is the only successful code
+        if response.status_code != 200:
+            raise HTTPError(response, f'Put table request returned http error: {response.json()}')
+
+    async def post_rows(self, dataset_id, table_name, rows, group_id=None, validator=None):
+        """
+        Posts rows to a table in a given dataset
+        :param dataset_id: The id of the dataset to post rows to
+        :param table_name: The name of the table to post rows to
+        :param rows: The rows to post to the table, as a list of Row objects or dicts, or column-wise as a dict of
+        column lists, a NumPy structured array or a pandas DataFrame
+        :param group_id: The optional id of the group to post rows to
+        :param validator: An optional RowValidator; only the rows it accepts are posted, coerced to the column types
+        :return: The ValidationResult if a validator is given, None otherwise
+        """
+        if validator is None:
+            await self.post_payload(dataset_id, table_name, self.payload_encoder.encode(rows), group_id)
+            return None
+
+        result = validator.validate(rows)
+        if result.rows:
+            await self.post_payload(dataset_id, table_name, self.payload_encoder.encode(result.rows), group_id)
+
+        return result
+
+    async def post_payload(self, dataset_id, table_name, payload, group_id=None):
+        """
+        Posts an already encoded push-row request body to a table in a given dataset
+        :param dataset_id: The id of the dataset to post rows to
+        :param table_name: The name of the table to post rows to
+        :param payload: The utf-8 json body, as built by a PayloadEncoder
+        :param group_id: The optional id of the group to post rows to
+        """
+        # form the url
+        url = f'{self.base_url}{self._groups_part(group_id)}{self.datasets_snippet}/{dataset_id}/' \
+              f'{self.tables_snippet}/{table_name}/{self.rows_snippet}'
+        # form the headers
+        headers = dict(self.client.auth_header)
+        headers['Content-Type'] = self.payload_encoder.content_type
+
+        # get the response
+        response = await self.client.transport.post(url, headers=headers, data=payload)
+
+        # 200 is the only successful code
+        if response.status_code != 200:
+            raise HTTPError(response, f'Post row request returned http error: {response.json()}')
+
+    async def delete_rows(self, dataset_id, table_name, group_id=None):
+        """
+        Deletes all rows from a table in a given dataset
+        :param dataset_id: The id of the dataset to delete the rows from
+        :param table_name: The name of the table to delete the rows from
+        :param group_id: The optional id of the group to delete the rows from
+        """
+        # form the url
+        url = f'{self.base_url}{self._groups_part(group_id)}{self.datasets_snippet}/{dataset_id}/' \
+              f'{self.tables_snippet}/{table_name}/{self.rows_snippet}'
+        # form the headers
+        headers = self.client.auth_header
+
+        # get the response
+        response = await self.client.transport.delete(url, headers=headers)
+
+        # 200 is the only successful code
+        if response.status_code != 200:
+            raise HTTPError(response, f'Delete rows request returned http error: {response.json()}')
+
+    async def get_dataset_parameters(self, dataset_id, group_id=None):
+        """
+        Gets all parameters for a single dataset
+        :param dataset_id: The id of the dataset from which you want the parameters
+        :param group_id: The optional id of the group to get the dataset's parameters
+        :return: The dataset parameters returned by the API
+        """
+        # form the url
+        url = f'{self.base_url}{self._groups_part(group_id)}{self.datasets_snippet}/{dataset_id}/' \
+              f'{self.parameters_snippet}'
+        # form the headers
+        headers = self.client.auth_header
+
+        # get the response
+        response = await self.client.transport.get(url, headers=headers)
+
+        # 200 is the only successful code, raise an exception on any other response code
+        if response.status_code != 200:
+            raise HTTPError(response, f'Get Dataset parameters request returned http error: {response.json()}')
+
+        return json.loads(response.text)
+
+    async def set_dataset_parameters(self, dataset_id, params, group_id=None):
+        """
+        Sets parameters for a single dataset
+        :param dataset_id: The id of the dataset which you want to update
+        :param params: Dict of parameters to set on the dataset
+        :param group_id: The optional id of the group of the dataset
+        """
+        # form the url
+        url = f'{self.base_url}{self._groups_part(group_id)}{self.datasets_snippet}/{dataset_id}/' \
+              f'{self.set_parameters_snippet}'
+        # form the headers
+        headers = self.client.auth_header
+        # form the json dict
+        update_details = [{"name": k, "newValue": str(v)} for k, v in params.items()]
+        json_dict = {"updateDetails": update_details}
+
+        # get the response
+        response = await self.client.transport.post(url, headers=headers, json=json_dict)
+
+        # 200 is the only successful code
+        if response.status_code != 200:
+            raise HTTPError(response, f'Setting dataset parameters failed with http error: {response.json()}')
+
+    async def refresh_dataset(self, dataset_id, notify_option=None, group_id=None):
+        """
+        Refreshes a single dataset
+        :param dataset_id: The id of the dataset to refresh
+        :param notify_option: The optional notify_option to add in the request body
+        :param group_id: The optional id of the group
+        :return: The id of the refresh request, the requestId of its refresh history entry; None if the service did
+        not return one
+        """
+        # form the url
+        url = f'{self.base_url}{self._groups_part(group_id)}{self.datasets_snippet}/{dataset_id}/' \
+              f'{self.refreshes_snippet}'
+        # form the headers
+        headers = self.client.auth_header
+
+        if notify_option is not None:
+            json_dict = {
+                'notifyOption': notify_option
+            }
+        else:
+            json_dict = None
+
+        # get the response
+        response = await self.client.transport.post(url, headers=headers, json=json_dict)
+
+        # 202 is the only successful code, raise an exception on any other response code
+        if response.status_code != 202:
+            raise HTTPError(response, f'Refresh dataset request returned http error: {response.json()}')
+
+        return response.headers.get(self.request_id_header)
+
+    async def get_dataset_refresh_history(self, dataset_id, group_id=None, top=None):
+        """
+        Gets the refresh history of a dataset
+        :param dataset_id: The id of the dataset
+        :param group_id: The optional id of the group
+        :param top: The number of refreshes to retrieve. 5 will get the last 5 refreshes.
+        """
+        # form the url
+        url = f'{self.base_url}{self._groups_part(group_id)}{self.datasets_snippet}/{dataset_id}/' \
+              f'{self.refreshes_snippet}'
+
+        if top is not None:
+            url = f'{url}?$top={top}'
+
+        # form the headers
+        headers = self.client.auth_header
+
+        # get the response
+        response = await self.client.transport.get(url, headers=headers)
+
+        # 200 is the only successful code, raise an exception on any other response code
+        if response.status_code != 200:
+            raise HTTPError(response, f'Dataset refresh history request returned http error: {response.json()}')
+
+        refresh_data = json.loads(response.text)["value"]
+
+        # Convert the date strings into datetime objects
+        time_fields = ['startTime', 'endTime']
+
+        return convert_datetime_fields(refresh_data, time_fields, in_place=True)
+
+    async def get_dataset_gateway_datasources(self, dataset_id, group_id=None):
+        """
+        Gets the gateway datasources for a dataset
+        :param dataset_id: The id of the dataset
+        :param group_id: The optional id of the group
+        :return: The list of the datasources returned by the API
+        """
+        # form the url
+        url = f'{self.base_url}{self._groups_part(group_id)}{self.datasets_snippet}/{dataset_id}/' \
+              f'{self.datasources_snippet}'
+        # form the headers
+        headers = self.client.auth_header
+
+        # get the response
+        response = await self.client.transport.get(url, headers=headers)
+
+        # 200 is the only successful code, raise an exception on any other response code
+        if response.status_code != 200:
+            raise HTTPError(response, f'Dataset gateway datasources request returned http error: {response.json()}')
+
+        return json.loads(response.text)["value"]
+
+    async def bind_dataset_gateway(self, dataset_id, gateway_id, group_id=None):
+        """
+        Binds a dataset to a gateway
+        :param dataset_id: The id of the dataset
+        :param gateway_id: The id of the gateway
+        :param group_id: The optional id of the group
+        """
+        # form the url
+        url = f'{self.base_url}{self._groups_part(group_id)}{self.datasets_snippet}/{dataset_id}/' \
+              f'{self.bind_gateway_snippet}'
+        # form the headers
+        headers = self.client.auth_header
+
+        # get the response
+        response = await self.client.transport.post(url, headers=headers, json={"gatewayObjectId": gateway_id})
+
+        # 200 is the only successful code
+        if response.status_code != 200:
+            raise HTTPError(response, f'Binding gateway to dataset failed with http error: {response.json()}')
+
+    async def update_refresh_schedule(self, dataset_id, refresh_schedule, group_id=None):
+        """
+        Updates the refresh schedule of a dataset
+        :param dataset_id: The dataset id
+        :param refresh_schedule: The updates for the refresh schedule. If a field remains None, no changes are made.
+        :param group_id: The optional id of the group of the dataset
+        """
+        # form the url
+        url = f'{self.base_url}{self._groups_part(group_id)}{self.datasets_snippet}/{dataset_id}/' \
+              f'{self.refresh_schedule_snippet}'
+        # form the headers
+        headers = self.client.auth_header
+        # form the json dict
+        json_dict = RefreshScheduleRequest(refresh_schedule).as_dict()
+
+        # get the response
+        response = await self.client.transport.patch(url, headers=headers, json=json_dict)
+
+        # 200 is the only successful code
+        if response.status_code != 200:
+            raise HTTPError(response, f'Update refresh schedule request returned http error: {response.json()}')
+
+    async def get_refresh_schedule(self, dataset_id, group_id=None):
+        """
+        Gets the refresh schedule of a dataset
+        :param dataset_id: The dataset id
+        :param group_id: The optional id of the group of the dataset
+        :return: The RefreshSchedule returned by the API
+        """
+        # form the url
+        url = f'{self.base_url}{self._groups_part(group_id)}{self.datasets_snippet}/{dataset_id}/' \
+              f'{self.refresh_schedule_snippet}'
+        # form the headers
+        headers = self.client.auth_header
+
+        # get the response
+        response = await self.client.transport.get(url, headers=headers)
+
+        # 200 is the only successful code, raise an exception on any other response code
+        if response.status_code != 200:
+            raise HTTPError(response, f'Get refresh schedule request returned http error: {response.json()}')
+
+        return Datasets.refresh_schedule_from_get_refresh_schedule_response(response)
@@ -0,0 +1,169 @@
+# -*- coding: future_fstrings -*-
+from typing import List
+
+from requests.exceptions import HTTPError
+
+from .gateway import Gateway, GatewayDatasource, DatasourceUser, PublishDatasourceToGatewayRequest
+from .gateways import Gateways
+
+
+class AsyncGateways:
+    """
+    Asynchronous counterpart of Gateways, returning the same model objects
+    """
+    # url snippets
+    gateways_snippet = 'gateways'
+    datasources_snippet = 'datasources'
+    users_snippet = 'users'
+
+    def __init__(self, client):
+        self.client = client
+        self.base_url = f'{self.client.api_url}/{self.client.api_version_snippet}/{self.client.api_myorg_snippet}'
+
+    async def get_gateways(self) -> List[Gateway]:
+        """Fetches all gateways the user is an admin for"""
+        # form the url
+        url = f'{self.base_url}/{self.gateways_snippet}'
+
+        # form the headers
+        headers = self.client.auth_header
+
+        # get the response
+        response = await self.client.transport.get(url, headers=headers)
+
+        # 200 is the only successful code, raise an exception on any other response code
+        if response.status_code != 200:
+            raise HTTPError(response, f'Get Gateways request returned http error: {response.json()}')
+
+        return Gateways._models_from_get_multiple_response(response, Gateway)
+
+    async def get_gateway(self, gateway_id: str) -> Gateway:
+        """Return the specified gateway
+
+        :param gateway_id: The gateway id
+        :return: The gateway
+        """
+        # form the url
+        url = f'{self.base_url}/{self.gateways_snippet}/{gateway_id}'
+
+        # form the headers
+        headers = self.client.auth_header
+
+        # get the response
+        response = await self.client.transport.get(url, headers=headers)
+
+        # 200 is the only successful code, raise an exception on any other response code
+        if response.status_code != 200:
+            raise HTTPError(response, f'Get Gateway request returned http error: {response.json()}')
+
+        return Gateways._model_from_get_one_response(response, Gateway)
+
+    async def get_datasources(self, gateway_id: str) -> List[GatewayDatasource]:
+        """Returns a list of datasources from the specified gateway
+
+        :param gateway_id: The gateway id to return responses for
+        :return: list
+            The list of datasources
+        """
+        # form the url
+        url = f'{self.base_url}/{self.gateways_snippet}/{gateway_id}/{self.datasources_snippet}'
+
+        # form the headers
+        headers = self.client.auth_header
+
+        # get the response
+        response = await self.client.transport.get(url, headers=headers)
+
+        # 200 is the only successful code, raise an exception on any other response code
+        if response.status_code != 200:
+            raise HTTPError(response, f'Get Gateway Datasources request returned http error: {response.json()}')
+
+        return Gateways._models_from_get_multiple_response(response, GatewayDatasource)
+
+    async def get_datasource_users(self, gateway_id: str, datasource_id: str) -> List[DatasourceUser]:
+        """Returns a list of users who have access to the specified datasource
+
+        :param gateway_id: The gateway id
+        :param datasource_id: The datasource id
+        """
+        # form the url
+        url = f'{self.base_url}/{self.gateways_snippet}/{gateway_id}' \
+              f'/{self.datasources_snippet}/{datasource_id}/{self.users_snippet}'
+
+        # form the headers
+        headers = self.client.auth_header
+
+        # get the response
+        response = await self.client.transport.get(url, headers=headers)
+
+        # 200 is the only successful code, raise an exception on any other response code
+        if response.status_code != 200:
+            raise HTTPError(response, f'Get Datasource Users request returned http error: {response.json()}')
+
+        return Gateways._models_from_get_multiple_response(response, DatasourceUser)
+
+    async def create_datasource(
+        self,
+        gateway_id: str,
+        datasource_to_gateway_request: PublishDatasourceToGatewayRequest
+    ) -> GatewayDatasource:
+        """Creates a new datasource on the specified gateway
+
+        :param gateway_id: The gateway id
+        :param datasource_to_gateway_request: Request describing the datasource to be created
+        """
+        # form the url
+        url = f'{self.base_url}/{self.gateways_snippet}/{gateway_id}/{self.datasources_snippet}'
+
+        # form the headers
+        headers = self.client.auth_header
+
+        # get the response
+        response = await self.client.transport.post(url, headers=headers, json=datasource_to_gateway_request.to_dict())
+
+        # 201 is the only successful code, raise an exception on any other response code
+        if response.status_code != 201:
+            raise HTTPError(response, f'Create Datasource request returned http error: {response.json()}')
+
+        return Gateways._model_from_get_one_response(response, GatewayDatasource)
+
+    async def delete_datasource(self, gateway_id: str, datasource_id: str) -> None:
+        """Deletes the specified datasource from the specified gateway
+
+        :param gateway_id: The gateway id
+        :param datasource_id: The datasource id
+        """
+        # form the url
+        url = f'{self.base_url}/{self.gateways_snippet}/{gateway_id}/{self.datasources_snippet}/{datasource_id}'
+
+        # form the headers
+        headers = self.client.auth_header
+
+        # get the response
+        response = await self.client.transport.delete(url, headers=headers)
+
+        # 200 is the only successful code, raise an exception on any other response code
+        if response.status_code != 200:
+            raise HTTPError(response, f'Delete Datasource request returned http error: {response.json()}')
+
+    async def add_datasource_user(self, gateway_id: str, datasource_id: str, datasource_user: DatasourceUser) -> None:
+        """Grants or updates the permissions required to use the specified datasource for the specified user
+
+        :param gateway_id: The gateway id
+        :param datasource_id: The datasource id
+        :param datasource_user: The datasource user to add
+        """
+        # form the url
+        url = f'{self.base_url}/{self.gateways_snippet}/{gateway_id}' \
+              f'/{self.datasources_snippet}/{datasource_id}/{self.users_snippet}'
+
+        # form the headers
+        headers = self.client.auth_header
+
+        # get the response
+        response = await self.client.transport.post(url, headers=headers, json=datasource_user.as_set_values_dict())
+
+        # 200 is the only successful code, raise an exception on any other response code
+        if response.status_code != 200:
+            raise HTTPError(response, f'Add datasource user request returned http error with status code: '
+                                      f'{response.status_code}')
@@ -0,0 +1,105 @@
+# -*- coding: future_fstrings -*-
+import re
+import urllib.parse
+
+from requests.exceptions import HTTPError
+
+from .imports import Imports
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+class AsyncImports:
+    """
+    Asynchronous counterpart of Imports, returning the same model objects
+    """
+    # url snippets
+    groups_snippet = 'groups'
+    imports_snippet = 'imports'
+    dataset_displayname_snippet = 'datasetDisplayName'
+    nameconflict_snippet = 'nameConflict'
+
+    def __init__(self, client):
+        self.client = client
+        self.base_url = f'{self.client.api_url}/{self.client.api_version_snippet}/{self.client.api_myorg_snippet}'
+        self.upload_file_replace_regex = re.compile('(?![A-z]|[0-9]).')
+
+    def _groups_part(self, group_id):
+        # group_id can be none, account for it
+        if group_id is None:
+            return '/'
+
+        return f'/{self.groups_snippet}/{group_id}/'
+
+    async def upload_file(self, filename, dataset_displayname, nameconflict=None, group_id=None):
+        # substitute using the regex pattern
+        prepared_displayname = re.sub(self.upload_file_replace_regex, '-', dataset_displayname)
+        # append the pbix extension (strange yes, but names correctly in powerbi service if so)
+        prepared_displayname = f'{prepared_displayname}.pbix'
+
+        url = f'{self.base_url}{self._groups_part(group_id)}{self.imports_snippet}' \
+              f'?{urllib.parse.urlencode({self.dataset_displayname_snippet : prepared_displayname})}'
+
+        if nameconflict is not None:
+            url = url + f'&{self.nameconflict_snippet}={nameconflict}'
+
+        headers = self.client.auth_header
+
+        try:
+            with open(filename, 'rb') as file_obj:
+                response = await self._post_file(url, headers, file_obj)
+        except TypeError:
+            # assume filename is a file-like object already
+            response = await self._post_file(url, headers, filename)
+
+        # 200 OK, 202 Accepted
+        if response.status_code in [200, 202]:
+            import_object = Imports.import_from_response(response)
+        # 490 Conflict (due to name)
+        elif response.status_code == 409:
+            raise NotImplementedError("Name conflict resolution not implemented yet")
+        else:
+            raise HTTPError(response, f"Upload file failed with status code: {response.json()}")
+
+        return import_object
+
+    async def _post_file(self, url, headers, file_obj):
+        position = file_obj.tell() if hasattr(file_obj, 'seek') and hasattr(file_obj, 'tell') else None
+
+        def form_data():
+            # a form is consumed when sent, a retried upload sends a new one with the file rewound
+            if position is not None:
+                file_obj.seek(position)
+
+            data = aiohttp.FormData()
+            data.add_field('file', file_obj)
+            return data
+
+        return await self.client.transport.post(url, headers=headers, data_factory=form_data)
+
+    async def get_import(self, import_id, group_id=None):
+        url = f'{self.base_url}{self._groups_part(group_id)}{self.imports_snippet}/{import_id}'
+
+        headers = self.client.auth_header
+        response = await self.client.transport.get(url, headers=headers)
+
+        # 200 OK
+        if response.status_code != 200:
+            raise HTTPError(response, f"Get import failed with status code: {response.json()}")
+
+        return Imports.import_from_response(response)
+
+    async def get_imports(self, group_id=None):
+        url = f'{self.base_url}{self._groups_part(group_id)}{self.imports_snippet}'
+
+        headers = self.client.auth_header
+        response = await self.client.transport.get(url, headers=headers)
+
+        # 200 OK
+        if response.status_code != 200:
+            raise HTTPError(response, f"Get imports failed with status code: {response.json()}")
+
+        return Imports.imports_from_response(response)
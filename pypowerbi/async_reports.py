@@ -0,0 +1,219 @@
+# -*- coding: future_fstrings -*-
+import json
+
+from requests.exceptions import HTTPError
+
+import pypowerbi.client
+from .report import Report
+from .reports import Reports
+
+
+class AsyncReports:
+    """
+    Asynchronous counterpart of Reports, returning the same model objects
+    """
+    # url snippets
+    groups_snippet = 'groups'
+    reports_snippet = 'reports'
+    rebind_snippet = 'rebind'
+    clone_snippet = 'clone'
+    export_snippet = 'Export'
+    generate_token_snippet = 'generatetoken'
+
+    def __init__(self, client):
+        self.client = client
+        self.base_url = f'{self.client.api_url}/{self.client.api_version_snippet}/{self.client.api_myorg_snippet}'
+
+    def _groups_part(self, group_id):
+        # group_id can be none, account for it
+        if group_id is None:
+            return '/'
+
+        return f'/{self.groups_snippet}/{group_id}/'
+
+    async def count(self, group_id=None):
+        """
+        Evaluates the number of reports
+        :param group_id: The optional group id
+        :return: The number of reports as returned by the API
+        """
+        return len(await self.get_reports(group_id))
+
+    async def has_report(self, report_id, group_id=None):
+        """
+        Evaluates if the report exists
+        :param report_id: The id of the report to evaluate
+        :param group_id: The optional group id
+        :return: True if the report exists, False otherwise
+        """
+        reports = await self.get_reports(group_id)
+
+        return any(report.id == str(report_id) for report in reports)
+
+    async def get_reports(self, group_id=None):
+        """
+        Gets all reports
+        :param group_id: The optional group id to get reports from
+        :return: The list of reports for the given group
+        """
+        # form the url
+        url = f'{self.base_url}{self._groups_part(group_id)}{self.reports_snippet}/'
+        # form the headers
+        headers = self.client.auth_header
+
+        # get the response
+        response = await self.client.transport.get(url, headers=headers)
+
+        # 200 - OK. Indicates success. List of reports.
+        if response.status_code != 200:
+            raise HTTPError(response, f'Get reports request returned http error: {response.json()}')
+
+        return Reports.reports_from_get_reports_response(response)
+
+    async def get_report(self, report_id, group_id=None):
+        """
+        Gets a report
+        :param report_id: The id of the report to get
+        :param group_id: The optional group id
+        :return: The report as returned by the API
+        """
+        # form the url
+        url = f'{self.base_url}{self._groups_part(group_id)}{self.reports_snippet}/{report_id}'
+        # form the headers
+        headers = self.client.auth_header
+
+        # get the response
+        response = await self.client.transport.get(url, headers=headers)
+
+        # 200 - OK. Indicates success.
+        if response.status_code != 200:
+            raise HTTPError(response, f'Get report request returned http error: {response.json()}')
+
+        return Report.from_dict(json.loads(response.text))
+
+    async def clone_report(self, report_id, name, target_group_id, dataset_id, group_id=None):
+        """
+        Clones a report
+        :param report_id: The report id to clone
+        :param name: The name to give the cloned report
+        :param target_group_id: The target group for the cloned report
+        :param dataset_id: The dataset id for the cloned report
+        :param group_id: The optional group id
+        :return: The cloned report
+        """
+        # form the url
+        url = f'{self.base_url}{self._groups_part(group_id)}{self.reports_snippet}/{report_id}/{self.clone_snippet}'
+        # form the headers
+        headers = self.client.auth_header
+        # form the json
+        json_dict = {
+            Report.name_key: name,
+            Report.target_model_id_key: str(dataset_id),
+        }
+
+        # target group id can be none, account for it
+        if target_group_id is not None:
+            json_dict[Report.target_workspace_id_key] = str(target_group_id)
+
+        # get the response
+        response = await self.client.transport.post(url, headers=headers, json=json_dict)
+
+        # 200 - OK. Indicates success.
+        if response.status_code != 200:
+            raise HTTPError(response, f'Clone report request returned http error: {response.json()}')
+
+        return Report.from_dict(json.loads(response.text))
+
+    async def delete_report(self, report_id, group_id=None):
+        """
+        Deletes a report
+        :param report_id: The id of the report to delete
+        :param group_id: The id of the group from which to delete the report
+        """
+        # form the url
+        url = f'{self.base_url}{self._groups_part(group_id)}{self.reports_snippet}/{report_id}/'
+        # form the headers
+        headers = self.client.auth_header
+
+        # get the response
+        response = await self.client.transport.delete(url, headers=headers)
+
+        # 200 - OK. Indicates success.
+        if response.status_code != 200:
+            raise HTTPError(response, f'Delete report request returned http error: {response.json()}')
+
+    async def rebind_report(self, report_id, dataset_id, group_id=None):
+        """
+        Rebinds a report to another dataset
+        :param report_id: The id of the report to rebind
+        :param dataset_id: The id of the dataset to rebind the report to
+        :param group_id: The optional id of the group from which the report belongs to
+        """
+        # form the url
+        url = f'{self.base_url}{self._groups_part(group_id)}{self.reports_snippet}/{report_id}/{self.rebind_snippet}'
+        # form the headers
+        headers = self.client.auth_header
+        # form the json
+        json_dict = {
+            Report.dataset_id_key: dataset_id
+        }
+
+        # get the response
+        response = await self.client.transport.post(url, headers=headers, json=json_dict)
+
+        # 200 - OK. Indicates success.
+        if response.status_code != 200:
+            raise HTTPError(response, f'Rebind report request returned http error: {response.json()}')
+
+    async def generate_token(self, report_id, token_request, group_id):
+        """
+        Generates an embed token for a report
+        :param report_id: The report to generate the token for
+        :param token_request: The token request object
+        :param group_id: The group id
+        :return: Returns the embed token
+        """
+        # form the url
+        url = f'{self.base_url}/{self.groups_snippet}/{group_id}/' \
+              f'{self.reports_snippet}/{report_id}/{self.generate_token_snippet}'
+        # form the headers
+        headers = self.client.auth_header
+        # form the json
+        json_dict = pypowerbi.client.TokenRequestEncoder().default(token_request)
+
+        # get the response
+        response = await self.client.transport.post(url, headers=headers, json=json_dict)
+
+        # 200 - OK. Indicates success.
+        if response.status_code != 200:
+            raise HTTPError(response, f'Generate token for report request returned http error: {response.json()}')
+
+        return pypowerbi.client.EmbedToken.from_dict(json.loads(response.text))
+
+    async def export_report(self, report_id, save_path, filename=None, group_id=None):
+        """
+        Exports a report to a pbix file
+        :param report_id: The report id
+        :param save_path: The path where the pbix file should be saved
+        :param filename: The name to assign to the downloaded file (without the pbix extension); the report name if None
+        :param group_id: The optional id of the group that contains the report
+        """
+        # form the url
+        url = f'{self.base_url}{self._groups_part(group_id)}{self.reports_snippet}/{report_id}/{self.export_snippet}'
+        # form the headers
+        headers = self.client.auth_header
+
+        # get the response
+        response = await self.client.transport.get(url, headers=headers)
+
+        # 200 is the only valid response. Show an error in other cases.
+        if response.status_code != 200:
+            raise HTTPError(response, f'Export report request returned http error: {response.json()}')
+
+        # save report to save path
+        if filename is None:
+            report = await self.get_report(report_id, group_id)
+            filename = report.name
+
+        with open(f'{save_path}/{filename}.pbix', 'wb') as report_file:
+            report_file.write(response.content)
@@ -0,0 +1,161 @@
+# -*- coding: future_fstrings -*-
+import json
+import time
+import asyncio
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+class AsyncResponse:
+    """
+    A response read in full by the AsyncTransport.
+
+    Exposes the parts of requests.Response the operation modules rely on (status_code, headers, text, content and
+    json()), so the response parsers of the synchronous operation modules can be reused as they are.
+    """
+    # the Power BI REST API always answers in utf-8 encoded json
+    encoding = 'utf-8'
+
+    def __init__(self, status_code, headers, content, url=None):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.url = url
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding)
+
+    def json(self):
+        return json.loads(self.text)
+
+    def __repr__(self):
+        return f'<AsyncResponse [{self.status_code}]>'
+
+
+class AsyncTransport:
+    """
+    Non-blocking, connection-pooled HTTP transport shared by every operation module of an AsyncPowerBIClient.
+
+    Requires aiohttp. At most max_concurrency requests are in flight at any time; further requests wait for a free
+    slot, so callers can gather thousands of coroutines without opening thousands of connections.
+    """
+    default_max_concurrency = 100
+    default_limit_per_host = 0
+
+    def __init__(self, max_concurrency=None, limit_per_host=None, keep_alive=True, session=None, retry_policy=None,
+                 rate_limiter=None):
+        """
+        Constructs an async transport
+
+        :param max_concurrency: The maximum number of requests in flight; defaults to 100
+        :param limit_per_host: The maximum number of connections per host, 0 for no limit besides max_concurrency
+        :param keep_alive: If False, connections are closed after every request
+        :param session: An optional, already configured aiohttp.ClientSession (or compatible object) to use
+        :param retry_policy: The optional RetryPolicy deciding which responses are retried; None disables retries
+        :param rate_limiter: The optional RateLimiter every request waits for; None disables rate limiting
+        """
+        if max_concurrency is None:
+            max_concurrency = self.default_max_concurrency
+
+        if limit_per_host is None:
+            limit_per_host = self.default_limit_per_host
+
+        if session is None and aiohttp is None:
+            raise ImportError('AsyncTransport requires aiohttp, install it with: pip install pypowerbi[async]')
+
+        self.max_concurrency = max_concurrency
+        self.limit_per_host = limit_per_host
+        self.keep_alive = keep_alive
+        self.retry_policy = retry_policy
+        self.rate_limiter = rate_limiter
+
+        self._session = session
+        self._semaphore = None
+
+    @property
+    def session(self):
+        # the session and semaphore are created lazily so they bind to the running event loop
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency, limit_per_host=self.limit_per_host,
+                                             force_close=not self.keep_alive)
+            self._session = aiohttp.ClientSession(connector=connector)
+
+        return self._session
+
+    @property
+    def semaphore(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        return self._semaphore
+
+    async def request(self, method, url, data_factory=None, **kwargs):
+        """
+        Sends a request, retrying it as long as the retry policy allows
+        :param method: The http method
+        :param url: The url to send the request to
+        :param data_factory: An optional callable returning the data of each attempt, for bodies that are consumed
+        when sent, e.g. an aiohttp.FormData of a file
+        :param kwargs: Any further arguments accepted by aiohttp.ClientSession.request
+        :return: An AsyncResponse; the last one received if all retries were exhausted
+        """
+        start = time.monotonic()
+        attempt = 0
+
+        while True:
+            if data_factory is not None:
+                kwargs['data'] = data_factory()
+
+            if self.rate_limiter is not None:
+                # wait outside the semaphore so throttled requests do not hold slots of other endpoints
+                delay = self.rate_limiter.reserve(method, url)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            async with self.semaphore:
+                async with self.session.request(method, url, **kwargs) as raw_response:
+                    content = await raw_response.read()
+                    response = AsyncResponse(raw_response.status, raw_response.headers, content, url)
+
+            if self.retry_policy is None or not self.retry_policy.is_retryable(response, method):
+                return response
+
+            delay = self.retry_policy.get_retry_delay(attempt, response, time.monotonic() - start)
+            if delay is None:
+                return response
+
+            self.retry_policy.record_retry(method, url)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def get(self, url, **kwargs):
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request('POST', url, **kwargs)
+
+    async def put(self, url, **kwargs):
+        return await self.request('PUT', url, **kwargs)
+
+    async def patch(self, url, **kwargs):
+        return await self.request('PATCH', url, **kwargs)
+
+    async def delete(self, url, **kwargs):
+        return await self.request('DELETE', url, **kwargs)
+
+    async def close(self):
+        """
+        Closes all pooled connections
+        """
+        if self._session is not None:
+            await self._session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
@@ -0,0 +1,313 @@
+# -*- coding: future_fstrings -*-
+import os
+import datetime
+import threading
+
+import adal
+
+
+# authentication contexts and token caches shared by all clients of the process, see get_authentication_context
+_authentication_contexts = {}
+_token_caches = {}
+_authentication_contexts_lock = threading.Lock()
+
+
+def get_token_cache(path):
+    """
+    Gets the FileTokenCache of a file, shared by every client of the process using that file
+
+    :param path: The path of the cache file
+    :return: The token cache
+    """
+    path = os.path.abspath(path)
+
+    with _authentication_contexts_lock:
+        token_cache = _token_caches.get(path)
+        if token_cache is None:
+            token_cache = FileTokenCache(path)
+            _token_caches[path] = token_cache
+
+        return token_cache
+
+
+def get_authentication_context(authority_url, validate_authority=True, token_cache_path=None):
+    """
+    Gets the adal AuthenticationContext of an authority, creating it on first use.
+
+    adal validates an authority and discovers its endpoints once per context, so sharing one context per authority
+    means the discovery round-trips are made once per process rather than once per client.
+
+    :param authority_url: The authority url, e.g. 'https://login.windows.net/common'
+    :param validate_authority: Whether adal validates the authority
+    :param token_cache_path: The optional path of a file the context persists its token cache to
+    :return: The shared authentication context
+    """
+    token_cache = get_token_cache(token_cache_path) if token_cache_path is not None else None
+    key = (authority_url, validate_authority, token_cache.path if token_cache is not None else None)
+
+    with _authentication_contexts_lock:
+        context = _authentication_contexts.get(key)
+        if context is None:
+            context = adal.AuthenticationContext(authority=authority_url,
+                                                 validate_authority=validate_authority,
+                                                 cache=token_cache,
+                                                 api_version=None)
+            _authentication_contexts[key] = context
+
+        return context
+
+
+class TokenProvider:
+    """
+    Supplies the access token and authorization header used by a client.
+
+    The base provider serves a fixed adal token dict. Subclasses override acquire() to fetch new tokens, in which
+    case the token is refreshed refresh_margin seconds before its 'expiresOn' time, either on a background timer or,
+    at the latest, by the next caller asking for the auth header.
+    """
+    access_token_key = 'accessToken'
+    expires_on_key = 'expiresOn'
+    expires_in_key = 'expiresIn'
+
+    # refresh a little before adal's own five minute clock buffer, so cached tokens are renewed on lookup
+    default_refresh_margin = 240
+    # the shortest time between two refreshes, in case the authority hands out a token expiring too soon
+    min_refresh_interval = 30
+
+    def __init__(self, token=None, refresh_margin=None, background_refresh=False):
+        """
+        Constructs a token provider
+
+        :param token: The initial adal token dict; acquired on first use if None
+        :param refresh_margin: The seconds before expiry at which the token is refreshed; defaults to 240
+        :param background_refresh: If True, a daemon timer refreshes the token before it expires
+        """
+        if refresh_margin is None:
+            refresh_margin = self.default_refresh_margin
+
+        self.refresh_margin = refresh_margin
+        self.background_refresh = background_refresh
+
+        self._lock = threading.RLock()
+        self._timer = None
+        self._token = None
+        self._auth_header = None
+        self._expires_at = None
+
+        if token is not None:
+            self._set_token(token)
+
+    def acquire(self):
+        """
+        Acquires a new adal token dict. Static providers cannot acquire tokens.
+        :return: The token dict
+        """
+        raise NotImplementedError('This token provider cannot acquire new tokens')
+
+    @property
+    def can_refresh(self):
+        return type(self).acquire is not TokenProvider.acquire
+
+    @property
+    def token(self):
+        """
+        The current adal token dict, refreshed first if it is about to expire
+        """
+        with self._lock:
+            if self._token is None or (self.can_refresh and self.expires_soon):
+                self.refresh()
+
+            return self._token
+
+    @property
+    def auth_header(self):
+        """
+        The cached authorization header of the current token
+        """
+        # only take the lock when the header has to be rebuilt, readers otherwise get the cached header
+        header = self._auth_header
+        if header is None or (self.can_refresh and self.expires_soon):
+            with self._lock:
+                if self._token is None or (self.can_refresh and self.expires_soon):
+                    self.refresh()
+                header = self._auth_header
+
+        return header
+
+    @property
+    def expires_at(self):
+        """
+        The expiry of the current token as a timezone aware UTC datetime, None if unknown
+        """
+        return self._expires_at
+
+    @property
+    def expires_soon(self):
+        if self._expires_at is None:
+            return False
+
+        return self.seconds_until_refresh() <= 0
+
+    def seconds_until_refresh(self):
+        """
+        :return: The seconds left until the token should be refreshed, None if its expiry is unknown
+        """
+        if self._expires_at is None:
+            return None
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+
+        return (self._expires_at - now).total_seconds() - self.refresh_margin
+
+    def refresh(self):
+        """
+        Acquires a new token and replaces the current one
+        """
+        with self._lock:
+            self._set_token(self.acquire())
+
+    def close(self):
+        """
+        Stops the background refresh
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def _set_token(self, token):
+        self._expires_at = self.expiry_from_token(token)
+        self._token = token
+        self._auth_header = {
+            'Authorization': f'Bearer {token[self.access_token_key]}'
+        }
+
+        if self.background_refresh and self.can_refresh:
+            self._schedule_refresh()
+
+    def _schedule_refresh(self):
+        if self._timer is not None:
+            self._timer.cancel()
+
+        delay = self.seconds_until_refresh()
+        if delay is None:
+            self._timer = None
+            return
+
+        self._timer = threading.Timer(max(self.min_refresh_interval, delay), self._background_refresh)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _background_refresh(self):
+        try:
+            self.refresh()
+        except Exception:
+            # try again later, callers still refresh on demand if the token has expired in the meantime
+            with self._lock:
+                self._timer = threading.Timer(self.min_refresh_interval, self._background_refresh)
+                self._timer.daemon = True
+                self._timer.start()
+
+    @classmethod
+    def expiry_from_token(cls, token):
+        """
+        Reads the expiry of an adal token dict
+        :param token: The token dict
+        :return: The expiry as a timezone aware UTC datetime, None if the token has no expiry information
+        """
+        expires_on = token.get(cls.expires_on_key)
+        if isinstance(expires_on, datetime.datetime):
+            expires_at = expires_on
+        elif isinstance(expires_on, str):
+            try:
+                # adal stores the expiry as str() of a naive local datetime
+                expires_at = datetime.datetime.fromisoformat(expires_on)
+            except ValueError:
+                expires_at = None
+        else:
+            expires_at = None
+
+        if expires_at is None:
+            expires_in = token.get(cls.expires_in_key)
+            if expires_in is None:
+                return None
+
+            return datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=int(expires_in))
+
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.astimezone()
+
+        return expires_at.astimezone(datetime.timezone.utc)
+
+
+class AdalTokenProvider(TokenProvider):
+    """
+    Token provider acquiring its tokens through an adal acquire function, e.g. a bound
+    AuthenticationContext.acquire_token_with_username_password. Since adal looks tokens up in the context's cache
+    before contacting the authority, refreshes are served from a still valid cached token or its refresh token
+    whenever possible.
+    """
+    def __init__(self, acquire_function, *args, refresh_margin=None, background_refresh=True, **kwargs):
+        """
+        Constructs an adal token provider
+
+        :param acquire_function: The adal function returning a token dict
+        :param args: The positional arguments to call acquire_function with
+        :param refresh_margin: The seconds before expiry at which the token is refreshed; defaults to 240
+        :param background_refresh: If True, a daemon timer refreshes the token before it expires
+        :param kwargs: The keyword arguments to call acquire_function with
+        """
+        self.acquire_function = acquire_function
+        self.args = args
+        self.kwargs = kwargs
+
+        super().__init__(refresh_margin=refresh_margin, background_refresh=background_refresh)
+
+    def acquire(self):
+        return self.acquire_function(*self.args, **self.kwargs)
+
+
+class FileTokenCache(adal.TokenCache):
+    """
+    adal token cache persisted to a local file, so that separate processes reuse tokens and refresh tokens instead
+    of authenticating against the authority every time they start
+    """
+    def __init__(self, path):
+        """
+        Constructs a file token cache, loading the file if it exists
+
+        :param path: The path of the cache file
+        """
+        self.path = path
+
+        state = None
+        if os.path.exists(path):
+            with open(path, 'r') as cache_file:
+                state = cache_file.read()
+
+        super().__init__(state)
+
+    def add(self, entries):
+        super().add(entries)
+        self.save()
+
+    def remove(self, entries):
+        super().remove(entries)
+        self.save()
+
+    def save(self):
+        """
+        Writes the cache to its file if it has changed
+        """
+        with self._lock:
+            if not self.has_state_changed:
+                return
+
+            # write to a temporary file readable only by the owner, then swap it in
+            temp_path = f'{self.path}.tmp'
+            descriptor = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(descriptor, 'w') as cache_file:
+                cache_file.write(self.serialize())
+
+            os.replace(temp_path, self.path)
+            self.has_state_changed = False
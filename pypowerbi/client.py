@@ -2,26 +2,34 @@
 
 import json
 import datetime
-import adal
 
+from .admin import Admin
 from .reports import Reports
 from .datasets import Datasets
 from .imports import Imports
 from .groups import Groups
 from .gateways import Gateways
 from .activity_logs import ActivityLogs
+from .features import Features
+from .transport import Transport
+from .retry import RetryPolicy
+from .metadata_cache import MetadataCache
+from .authentication import TokenProvider, AdalTokenProvider, get_authentication_context
 
 
 class PowerBIClient:
     default_resource_url = 'https://analysis.windows.net/powerbi/api'
     default_api_url = 'https://api.powerbi.com'
     default_authority_url = 'https://login.windows.net/common'
+    default_authority_host_url = 'https://login.windows.net'
 
     api_version_snippet = 'v1.0'
     api_myorg_snippet = 'myorg'
 
     @staticmethod
-    def get_client_with_username_password(client_id, username, password, authority_url=None, resource_url=None, api_url=None):
+    def get_client_with_username_password(client_id, username, password, authority_url=None, resource_url=None,
+                                          api_url=None, transport=None, retry_policy=None, rate_limiter=None,
+                                          token_cache_path=None):
         """
         Constructs a client with the option of using common defaults.
 
@@ -31,6 +39,11 @@ class PowerBIClient:
         :param authority_url: The authority_url; defaults to 'https://login.windows.net/common'
         :param resource_url: The resource_url; defaults to 'https://analysis.windows.net/powerbi/api'
         :param api_url: The api_url: defaults to 'https://api.powerbi.com'
+        :param transport: The optional transport to send requests with; defaults to a new pooled Transport
+        :param retry_policy: The optional RetryPolicy for throttled requests; defaults to RetryPolicy()
+        :param rate_limiter: The optional RateLimiter, e.g. RateLimiter.powerbi_defaults()
+        :param token_cache_path: The optional path of a file to persist the adal token cache to, so that later
+        processes reuse the cached tokens instead of authenticating again
         :return:
         """
         if authority_url is None:
@@ -39,41 +52,188 @@ class PowerBIClient:
         if resource_url is None:
             resource_url = PowerBIClient.default_resource_url
 
+        context = get_authentication_context(authority_url, token_cache_path=token_cache_path)
+
+        token_provider = AdalTokenProvider(context.acquire_token_with_username_password,
+                                           resource=resource_url,
+                                           client_id=client_id,
+                                           username=username,
+                                           password=password)
+
+        return PowerBIClient._get_client_with_token_provider(token_provider, api_url, transport, retry_policy,
+                                                             rate_limiter)
+
+    @staticmethod
+    def get_client_with_client_secret(client_id, client_secret, tenant_id=None, authority_url=None,
+                                      resource_url=None, api_url=None, transport=None, retry_policy=None,
+                                      rate_limiter=None, token_cache_path=None):
+        """
+        Constructs a client authenticating as a service principal with a client secret.
+
+        :param client_id: The application (client) id of the service principal
+        :param client_secret: The client secret of the service principal
+        :param tenant_id: The tenant id or domain; required unless authority_url is given
+        :param authority_url: The authority_url; defaults to 'https://login.windows.net/{tenant_id}'
+        :param resource_url: The resource_url; defaults to 'https://analysis.windows.net/powerbi/api'
+        :param api_url: The api_url: defaults to 'https://api.powerbi.com'
+        :param transport: The optional transport to send requests with; defaults to a new pooled Transport
+        :param retry_policy: The optional RetryPolicy for throttled requests; defaults to RetryPolicy()
+        :param rate_limiter: The optional RateLimiter, e.g. RateLimiter.powerbi_defaults()
+        :param token_cache_path: The optional path of a file to persist the adal token cache to
+        :return: The client
+        """
+        authority_url = PowerBIClient._get_tenant_authority_url(tenant_id, authority_url)
+
+        if resource_url is None:
+            resource_url = PowerBIClient.default_resource_url
+
+        context = get_authentication_context(authority_url, token_cache_path=token_cache_path)
+
+        token_provider = AdalTokenProvider(context.acquire_token_with_client_credentials,
+                                           resource=resource_url,
+                                           client_id=client_id,
+                                           client_secret=client_secret)
+
+        return PowerBIClient._get_client_with_token_provider(token_provider, api_url, transport, retry_policy,
+                                                             rate_limiter)
+
+    @staticmethod
+    def get_client_with_certificate(client_id, certificate, thumbprint, tenant_id=None, public_certificate=None,
+                                    authority_url=None, resource_url=None, api_url=None, transport=None,
+                                    retry_policy=None, rate_limiter=None, token_cache_path=None):
+        """
+        Constructs a client authenticating as a service principal with a certificate.
+
+        :param client_id: The application (client) id of the service principal
+        :param certificate: The PEM encoded private key of the certificate
+        :param thumbprint: The hex encoded thumbprint of the certificate
+        :param tenant_id: The tenant id or domain; required unless authority_url is given
+        :param public_certificate: The optional PEM encoded public certificate, sent for subject name and issuer
+        based authentication
+        :param authority_url: The authority_url; defaults to 'https://login.windows.net/{tenant_id}'
+        :param resource_url: The resource_url; defaults to 'https://analysis.windows.net/powerbi/api'
+        :param api_url: The api_url: defaults to 'https://api.powerbi.com'
+        :param transport: The optional transport to send requests with; defaults to a new pooled Transport
+        :param retry_policy: The optional RetryPolicy for throttled requests; defaults to RetryPolicy()
+        :param rate_limiter: The optional RateLimiter, e.g. RateLimiter.powerbi_defaults()
+        :param token_cache_path: The optional path of a file to persist the adal token cache to
+        :return: The client
+        """
+        authority_url = PowerBIClient._get_tenant_authority_url(tenant_id, authority_url)
+
+        if resource_url is None:
+            resource_url = PowerBIClient.default_resource_url
+
+        context = get_authentication_context(authority_url, token_cache_path=token_cache_path)
+
+        token_provider = AdalTokenProvider(context.acquire_token_with_client_certificate,
+                                           resource=resource_url,
+                                           client_id=client_id,
+                                           certificate=certificate,
+                                           thumbprint=thumbprint,
+                                           public_certificate=public_certificate)
+
+        return PowerBIClient._get_client_with_token_provider(token_provider, api_url, transport, retry_policy,
+                                                             rate_limiter)
+
+    @staticmethod
+    def _get_tenant_authority_url(tenant_id, authority_url):
+        # client credentials can't be used with the 'common' authority, they need the tenant
+        if authority_url is not None:
+            return authority_url
+
+        if tenant_id is None:
+            raise ValueError('Either tenant_id or authority_url is required to authenticate a service principal')
+
+        return f'{PowerBIClient.default_authority_host_url}/{tenant_id}'
+
+    @staticmethod
+    def _get_client_with_token_provider(token_provider, api_url, transport, retry_policy, rate_limiter):
         if api_url is None:
             api_url = PowerBIClient.default_api_url
 
-        context = adal.AuthenticationContext(authority=authority_url,
-                                             validate_authority=True,
-                                             api_version=None)
-
-        # get your authentication token
-        token = context.acquire_token_with_username_password(resource=resource_url,
-                                                             client_id=client_id,
-                                                             username=username,
-                                                             password=password)
+        # acquire the first token right away, so authentication errors surface here
+        token_provider.refresh()
 
-        return PowerBIClient(api_url, token)
+        return PowerBIClient(api_url, token_provider, transport, retry_policy, rate_limiter)
 
-    def __init__(self, api_url, token):
+    def __init__(self, api_url, token, transport=None, retry_policy=None, rate_limiter=None, metadata_cache=None):
+        """
+        Constructs a client
+
+        :param api_url: The api_url, usually 'https://api.powerbi.com'
+        :param token: The adal token dict or TokenProvider to authenticate with
+        :param transport: The optional transport shared by all operation modules; defaults to a new pooled Transport
+        :param retry_policy: The optional RetryPolicy applied to every request; a new transport defaults to
+        RetryPolicy(), a given transport keeps its own policy unless this is set
+        :param rate_limiter: The optional RateLimiter every request waits for, e.g. RateLimiter.powerbi_defaults()
+        :param metadata_cache: The optional MetadataCache of the listed datasets, reports and groups; defaults to a
+        new MetadataCache(), MetadataCache(ttl=0) disables caching
+        """
         self.api_url = api_url
         self.token = token
+
+        if transport is None:
+            if retry_policy is None:
+                retry_policy = RetryPolicy()
+            transport = Transport(retry_policy=retry_policy)
+        elif retry_policy is not None:
+            transport.retry_policy = retry_policy
+
+        if rate_limiter is not None:
+            transport.rate_limiter = rate_limiter
+
+        self.transport = transport
+
+        if metadata_cache is None:
+            metadata_cache = MetadataCache()
+
+        self.metadata_cache = metadata_cache
+
+        self.admin = Admin(self)
         self.datasets = Datasets(self)
         self.reports = Reports(self)
         self.imports = Imports(self)
         self.groups = Groups(self)
         self.gateways = Gateways(self)
         self.activity_logs = ActivityLogs(self)
+        self.features = Features(self)
 
     @property
-    def auth_header(self):
-        if self._auth_header is None:
-            self._auth_header = {
-                'Authorization': f'Bearer {self.token["accessToken"]}'
-            }
+    def retry_policy(self):
+        return self.transport.retry_policy
+
+    @property
+    def rate_limiter(self):
+        return self.transport.rate_limiter
+
+    def close(self):
+        """
+        Closes the pooled connections of the client's transport and stops background token refreshes
+        """
+        self.transport.close()
+        self.token_provider.close()
+
+    def __enter__(self):
+        return self
 
-        return self._auth_header
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
 
-    _auth_header = None
+    @property
+    def token(self):
+        return self.token_provider.token
+
+    @token.setter
+    def token(self, token):
+        if not isinstance(token, TokenProvider):
+            token = TokenProvider(token)
+
+        self.token_provider = token
+
+    @property
+    def auth_header(self):
+        return self.token_provider.auth_header
 
 
 class EffectiveIdentity:
@@ -0,0 +1,121 @@
+# -*- coding: future_fstrings -*-
+import sys
+
+from .dataset import RowEncoder
+
+
+"""
+Helpers turning the rows accepted by Datasets.post_rows into the row dicts of a push request.
+
+Besides a list of Row objects or dicts, rows can be given column-wise: as a dict of column name to a list of values,
+a NumPy structured array, or a pandas DataFrame. PayloadEncoder encodes columnar rows straight from the columns,
+without creating a dict per row; iter_columnar_rows builds the row dicts for callers that need them. numpy and pandas
+are optional; they are never imported here, since a caller passing their arrays has imported them already.
+"""
+
+
+def _dataframe_type():
+    pandas = sys.modules.get('pandas')
+
+    return pandas.DataFrame if pandas is not None else None
+
+
+def _ndarray_type():
+    numpy = sys.modules.get('numpy')
+
+    return numpy.ndarray if numpy is not None else None
+
+
+def _column_values(column):
+    """
+    Reads a NumPy array or pandas Series as a list of python values
+    """
+    dtype = column.dtype
+
+    if getattr(dtype, 'kind', None) == 'M':
+        if getattr(dtype, 'tz', None) is not None:
+            # timezone-aware pandas datetimes keep their offset
+            return [None if x != x else x.to_pydatetime() for x in column]
+
+        values = column.to_numpy() if hasattr(column, 'to_numpy') else column
+        # tolist would turn datetime64[ns] values into int nanoseconds, microseconds become datetimes and NaT None
+        return values.astype('datetime64[us]').tolist()
+
+    # tolist converts the numpy scalars of the column to python values in a single pass
+    return column.tolist()
+
+
+def is_columnar(rows):
+    """
+    Evaluates if rows are given column-wise
+    :param rows: The rows passed to post_rows
+    :return: True for a dict of column lists, a NumPy structured array or a pandas DataFrame, False otherwise
+    """
+    if isinstance(rows, dict):
+        return True
+
+    dataframe_type = _dataframe_type()
+    if dataframe_type is not None and isinstance(rows, dataframe_type):
+        return True
+
+    ndarray_type = _ndarray_type()
+    if ndarray_type is not None and isinstance(rows, ndarray_type):
+        return rows.dtype.names is not None
+
+    return False
+
+
+def columns_from_columnar(rows):
+    """
+    Reads the columns of columnar rows as plain python values
+    :param rows: A dict of column lists, a NumPy structured array or a pandas DataFrame
+    :return: A tuple of the list of column names and the list of column value lists
+    """
+    if isinstance(rows, dict):
+        names = list(rows.keys())
+        # columns may be NumPy arrays or pandas Series as well
+        columns = [_column_values(x) if hasattr(x, 'dtype') else x for x in rows.values()]
+
+        lengths = set(len(column) for column in columns)
+        if len(lengths) > 1:
+            raise ValueError(f'Columns must all have the same length, got lengths {sorted(lengths)}')
+
+        return names, columns
+
+    dataframe_type = _dataframe_type()
+    if dataframe_type is not None and isinstance(rows, dataframe_type):
+        return [str(name) for name in rows.columns], [_column_values(rows[name]) for name in rows.columns]
+
+    ndarray_type = _ndarray_type()
+    if ndarray_type is not None and isinstance(rows, ndarray_type) and rows.dtype.names is not None:
+        return list(rows.dtype.names), [_column_values(rows[name]) for name in rows.dtype.names]
+
+    raise TypeError(f'Columnar rows must be a dict of lists, a NumPy structured array or a DataFrame, '
+                    f'got {type(rows).__name__}')
+
+
+def iter_columnar_rows(rows):
+    """
+    Generates row dicts from columnar rows
+    :param rows: A dict of column lists, a NumPy structured array or a pandas DataFrame
+    :return: A generator of row dicts
+    """
+    names, columns = columns_from_columnar(rows)
+
+    for values in zip(*columns):
+        yield dict(zip(names, values))
+
+
+def iter_row_dicts(rows):
+    """
+    Generates the row dicts of any rows accepted by post_rows
+    :param rows: A list of Row objects or dicts, or columnar rows
+    :return: A generator of row dicts
+    """
+    if is_columnar(rows):
+        yield from iter_columnar_rows(rows)
+        return
+
+    row_encoder = RowEncoder()
+    for row in rows:
+        yield row if isinstance(row, dict) else row_encoder.default(row)
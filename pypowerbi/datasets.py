@@ -5,6 +5,9 @@ from pypowerbi.utils import convert_datetime_fields
 
 from requests.exceptions import HTTPError
 from .dataset import *
+from .payload import PayloadEncoder
+from .metadata_cache import MetadataCache
+from .refresh_poller import RefreshPoller
 
 
 class Datasets:
@@ -22,32 +25,56 @@ class Datasets:
     # json keys
     get_datasets_value_key = 'value'
 
+    # the header holding the id of a refresh request
+    request_id_header = 'RequestId'
+
     def __init__(self, client):
         self.client = client
         self.base_url = f'{self.client.api_url}/{self.client.api_version_snippet}/{self.client.api_myorg_snippet}'
+        self.payload_encoder = PayloadEncoder()
 
     def count(self, group_id=None):
         """
         Evaluates the number of datasets
         :param group_id: The optional group id
-        :return: The number of datasets as returned by the API
+        :return: The number of datasets as returned by the API, or by the client's metadata cache
         """
-        return len(self.get_datasets(group_id))
+        return len(self.get_datasets_listing(group_id))
 
-    def has_dataset(self, dataset_id, group_id=None):
+    def has_dataset(self, dataset_id, group_id=None, refresh=False):
         """
         Evaluates if the dataset exists
         :param dataset_id: The id of the dataset to evaluate
         :param group_id: The optional group id
+        :param refresh: If True, the datasets are listed even if they are cached, e.g. to see a dataset created
+        outside the client since they were listed
         :return: True if the dataset exists, False otherwise
         """
-        datasets = self.get_datasets(group_id)
+        return dataset_id in self.get_datasets_listing(group_id, refresh)
 
-        for dataset in datasets:
-            if dataset.id == str(dataset_id):
-                return True
+    def get_datasets_listing(self, group_id=None, refresh=False):
+        """
+        Gets the datasets from the client's metadata cache, listing them if they are not cached
+        :param group_id: The optional group id to get datasets from
+        :param refresh: If True, the datasets are listed even if they are cached
+        :return: The MetadataListing of the datasets, indexed by id and by name
+        """
+        listing = None if refresh else self.client.metadata_cache.get(MetadataCache.datasets_kind, group_id)
+        if listing is None:
+            listing = self._list_datasets(group_id)
 
-        return False
+        return listing
+
+    def find_dataset_by_name(self, name, group_id=None, refresh=False):
+        """
+        Finds a dataset by its name, using the client's metadata cache
+        :param name: The name of the dataset
+        :param group_id: The optional group id to find the dataset in
+        :param refresh: If True, the datasets are listed even if they are cached
+        :return: The dataset, None if there is no dataset of that name
+        """
+        listing = self.get_datasets_listing(group_id, refresh)
+        return MetadataCache.unique(MetadataCache.datasets_kind, name, listing.find(name))
 
     def get_datasets(self, group_id=None):
         """
@@ -56,6 +83,9 @@ class Datasets:
         :param group_id: The optional group id to get datasets from
         :return: The list of the datasets found
         """
+        return self._list_datasets(group_id).items
+
+    def _list_datasets(self, group_id):
         # group_id can be none, account for it
         if group_id is None:
             groups_part = '/'
@@ -68,13 +98,14 @@ class Datasets:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.get(url, headers=headers)
+        response = self.client.transport.get(url, headers=headers)
 
         # 200 is the only successful code, raise an exception on any other response code
         if response.status_code != 200:
             raise HTTPError(response, f'Get Datasets request returned http error: {response.json()}')
 
-        return self.datasets_from_get_datasets_response(response)
+        return self.client.metadata_cache.put(MetadataCache.datasets_kind, group_id,
+                                              self.datasets_from_get_datasets_response(response))
 
     def get_dataset(self, dataset_id, group_id=None):
         """
@@ -95,7 +126,7 @@ class Datasets:
         # form the headers
         headers = self.client.auth_header
         # get the response
-        response = requests.get(url, headers=headers)
+        response = self.client.transport.get(url, headers=headers)
 
         # 200 is the only successful code, raise an exception on any other response code
         if response.status_code != 200:
@@ -125,13 +156,16 @@ class Datasets:
         json_dict = DatasetEncoder().default(dataset)
 
         # get the response
-        response = requests.post(url, headers=headers, json=json_dict)
+        response = self.client.transport.post(url, headers=headers, json=json_dict)
 
         # 201 - Created. The request was fulfilled and a new Dataset was created.
         if response.status_code != 201:
             raise HTTPError(response, f'Post Datasets request returned http code: {response.json()}')
 
-        return Dataset.from_dict(json.loads(response.text))
+        dataset = Dataset.from_dict(json.loads(response.text))
+        self.client.metadata_cache.add(MetadataCache.datasets_kind, group_id, dataset)
+
+        return dataset
 
     def delete_dataset(self, dataset_id, group_id=None):
         """
@@ -151,12 +185,14 @@ class Datasets:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.delete(url, headers=headers)
+        response = self.client.transport.delete(url, headers=headers)
 
         # 200 is the only successful code
         if response.status_code != 200:
             raise HTTPError(response, f'Delete Dataset request returned http error: {response.json()}')
 
+        self.client.metadata_cache.remove(MetadataCache.datasets_kind, group_id, dataset_id)
+
     def delete_all_datasets(self, group_id=None):
         """
         Deletes all datasets
@@ -165,7 +201,7 @@ class Datasets:
         # get all the datasets and delete each one
         datasets = self.get_datasets(group_id)
         for dataset in datasets:
-            self.delete_dataset(group_id, dataset.id)
+            self.delete_dataset(dataset.id, group_id)
 
     def get_tables(self, dataset_id, group_id=None):
         """
@@ -187,7 +223,7 @@ class Datasets:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.get(url, headers=headers)
+        response = self.client.transport.get(url, headers=headers)
 
         # 200 is the only successful code, raise an exception on any other response code
         if response.status_code != 200:
@@ -219,19 +255,40 @@ class Datasets:
             json_dict = TableEncoder().default(table)
 
             # get the response
-            response = requests.post(url, headers=headers, json=json_dict)
+            response = self.client.transport.post(url, headers=headers, json=json_dict)
 
             # 200 is the only successful code
             if response.status_code != 200:
                 raise HTTPError(response, f'Post row request returned http error: {response.json()}')
 
-    def post_rows(self, dataset_id, table_name, rows, group_id=None):
+    def post_rows(self, dataset_id, table_name, rows, group_id=None, validator=None):
         """
         Posts rows to a table in a given dataset
         https://msdn.microsoft.com/en-us/library/mt203561.aspx
         :param dataset_id: The id of the dataset to post rows to
         :param table_name: The name of the table to post rows to
-        :param rows: The rows to post to the table
+        :param rows: The rows to post to the table, as a list of Row objects or dicts, or column-wise as a dict of
+        column lists, a NumPy structured array or a pandas DataFrame
+        :param group_id: The optional id of the group to post rows to
+        :param validator: An optional RowValidator; only the rows it accepts are posted, coerced to the column types
+        :return: The ValidationResult if a validator is given, None otherwise
+        """
+        if validator is None:
+            self.post_payload(dataset_id, table_name, self.payload_encoder.encode(rows), group_id)
+            return None
+
+        result = validator.validate(rows)
+        if result.rows:
+            self.post_payload(dataset_id, table_name, self.payload_encoder.encode(result.rows), group_id)
+
+        return result
+
+    def post_payload(self, dataset_id, table_name, payload, group_id=None):
+        """
+        Posts an already encoded push-row request body to a table in a given dataset
+        :param dataset_id: The id of the dataset to post rows to
+        :param table_name: The name of the table to post rows to
+        :param payload: The utf-8 json body, as built by a PayloadEncoder
         :param group_id: The optional id of the group to post rows to
         """
         # group_id can be none, account for it
@@ -244,15 +301,11 @@ class Datasets:
         url = f'{self.base_url}{groups_part}/{self.datasets_snippet}/{dataset_id}/' \
               f'{self.tables_snippet}/{table_name}/{self.rows_snippet}'
         # form the headers
-        headers = self.client.auth_header
-        # form the json dict
-        row_encoder = RowEncoder()
-        json_dict = {
-            'rows': [row_encoder.default(x) for x in rows]
-        }
+        headers = dict(self.client.auth_header)
+        headers['Content-Type'] = self.payload_encoder.content_type
 
         # get the response
-        response = requests.post(url, headers=headers, json=json_dict)
+        response = self.client.transport.post(url, headers=headers, data=payload)
 
         # 200 is the only successful code
         if response.status_code != 200:
@@ -279,7 +332,7 @@ class Datasets:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.delete(url, headers=headers)
+        response = self.client.transport.delete(url, headers=headers)
 
         # 200 is the only successful code
         if response.status_code != 200:
@@ -304,7 +357,7 @@ class Datasets:
         # form the headers
         headers = self.client.auth_header
         # get the response
-        response = requests.get(url, headers=headers)
+        response = self.client.transport.get(url, headers=headers)
 
         # 200 is the only successful code, raise an exception on any other response code
         if response.status_code != 200:
@@ -333,7 +386,7 @@ class Datasets:
 
         headers = self.client.auth_header
 
-        response = requests.post(url, headers=headers, json=body)
+        response = self.client.transport.post(url, headers=headers, json=body)
 
         if response.status_code != 200:
             raise HTTPError(response, f'Setting dataset parameters failed with http error: {response.json()}')
@@ -344,6 +397,8 @@ class Datasets:
         :param dataset_id: The id of the dataset to refresh
         :param notify_option: The optional notify_option to add in the request body
         :param group_id: The optional id of the group
+        :return: The id of the refresh request, the requestId of its refresh history entry; None if the service did
+        not return one
         """
         # group_id can be none, account for it
         if group_id is None:
@@ -365,12 +420,40 @@ class Datasets:
             json_dict = None
 
         # get the response
-        response = requests.post(url, headers=headers, json=json_dict)
+        response = self.client.transport.post(url, headers=headers, json=json_dict)
 
         # 200 is the only successful code, raise an exception on any other response code
         if response.status_code != 202:
             raise HTTPError(response, f'Refresh dataset request returned http error: {response.json()}')
 
+        return response.headers.get(self.request_id_header)
+
+    def wait_for_refresh(self, dataset_id, group_id=None, request_id=None, timeout=None, triggered_at=None):
+        """
+        Waits for a refresh of a dataset to finish, checking its refresh history at intervals that follow the usual
+        duration of its refreshes, see RefreshPoller
+        :param dataset_id: The id of the refreshed dataset
+        :param group_id: The optional id of the group
+        :param request_id: The request id returned by refresh_dataset
+        :param timeout: The optional seconds after which a TimeoutError is raised
+        :param triggered_at: The naive UTC datetime the refresh was started at, used if there is no request id;
+        without either, the first refresh started from now on is waited for
+        :return: The refresh history entry of the finished refresh
+        """
+        return self.wait_for_refreshes([(dataset_id, group_id, request_id, triggered_at)], timeout)[0]
+
+    def wait_for_refreshes(self, refreshes, timeout=None):
+        """
+        Waits for many refreshes to finish, checking them together, see RefreshPoller
+        :param refreshes: An iterable of (dataset_id, group_id, request_id) or
+        (dataset_id, group_id, request_id, triggered_at) tuples, request_id as returned by refresh_dataset, see
+        wait_for_refresh
+        :param timeout: The optional seconds after which a TimeoutError is raised
+        :return: The list of the refresh history entries of the finished refreshes, in the order given
+        """
+        with RefreshPoller(self) as poller:
+            return poller.wait(refreshes, timeout)
+
     def get_dataset_gateway_datasources(self, dataset_id, group_id=None):
         """
                 Gets the gateway datasources for a dataset
@@ -390,7 +473,7 @@ class Datasets:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.get(url, headers=headers)
+        response = self.client.transport.get(url, headers=headers)
 
         # 200 is the only successful code, raise an exception on any other response code
         if response.status_code != 200:
@@ -419,7 +502,7 @@ class Datasets:
         body = {"gatewayObjectId": gateway_id}
         headers = self.client.auth_header
 
-        response = requests.post(url, headers=headers, json=body)
+        response = self.client.transport.post(url, headers=headers, json=body)
 
         if response.status_code != 200:
             raise HTTPError(response, f'Binding gateway to dataset failed with http error: {response.json()}')
@@ -447,7 +530,7 @@ class Datasets:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.get(url, headers=headers)
+        response = self.client.transport.get(url, headers=headers)
 
         # 200 is the only successful code, raise an exception on any other response code
         if response.status_code != 200:
@@ -457,7 +540,7 @@ class Datasets:
 
         # Convert the date strings into datetime objects
         time_fields = ['startTime', 'endTime']
-        refresh_data = convert_datetime_fields(refresh_data, time_fields)
+        refresh_data = convert_datetime_fields(refresh_data, time_fields, in_place=True)
 
         return refresh_data
 
@@ -489,7 +572,7 @@ class Datasets:
         body = RefreshScheduleRequest(refresh_schedule).as_dict()
 
         # get the response
-        response = requests.patch(url, headers=headers, json=body)
+        response = self.client.transport.patch(url, headers=headers, json=body)
 
         # 200 is the only successful code, raise an exception on any other response code
         if response.status_code != 200:
@@ -513,7 +596,7 @@ class Datasets:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.get(url, headers=headers)
+        response = self.client.transport.get(url, headers=headers)
 
         # 200 is the only successful code, raise an exception on any other response code
         if response.status_code != 200:
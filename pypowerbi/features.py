@@ -1,5 +1,4 @@
 # -*- coding: future_fstrings -*-
-import requests
 import json
 
 from requests.exceptions import HTTPError
@@ -40,7 +39,7 @@ class Features:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.get(url, headers=headers)
+        response = self.client.transport.get(url, headers=headers)
 
         # 200 is the only successful code, raise an exception on any other response code
         if response.status_code != 200:
@@ -33,7 +33,7 @@ class Gateways:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.get(url, headers=headers)
+        response = self.client.transport.get(url, headers=headers)
 
         # 200 is the only successful code, raise an exception on any other response code
         if response.status_code != 200:
@@ -54,7 +54,7 @@ class Gateways:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.get(url, headers=headers)
+        response = self.client.transport.get(url, headers=headers)
 
         # 200 is the only successful code, raise an exception on any other response code
         if response.status_code != 200:
@@ -77,7 +77,7 @@ class Gateways:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.get(url, headers=headers)
+        response = self.client.transport.get(url, headers=headers)
 
         # 200 is the only successful code, raise an exception on any other response code
         if response.status_code != 200:
@@ -99,7 +99,7 @@ class Gateways:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.get(url, headers=headers)
+        response = self.client.transport.get(url, headers=headers)
 
         # 200 is the only successful code, raise an exception on any other response code
         if response.status_code != 200:
@@ -127,7 +127,7 @@ class Gateways:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.post(url, headers=headers, json=body)
+        response = self.client.transport.post(url, headers=headers, json=body)
 
         # 201 is the only successful code, raise an exception on any other response code
         if response.status_code != 201:
@@ -153,7 +153,7 @@ class Gateways:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.delete(url, headers=headers)
+        response = self.client.transport.delete(url, headers=headers)
 
         # 200 is the only successful code, raise an exception on any other response code
         if response.status_code != 200:
@@ -186,7 +186,7 @@ class Gateways:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.post(url, headers=headers, json=body)
+        response = self.client.transport.post(url, headers=headers, json=body)
 
         if response.status_code != 200:
             # add datasource user requests return an empty body; get the error from headers instead
@@ -1,18 +1,37 @@
 # -*- coding: future_fstrings -*-
 import json
 
+from .report import Report
+from .dataset import Dataset
+from .group_user import GroupUser
+
 
 class Group:
     id_key = 'id'
     name_key = 'name'
     is_readonly_key = 'isReadOnly'
     is_on_dedicated_capacity_key = 'isOnDedicatedCapacity'
+    capacity_id_key = 'capacityId'
+    type_key = 'type'
+    state_key = 'state'
+    # keys of the admin api's $expand options
+    reports_key = 'reports'
+    datasets_key = 'datasets'
+    users_key = 'users'
 
-    def __init__(self, name, group_id, is_readonly=False, is_on_dedicated_capacity=False):
+    def __init__(self, name, group_id, is_readonly=False, is_on_dedicated_capacity=False, capacity_id=None,
+                 group_type=None, state=None, reports=None, datasets=None, users=None):
         self.name = name
         self.id = group_id
         self.is_readonly = is_readonly
         self.is_on_dedicated_capacity = is_on_dedicated_capacity
+        self.capacity_id = capacity_id
+        self.type = group_type
+        self.state = state
+        # only set when requested with $expand, None otherwise
+        self.reports = reports
+        self.datasets = datasets
+        self.users = users
 
     @classmethod
     def from_dict(cls, dictionary):
@@ -23,8 +42,25 @@ class Group:
         name = dictionary.get(cls.name_key)
         is_readonly = dictionary.get(cls.is_readonly_key, False)
         is_on_dedicated_capacity = dictionary.get(cls.is_on_dedicated_capacity_key, False)
+        capacity_id = dictionary.get(cls.capacity_id_key)
+        group_type = dictionary.get(cls.type_key)
+        state = dictionary.get(cls.state_key)
+
+        # expanded collections are optional
+        reports = dictionary.get(cls.reports_key)
+        if reports is not None:
+            reports = [Report.from_dict(x) for x in reports]
+
+        datasets = dictionary.get(cls.datasets_key)
+        if datasets is not None:
+            datasets = [Dataset.from_dict(x) for x in datasets]
+
+        users = dictionary.get(cls.users_key)
+        if users is not None:
+            users = [GroupUser.from_dict(x) for x in users]
 
-        return cls(name, group_id, is_readonly, is_on_dedicated_capacity)
+        return cls(name, group_id, is_readonly, is_on_dedicated_capacity, capacity_id, group_type, state, reports,
+                   datasets, users)
 
     def __repr__(self):
         return f'<Group {str(self.__dict__)}>'
@@ -35,6 +35,8 @@ class GroupUser:
         :param dictionary: The dictionary to create a user from
         :return: The created dictionary
         """
+        if cls.email_address_key not in dictionary:
+            dictionary[cls.email_address_key] = ""
         return GroupUser(str(dictionary[cls.group_user_access_right_key]), str(dictionary[cls.email_address_key]), str(dictionary[cls.display_name_key]), str(dictionary[cls.identifier_key]), str(dictionary[cls.principal_type_key]))
 
     def as_set_values_dict(self):
@@ -1,11 +1,11 @@
 # -*- coding: future_fstrings -*-
-import requests
 import json
 import urllib.parse
 
 from requests.exceptions import HTTPError
 from .group import Group
 from .group_user import GroupUser
+from .metadata_cache import MetadataCache
 
 
 class Groups:
@@ -53,13 +53,16 @@ class Groups:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.post(url, headers=headers, json=body)
+        response = self.client.transport.post(url, headers=headers, json=body)
 
         # 200 is the only successful code, raise an exception on any other response code
         if response.status_code != 200:
             raise HTTPError(f'Add group request returned the following http error: {response.json()}')
 
-        return self.create_group_from_create_group_response(response)
+        group = self.create_group_from_create_group_response(response)
+        self.client.metadata_cache.add(MetadataCache.groups_kind, None, group)
+
+        return group
 
     @staticmethod
     def create_group_from_create_group_response(response):
@@ -98,7 +101,7 @@ class Groups:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.post(url, headers=headers, json=body)
+        response = self.client.transport.post(url, headers=headers, json=body)
 
         # 200 is the only successful code, raise an exception on any other response code
         if response.status_code != 200:
@@ -120,7 +123,7 @@ class Groups:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.get(url, headers=headers)
+        response = self.client.transport.get(url, headers=headers)
         # 200 - OK. Indicates success. List of users.
         if response.status_code == 200:
             users = self.users_from_get_group_users_response(response)
@@ -135,22 +138,40 @@ class Groups:
         :return: int
             The number of groups
         """
-        return len(self.get_groups())
+        return len(self.get_groups_listing())
 
-    def has_group(self, group_id):
+    def has_group(self, group_id, refresh=False):
         """
         Evaluates if client has access to the group
         :param group_id:
+        :param refresh: If True, the groups are listed even if they are cached
         :return: bool
             True if the client has access to the group, False otherwise
         """
-        groups = self.get_groups()
+        return group_id in self.get_groups_listing(refresh)
 
-        for group in groups:
-            if group.id == str(group_id):
-                return True
+    def get_groups_listing(self, refresh=False):
+        """
+        Gets all groups that the client has access to from the client's metadata cache, listing them if they are not
+        cached
+        :param refresh: If True, the groups are listed even if they are cached
+        :return: The MetadataListing of the groups, indexed by id and by name
+        """
+        listing = None if refresh else self.client.metadata_cache.get(MetadataCache.groups_kind)
+        if listing is None:
+            listing = self.client.metadata_cache.put(MetadataCache.groups_kind, None, self.get_groups())
 
-        return False
+        return listing
+
+    def find_group_by_name(self, name, refresh=False):
+        """
+        Finds a group by its name, using the client's metadata cache
+        :param name: The name of the group
+        :param refresh: If True, the groups are listed even if they are cached
+        :return: The group, None if the client has access to no group of that name
+        """
+        listing = self.get_groups_listing(refresh)
+        return MetadataCache.unique(MetadataCache.groups_kind, name, listing.find(name))
 
     def get_groups(self, filter_str=None, top=None, skip=None):
         """
@@ -184,13 +205,19 @@ class Groups:
         # form the headers
         headers = self.client.auth_header
         # get the response
-        response = requests.get(url, headers=headers)
+        response = self.client.transport.get(url, headers=headers)
 
         # 200 is the only successful code, raise an exception on any other response code
         if response.status_code != 200:
             raise HTTPError(response, f'Get Groups request returned http error: {response.json()}')
 
-        return self.groups_from_get_groups_response(response)
+        groups = self.groups_from_get_groups_response(response)
+
+        # only a listing of all groups can answer existence checks
+        if not query_parameters:
+            self.client.metadata_cache.put(MetadataCache.groups_kind, None, groups)
+
+        return groups
 
     @classmethod
     def groups_from_get_groups_response(cls, response):
@@ -1,11 +1,11 @@
 # -*- coding: future_fstrings -*-
-import requests
 import json
 import urllib
 import re
 
 from requests.exceptions import HTTPError
 from .import_class import Import
+from .metadata_cache import MetadataCache
 
 
 class Imports:
@@ -50,16 +50,16 @@ class Imports:
         headers = self.client.auth_header
         try:
             with open(filename, 'rb') as file_obj:
-                response = requests.post(url, headers=headers,
-                                        files={
-                                            'file': file_obj,
-                                        })
+                response = self.client.transport.post(url, headers=headers,
+                                                      files={
+                                                          'file': file_obj,
+                                                      })
         except TypeError:
             # assume filename is a file-like object already
-            response = requests.post(url, headers=headers,
-                            files={
-                                'file': filename,
-                            })
+            response = self.client.transport.post(url, headers=headers,
+                                                  files={
+                                                      'file': filename,
+                                                  })
 
         # 200 OK
         if response.status_code == 200:
@@ -73,6 +73,10 @@ class Imports:
         else:
             raise HTTPError(response, f"Upload file failed with status code: {response.json()}")
 
+        # the import creates or replaces datasets and reports in the background, list them again when next needed
+        self.client.metadata_cache.invalidate(MetadataCache.datasets_kind, group_id)
+        self.client.metadata_cache.invalidate(MetadataCache.reports_kind, group_id)
+
         return import_object
 
     def get_import(self, import_id, group_id=None):
@@ -84,7 +88,7 @@ class Imports:
         url = f'{self.base_url}{groups_part}{self.imports_snippet}/{import_id}'
 
         headers = self.client.auth_header
-        response = requests.get(url, headers=headers)
+        response = self.client.transport.get(url, headers=headers)
 
         # 200 OK
         if response.status_code == 200:
@@ -103,7 +107,7 @@ class Imports:
         url = f'{self.base_url}{groups_part}{self.imports_snippet}'
 
         headers = self.client.auth_header
-        response = requests.get(url, headers=headers)
+        response = self.client.transport.get(url, headers=headers)
 
         # 200 OK
         if response.status_code == 200:
@@ -0,0 +1,458 @@
+# -*- coding: future_fstrings -*-
+import time
+import threading
+
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from .payload import PayloadEncoder
+
+
+class IngestionResult:
+    """
+    Summary of the rows pushed by a RowIngestor.ingest call
+    """
+    def __init__(self, rows, chunks, seconds):
+        self.rows = rows
+        self.chunks = chunks
+        self.seconds = seconds
+
+    @property
+    def rows_per_second(self):
+        if self.seconds <= 0:
+            return float(self.rows)
+
+        return self.rows / self.seconds
+
+    def __repr__(self):
+        return f'<IngestionResult {self.rows} rows in {self.chunks} chunks, {self.rows_per_second:.0f} rows/s>'
+
+
+class OrderedIngestion:
+    """
+    The state of a RowIngestor.ingest call posting its chunks in order
+    """
+    def __init__(self):
+        # the error of the first failed chunk, the later chunks of the call are not posted
+        self.error = None
+
+
+class RowIngestor:
+    """
+    Pushes any number of rows to push dataset tables through Datasets.post_payload.
+
+    Rows are split into chunks that stay within the limits of the push API, and the chunks are posted by a bounded
+    pool of worker threads. With preserve_order, the chunks of a table are posted strictly one after the other, in
+    the order of the rows, while chunks of different tables are still posted concurrently. A chunk that fails stops
+    the later chunks of the same ingest call; later calls post their rows as usual.
+    """
+    # the push API rejects requests with more rows than this
+    max_rows_per_request = 10000
+    # stay well below the request size the service accepts
+    default_max_bytes_per_request = 8 * 1024 * 1024
+    default_max_workers = 4
+
+    def __init__(self, datasets, max_workers=None, rows_per_request=None, max_bytes_per_request=None,
+                 preserve_order=False):
+        """
+        Constructs a row ingestor
+
+        :param datasets: The Datasets operations module to post the rows with, e.g. client.datasets
+        :param max_workers: The number of chunks posted concurrently; defaults to 4
+        :param rows_per_request: The maximum number of rows per chunk; defaults to, and is capped at, 10000
+        :param max_bytes_per_request: The maximum json size of a chunk in bytes; defaults to 8 MiB
+        :param preserve_order: If True, the chunks of a table are posted in order, one at a time
+        """
+        if max_workers is None:
+            max_workers = self.default_max_workers
+
+        if rows_per_request is None or rows_per_request > self.max_rows_per_request:
+            rows_per_request = self.max_rows_per_request
+
+        if max_bytes_per_request is None:
+            max_bytes_per_request = self.default_max_bytes_per_request
+
+        self.datasets = datasets
+        self.max_workers = max_workers
+        self.rows_per_request = rows_per_request
+        self.max_bytes_per_request = max_bytes_per_request
+        self.preserve_order = preserve_order
+        self.payload_encoder = PayloadEncoder()
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        # the future of the last chunk of each table not posted yet, which the next chunk of that table is submitted
+        # after when preserving order
+        self._tails = {}
+        self._lock = threading.Lock()
+
+    def iter_chunks(self, rows):
+        """
+        Encodes rows and splits them into chunks within the row and size limits of a push request
+        :param rows: An iterable of Row objects or dicts, or columnar rows as accepted by Datasets.post_rows
+        :return: A generator of lists of encoded rows, ready for PayloadEncoder.join
+        """
+        chunk = []
+        wrapper_bytes = self.payload_encoder.wrapper_size()
+        chunk_bytes = wrapper_bytes
+
+        for encoded_row in self.payload_encoder.iter_encoded_rows(rows):
+            # each row adds its json plus a separating comma, rows are sized by the very bytes that are sent
+            row_bytes = len(encoded_row) + 1
+
+            if chunk and (len(chunk) >= self.rows_per_request or chunk_bytes + row_bytes > self.max_bytes_per_request):
+                yield chunk
+                chunk = []
+                chunk_bytes = wrapper_bytes
+
+            chunk.append(encoded_row)
+            chunk_bytes += row_bytes
+
+        if chunk:
+            yield chunk
+
+    def ingest(self, dataset_id, table_name, rows, group_id=None):
+        """
+        Posts rows to a table, blocking until all of them have been sent
+        :param dataset_id: The id of the dataset to post rows to
+        :param table_name: The name of the table to post rows to
+        :param rows: An iterable of Row objects or dicts, consumed lazily, or columnar rows
+        :param group_id: The optional id of the group to post rows to
+        :return: An IngestionResult
+        """
+        start = time.monotonic()
+        table_key = (group_id, dataset_id, table_name)
+
+        call = OrderedIngestion()
+        pending = set()
+        row_count = 0
+        chunk_count = 0
+
+        try:
+            for chunk in self.iter_chunks(rows):
+                # keep a bounded number of chunks in memory, the iterable is only consumed as fast as chunks are sent
+                while len(pending) >= self.max_workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    self._raise_for_failures(done)
+
+                if self.preserve_order:
+                    future = self._submit_in_order(table_key, call, dataset_id, table_name, chunk, group_id)
+                else:
+                    future = self._executor.submit(self._post_chunk, dataset_id, table_name, chunk, group_id)
+
+                pending.add(future)
+                row_count += len(chunk)
+                chunk_count += 1
+        finally:
+            done, pending = wait(pending)
+
+        self._raise_for_failures(done)
+
+        return IngestionResult(row_count, chunk_count, time.monotonic() - start)
+
+    def _post_chunk(self, dataset_id, table_name, chunk, group_id):
+        self.datasets.post_payload(dataset_id, table_name, self.payload_encoder.join(chunk), group_id)
+
+    def _submit_in_order(self, table_key, call, dataset_id, table_name, chunk, group_id):
+        future = Future()
+        with self._lock:
+            previous = self._tails.get(table_key)
+            self._tails[table_key] = future
+
+        future.add_done_callback(lambda f: self._release_tail(table_key, f))
+
+        def submit(_=None):
+            if call.error is not None:
+                # an earlier chunk of this call failed, no later rows are sent out of order
+                future.set_exception(call.error)
+                return
+
+            try:
+                self._executor.submit(self._post_ordered_chunk, call, future, dataset_id, table_name, chunk,
+                                      group_id)
+            except RuntimeError as e:
+                # the ingestor was closed meanwhile
+                future.set_exception(e)
+
+        # the chunk is submitted once the previous chunk of the table is done, no worker waits for it
+        if previous is None:
+            submit()
+        else:
+            previous.add_done_callback(submit)
+
+        return future
+
+    def _post_ordered_chunk(self, call, future, dataset_id, table_name, chunk, group_id):
+        try:
+            self._post_chunk(dataset_id, table_name, chunk, group_id)
+        except Exception as e:
+            call.error = e
+            future.set_exception(e)
+        else:
+            future.set_result(None)
+
+    def _release_tail(self, table_key, future):
+        with self._lock:
+            if self._tails.get(table_key) is future:
+                del self._tails[table_key]
+
+    @staticmethod
+    def _raise_for_failures(futures):
+        for future in futures:
+            exception = future.exception()
+            if exception is not None:
+                raise exception
+
+    def close(self):
+        """
+        Shuts the worker pool down once all submitted chunks are posted
+        """
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class BufferedTable:
+    """
+    Collects rows for a single push dataset table from any number of producer threads and posts them in large
+    chunks through Datasets.post_payload.
+
+    The buffer is flushed as soon as it holds max_rows rows or max_bytes bytes of json, or its oldest row has waited
+    max_latency seconds. Flushes are posted by a pool of max_pending_flushes threads; a producer filling the buffer
+    while that many flushes are outstanding blocks until one of them completes. Concurrent flushes may complete out
+    of order, so set max_pending_flushes to 1 if rows must arrive in the order they were added.
+
+    An error raised by a flush is raised again by the next call to add, add_rows, flush or close.
+    """
+    default_max_latency = 1.0
+    default_max_pending_flushes = 2
+
+    def __init__(self, datasets, dataset_id, table_name, group_id=None, max_rows=None, max_bytes=None,
+                 max_latency=None, max_pending_flushes=None):
+        """
+        Constructs a buffered table
+
+        :param datasets: The Datasets operations module to post the rows with, e.g. client.datasets
+        :param dataset_id: The id of the dataset to post rows to
+        :param table_name: The name of the table to post rows to
+        :param group_id: The optional id of the group to post rows to
+        :param max_rows: The number of rows that triggers a flush; defaults to, and is capped at, 10000
+        :param max_bytes: The json size in bytes that triggers a flush; defaults to 8 MiB
+        :param max_latency: The seconds after which a row is flushed at the latest; defaults to 1
+        :param max_pending_flushes: The number of flushes posted concurrently before producers block; defaults to 2
+        """
+        if max_rows is None or max_rows > RowIngestor.max_rows_per_request:
+            max_rows = RowIngestor.max_rows_per_request
+
+        if max_bytes is None:
+            max_bytes = RowIngestor.default_max_bytes_per_request
+
+        if max_latency is None:
+            max_latency = self.default_max_latency
+
+        if max_pending_flushes is None:
+            max_pending_flushes = self.default_max_pending_flushes
+
+        self.datasets = datasets
+        self.dataset_id = dataset_id
+        self.table_name = table_name
+        self.group_id = group_id
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.max_latency = max_latency
+        self.max_pending_flushes = max_pending_flushes
+        self.payload_encoder = PayloadEncoder()
+
+        self.rows_posted = 0
+        self.flushes = 0
+
+        self._rows = []
+        self._bytes = self.payload_encoder.wrapper_size()
+        # monotonic time the oldest buffered row was added at
+        self._oldest = None
+        self._pending = set()
+        # the number of chunks taken from the buffer but not submitted yet, which flush() waits for as well
+        self._taken = 0
+        self._error = None
+        self._closed = False
+
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._flush_slots = threading.BoundedSemaphore(max_pending_flushes)
+        self._executor = ThreadPoolExecutor(max_workers=max_pending_flushes)
+
+        self._timer = threading.Thread(target=self._run_timer, name=f'BufferedTable {table_name}', daemon=True)
+        self._timer.start()
+
+    @property
+    def buffered(self):
+        """
+        The number of rows waiting to be flushed
+        """
+        with self._lock:
+            return len(self._rows)
+
+    def add(self, row):
+        """
+        Adds a single row
+        :param row: A Row object or dict
+        """
+        self.add_rows([row])
+
+    def add_rows(self, rows):
+        """
+        Adds rows, flushing the buffer whenever it is full
+        :param rows: Any rows accepted by Datasets.post_rows
+        """
+        self._raise_error()
+
+        # rows are encoded by the producers, outside of the lock
+        for encoded_row in self.payload_encoder.iter_encoded_rows(rows):
+            row_bytes = len(encoded_row) + 1
+            chunks = []
+
+            with self._condition:
+                if self._closed:
+                    raise ValueError(f'Cannot add rows to the closed buffer of table {self.table_name}')
+
+                # a row that would not fit in the request any more starts the next one
+                if self._rows and self._bytes + row_bytes > self.max_bytes:
+                    chunks.append(self._take_rows())
+
+                if not self._rows:
+                    self._oldest = time.monotonic()
+                    # wake the timer up to watch the new oldest row
+                    self._condition.notify_all()
+
+                self._rows.append(encoded_row)
+                self._bytes += row_bytes
+
+                # a full buffer is sent at once rather than when the next row arrives
+                if len(self._rows) >= self.max_rows:
+                    chunks.append(self._take_rows())
+
+            for chunk in chunks:
+                self._submit(chunk)
+
+    def flush(self):
+        """
+        Posts the buffered rows and blocks until every outstanding flush has completed
+        """
+        with self._lock:
+            chunk = self._take_rows()
+
+        if chunk:
+            self._submit(chunk)
+
+        with self._condition:
+            # chunks taken by the timer or a producer are submitted soon, their futures are waited for too
+            self._condition.wait_for(lambda: not self._taken)
+            pending = set(self._pending)
+
+        wait(pending)
+        self._raise_error()
+
+    def close(self):
+        """
+        Flushes the remaining rows and stops the background threads
+        """
+        try:
+            self.flush()
+        finally:
+            with self._condition:
+                self._closed = True
+                self._condition.notify_all()
+
+            self._timer.join()
+            self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _take_rows(self):
+        # called with the lock held
+        chunk = self._rows
+        self._rows = []
+        self._bytes = self.payload_encoder.wrapper_size()
+        self._oldest = None
+
+        if chunk:
+            self._taken += 1
+
+        return chunk
+
+    def _submit(self, chunk):
+        # blocks the producer while max_pending_flushes flushes are outstanding
+        try:
+            self._flush_slots.acquire()
+
+            try:
+                future = self._executor.submit(self._post_chunk, chunk)
+            except BaseException:
+                self._flush_slots.release()
+                raise
+        except BaseException:
+            with self._condition:
+                self._taken -= 1
+                self._condition.notify_all()
+            raise
+
+        with self._condition:
+            self._pending.add(future)
+            self._taken -= 1
+            self._condition.notify_all()
+
+        future.add_done_callback(self._flush_done)
+
+    def _post_chunk(self, chunk):
+        try:
+            self.datasets.post_payload(self.dataset_id, self.table_name, self.payload_encoder.join(chunk),
+                                       self.group_id)
+        except Exception as e:
+            # recorded before the future completes, so flush() sees it once its wait returns
+            with self._lock:
+                if self._error is None:
+                    self._error = e
+            raise
+        finally:
+            self._flush_slots.release()
+
+        with self._lock:
+            self.rows_posted += len(chunk)
+            self.flushes += 1
+
+    def _flush_done(self, future):
+        with self._lock:
+            self._pending.discard(future)
+
+    def _raise_error(self):
+        with self._lock:
+            error = self._error
+            self._error = None
+
+        if error is not None:
+            raise error
+
+    def _run_timer(self):
+        while True:
+            with self._condition:
+                if self._closed:
+                    return
+
+                if self._oldest is None:
+                    self._condition.wait()
+                    continue
+
+                remaining = self._oldest + self.max_latency - time.monotonic()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+
+                chunk = self._take_rows()
+
+            self._submit(chunk)
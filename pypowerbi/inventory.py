@@ -0,0 +1,572 @@
+# -*- coding: future_fstrings -*-
+import os
+import json
+import zlib
+import hashlib
+import datetime
+import collections
+
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class InventorySnapshot:
+    """
+    A normalized inventory of the workspaces, reports, datasets and principals of a tenant, and of the access rights
+    the principals hold on them.
+
+    Items are stored once, as plain dicts keyed by their id, reports and datasets holding the id of their workspace,
+    and principals are stored once however many items they have access to. The snapshot is indexed by workspace,
+    by dataset and by principal, so the reports of a dataset or everything a user has access to is found without a
+    scan.
+    """
+    workspace_type = 'workspace'
+    report_type = 'report'
+    dataset_type = 'dataset'
+    item_types = (workspace_type, report_type, dataset_type)
+
+    workspace_id_key = 'workspaceId'
+
+    # the version of the saved format, see save
+    format_version = 1
+
+    def __init__(self, taken_at=None):
+        """
+        Constructs an empty snapshot
+        :param taken_at: The UTC datetime the snapshot was taken at; defaults to now
+        """
+        if taken_at is None:
+            taken_at = datetime.datetime.now(datetime.timezone.utc)
+
+        self.taken_at = taken_at
+        self.workspaces = {}
+        self.reports = {}
+        self.datasets = {}
+        self.principals = {}
+        # item type to item id to principal identifier to access right
+        self.access = {item_type: {} for item_type in self.item_types}
+        # (item type, item id, error message) of the items that could not be fetched
+        self.errors = []
+        # workspace id to the fingerprint of the workspace as listed, see workspace_fingerprint
+        self.fingerprints = {}
+
+        self._reports_by_workspace = collections.defaultdict(list)
+        self._datasets_by_workspace = collections.defaultdict(list)
+        self._reports_by_dataset = collections.defaultdict(list)
+        self._access_by_principal = collections.defaultdict(dict)
+
+    def __repr__(self):
+        return f'<InventorySnapshot {self.taken_at.isoformat()}: {len(self.workspaces)} workspaces, ' \
+               f'{len(self.reports)} reports, {len(self.datasets)} datasets, {len(self.principals)} principals>'
+
+    @staticmethod
+    def workspace_record(group):
+        """
+        :param group: A Group
+        :return: The normalized record of the group
+        """
+        return {
+            'id': group.id,
+            'name': group.name,
+            'isReadOnly': group.is_readonly,
+            'isOnDedicatedCapacity': group.is_on_dedicated_capacity,
+            'capacityId': group.capacity_id,
+            'type': group.type,
+            'state': group.state,
+        }
+
+    @classmethod
+    def report_record(cls, report, workspace_id):
+        """
+        :param report: A Report
+        :param workspace_id: The id of the workspace holding the report
+        :return: The normalized record of the report
+        """
+        return {
+            'id': report.id,
+            'name': report.name,
+            'datasetId': report.dataset_id,
+            'webUrl': report.web_url,
+            cls.workspace_id_key: workspace_id,
+        }
+
+    @classmethod
+    def dataset_record(cls, dataset, workspace_id):
+        """
+        :param dataset: A Dataset
+        :param workspace_id: The id of the workspace holding the dataset
+        :return: The normalized record of the dataset
+        """
+        return {
+            'id': dataset.id,
+            'name': dataset.name,
+            'configuredBy': dataset.configured_by,
+            'isRefreshable': dataset.is_refreshable,
+            cls.workspace_id_key: workspace_id,
+        }
+
+    @staticmethod
+    def principal_record(user):
+        """
+        :param user: A GroupUser, ReportUser or DatasetUser
+        :return: The normalized record of the principal
+        """
+        return {
+            'identifier': user.identifier,
+            'displayName': user.display_name,
+            'emailAddress': user.email_address or None,
+            'principalType': user.principal_type,
+        }
+
+    @staticmethod
+    def access_right(user):
+        """
+        :param user: A GroupUser, ReportUser or DatasetUser
+        :return: The access right the user holds
+        """
+        for name in ('group_user_access_right', 'report_user_access_right', 'dataset_user_access_right'):
+            if hasattr(user, name):
+                return getattr(user, name)
+
+        raise TypeError(f'{type(user).__name__} is not a group, report or dataset user')
+
+    def add_workspace(self, record):
+        """
+        Adds a workspace record; a workspace already in the snapshot is replaced
+        """
+        self.workspaces[record['id']] = record
+
+    def add_report(self, record):
+        """
+        Adds a report record; a report already in the snapshot is kept, so a report listed twice is indexed once
+        :return: True if the report was added
+        """
+        if record['id'] in self.reports:
+            return False
+
+        self.reports[record['id']] = record
+        self._reports_by_workspace[record[self.workspace_id_key]].append(record['id'])
+        if record.get('datasetId') is not None:
+            self._reports_by_dataset[record['datasetId']].append(record['id'])
+
+        return True
+
+    def add_dataset(self, record):
+        """
+        Adds a dataset record; a dataset already in the snapshot is kept
+        :return: True if the dataset was added
+        """
+        if record['id'] in self.datasets:
+            return False
+
+        self.datasets[record['id']] = record
+        self._datasets_by_workspace[record[self.workspace_id_key]].append(record['id'])
+
+        return True
+
+    def add_access(self, item_type, item_id, users):
+        """
+        Records the principals with access to an item
+        :param item_type: One of item_types
+        :param item_id: The id of the item
+        :param users: The GroupUsers, ReportUsers or DatasetUsers of the item
+        """
+        self.access[item_type].setdefault(item_id, {})
+
+        for user in users:
+            self.add_right(item_type, item_id, self.principal_record(user), self.access_right(user))
+
+    def add_right(self, item_type, item_id, principal, right):
+        """
+        Records the access right of a principal on an item
+        :param item_type: One of item_types
+        :param item_id: The id of the item
+        :param principal: The principal record; a principal already in the snapshot is kept
+        :param right: The access right
+        """
+        identifier = principal['identifier']
+        if identifier not in self.principals:
+            self.principals[identifier] = principal
+
+        self.access[item_type].setdefault(item_id, {})[identifier] = right
+        self._access_by_principal[identifier][(item_type, item_id)] = right
+
+    @staticmethod
+    def workspace_fingerprint(workspace, users, reports, datasets):
+        """
+        Fingerprints a workspace as listed, so a later scan can tell whether anything in it changed
+        :param workspace: The workspace record
+        :param users: The (principal record, access right) tuples of the workspace's users
+        :param reports: The report records of the workspace
+        :param datasets: The dataset records of the workspace
+        :return: The hex digest of the fingerprint
+        """
+        state = [
+            workspace,
+            sorted(([principal, right] for principal, right in users), key=lambda x: x[0]['identifier']),
+            sorted(reports, key=lambda x: x['id']),
+            sorted(datasets, key=lambda x: x['id']),
+        ]
+
+        return hashlib.sha1(json.dumps(state, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def to_dict(self):
+        """
+        :return: The snapshot as a json serializable dict; principals are stored once, in a list the access rights
+        refer to by position
+        """
+        principal_ids = list(self.principals)
+        positions = {identifier: position for position, identifier in enumerate(principal_ids)}
+
+        return {
+            'version': self.format_version,
+            'takenAt': self.taken_at.isoformat(),
+            'workspaces': list(self.workspaces.values()),
+            'reports': list(self.reports.values()),
+            'datasets': list(self.datasets.values()),
+            'principals': [self.principals[x] for x in principal_ids],
+            'access': {
+                item_type: {item_id: [[positions[identifier], right] for identifier, right in rights.items()]
+                            for item_id, rights in items.items()}
+                for item_type, items in self.access.items()
+            },
+            'fingerprints': self.fingerprints,
+            'errors': [list(x) for x in self.errors],
+        }
+
+    @classmethod
+    def from_dict(cls, dictionary):
+        """
+        Creates a snapshot from a dict created by to_dict, rebuilding its indexes
+        """
+        if dictionary.get('version') != cls.format_version:
+            raise ValueError(f'Unsupported inventory snapshot version {dictionary.get("version")}')
+
+        snapshot = cls(datetime.datetime.fromisoformat(dictionary['takenAt']))
+
+        for record in dictionary['workspaces']:
+            snapshot.add_workspace(record)
+        for record in dictionary['reports']:
+            snapshot.add_report(record)
+        for record in dictionary['datasets']:
+            snapshot.add_dataset(record)
+
+        principals = dictionary['principals']
+        for item_type, items in dictionary['access'].items():
+            for item_id, rights in items.items():
+                snapshot.access[item_type].setdefault(item_id, {})
+                for position, right in rights:
+                    snapshot.add_right(item_type, item_id, principals[position], right)
+
+        snapshot.fingerprints = dict(dictionary['fingerprints'])
+        snapshot.errors = [tuple(x) for x in dictionary['errors']]
+
+        return snapshot
+
+    def save(self, path):
+        """
+        Saves the snapshot as zlib compressed json, replacing the file atomically
+        :param path: The path of the file
+        """
+        data = zlib.compress(json.dumps(self.to_dict(), separators=(',', ':')).encode('utf-8'))
+
+        # write to a temporary file, then swap it in, so a crash never leaves a torn snapshot
+        temp_path = f'{path}.tmp'
+        with open(temp_path, 'wb') as snapshot_file:
+            snapshot_file.write(data)
+            snapshot_file.flush()
+            os.fsync(snapshot_file.fileno())
+
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loads a snapshot saved by save
+        :param path: The path of the file
+        :return: The snapshot
+        """
+        with open(path, 'rb') as snapshot_file:
+            return cls.from_dict(json.loads(zlib.decompress(snapshot_file.read())))
+
+    def diff(self, previous):
+        """
+        Computes what changed since an earlier snapshot
+        :param previous: The earlier snapshot
+        :return: The InventoryDiff
+        """
+        return InventoryDiff(previous, self)
+
+    def workspace_reports(self, workspace_id):
+        """
+        :return: The report records of a workspace
+        """
+        return [self.reports[x] for x in self._reports_by_workspace.get(workspace_id, ())]
+
+    def workspace_datasets(self, workspace_id):
+        """
+        :return: The dataset records of a workspace
+        """
+        return [self.datasets[x] for x in self._datasets_by_workspace.get(workspace_id, ())]
+
+    def dataset_reports(self, dataset_id):
+        """
+        :return: The report records bound to a dataset, in any workspace
+        """
+        return [self.reports[x] for x in self._reports_by_dataset.get(dataset_id, ())]
+
+    def item_access(self, item_type, item_id):
+        """
+        :return: A dict of the identifier of each principal with access to an item to its access right
+        """
+        return dict(self.access[item_type].get(item_id, {}))
+
+    def principal_access(self, identifier):
+        """
+        :return: A dict of (item type, item id) of each item a principal has access to, to its access right
+        """
+        return dict(self._access_by_principal.get(identifier, {}))
+
+
+class InventoryDiff:
+    """
+    The changes between two InventorySnapshots.
+
+    For workspaces, reports, datasets and principals, added and removed hold the records of the items only in the
+    current or only in the previous snapshot, and modified maps the id of each item in both to a dict of each field
+    that changed to its (previous, current) values. Access rights are keyed by (item type, item id, principal
+    identifier): added and removed map them to their right, modified to the (previous, current) rights.
+    """
+    record_collections = ('workspaces', 'reports', 'datasets', 'principals')
+
+    def __init__(self, previous, current):
+        self.previous = previous
+        self.current = current
+
+        for name in self.record_collections:
+            added, removed, modified = self._diff_records(getattr(previous, name), getattr(current, name))
+            setattr(self, name, {'added': added, 'removed': removed, 'modified': modified})
+
+        previous_access = self._flatten_access(previous)
+        current_access = self._flatten_access(current)
+        self.access = {
+            'added': {key: right for key, right in current_access.items() if key not in previous_access},
+            'removed': {key: right for key, right in previous_access.items() if key not in current_access},
+            'modified': {key: (previous_access[key], right) for key, right in current_access.items()
+                         if key in previous_access and previous_access[key] != right},
+        }
+
+    def __repr__(self):
+        counts = ', '.join(f'{name} +{len(changes["added"])} -{len(changes["removed"])} ~{len(changes["modified"])}'
+                           for name, changes in self._changes())
+        return f'<InventoryDiff {counts}>'
+
+    @property
+    def is_empty(self):
+        """
+        True if nothing changed
+        """
+        return not any(changes for _, kinds in self._changes() for changes in kinds.values())
+
+    def _changes(self):
+        return [(name, getattr(self, name)) for name in self.record_collections + ('access',)]
+
+    @staticmethod
+    def _diff_records(previous, current):
+        added = [record for item_id, record in current.items() if item_id not in previous]
+        removed = [record for item_id, record in previous.items() if item_id not in current]
+
+        modified = {}
+        for item_id, record in current.items():
+            previous_record = previous.get(item_id)
+            if previous_record is None or previous_record == record:
+                continue
+
+            modified[item_id] = {key: (previous_record.get(key), record.get(key))
+                                 for key in set(previous_record) | set(record)
+                                 if previous_record.get(key) != record.get(key)}
+
+        return added, removed, modified
+
+    @staticmethod
+    def _flatten_access(snapshot):
+        return {(item_type, item_id, identifier): right
+                for item_type, items in snapshot.access.items()
+                for item_id, rights in items.items()
+                for identifier, right in rights.items()}
+
+
+class InventoryScanner:
+    """
+    Builds an InventorySnapshot of a tenant through the Admin operations module.
+
+    Workspaces are listed with their users, reports and datasets expanded, so the listing takes one request per page
+    of workspaces instead of three requests per workspace. The users of every report and dataset are then fetched
+    concurrently by a bounded pool of worker threads, starting while the workspaces are still being listed, and each
+    report or dataset is fetched once, however many workspaces list it. Requests still wait for the client's
+    RateLimiter and are retried by its RetryPolicy, so the pool only fills the time spent waiting on the network;
+    construct the client with rate_limiter=RateLimiter.powerbi_defaults() to stay within the admin API limits.
+
+    Items whose users could not be fetched are recorded in the snapshot's errors instead of failing the scan.
+
+    rescan() takes an earlier snapshot and only fetches the report and dataset users of workspaces whose
+    fingerprint, the workspace as listed with its users, reports and datasets, changed since; the other workspaces
+    are carried over from the earlier snapshot. Users added to a report or dataset directly, without any change to
+    its workspace, are only picked up by a full scan.
+    """
+    default_max_workers = 8
+    expand_str = 'users,reports,datasets'
+
+    def __init__(self, admin, max_workers=None, expand=True, include_item_users=True):
+        """
+        Constructs an inventory scanner
+
+        :param admin: The Admin operations module to scan with, e.g. client.admin
+        :param max_workers: The number of requests made concurrently; defaults to 8
+        :param expand: If True, workspaces are listed with their users, reports and datasets expanded; if False, they
+        are fetched per workspace with get_group_users, get_reports and get_datasets
+        :param include_item_users: If True, the users of every report and dataset are fetched too
+        """
+        if max_workers is None:
+            max_workers = self.default_max_workers
+
+        self.admin = admin
+        self.max_workers = max_workers
+        self.expand = expand
+        self.include_item_users = include_item_users
+
+    def scan(self, filter=None):
+        """
+        Scans the workspaces of the tenant
+        :param filter: Optional OData filter string of the workspaces to scan
+        :return: The InventorySnapshot
+        """
+        return self.scan_groups(self._iter_groups(filter))
+
+    def rescan(self, previous, filter=None):
+        """
+        Scans the workspaces of the tenant, refetching only the workspaces that changed since an earlier scan
+        :param previous: The InventorySnapshot of the earlier scan, e.g. loaded with InventorySnapshot.load
+        :param filter: Optional OData filter string of the workspaces to scan; workspaces it leaves out are removed
+        :return: The InventorySnapshot
+        """
+        return self.scan_groups(self._iter_groups(filter), previous=previous)
+
+    def scan_groups(self, groups, snapshot=None, previous=None):
+        """
+        Scans the given workspaces
+        :param groups: An iterable of Groups, with their users, reports and datasets expanded if the scanner expands
+        :param snapshot: An optional snapshot to add the workspaces to; a new one by default
+        :param previous: An optional earlier snapshot to carry unchanged workspaces over from
+        :return: The InventorySnapshot
+        """
+        if snapshot is None:
+            snapshot = InventorySnapshot()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = {}
+
+            try:
+                for group in groups:
+                    snapshot.add_workspace(InventorySnapshot.workspace_record(group))
+
+                    if self.expand:
+                        self._add_group_items(executor, pending, snapshot, previous, group.id, group.users,
+                                              group.reports, group.datasets)
+                    else:
+                        future = executor.submit(self._fetch_group_items, group.id)
+                        pending[future] = (InventorySnapshot.workspace_type, group.id)
+
+                    # keep the pool busy without queueing a request for every item of a large tenant up front
+                    while len(pending) >= self.max_workers * 4:
+                        self._collect(executor, pending, snapshot, previous)
+
+                while pending:
+                    self._collect(executor, pending, snapshot, previous)
+            finally:
+                for future in pending:
+                    future.cancel()
+
+        # a workspace with items that failed is fetched again by the next rescan
+        for item_type, item_id, _ in snapshot.errors:
+            snapshot.fingerprints.pop(self._workspace_of(snapshot, item_type, item_id), None)
+
+        return snapshot
+
+    def _iter_groups(self, filter):
+        if self.expand:
+            return self.admin.iter_groups(expand=self.expand_str, filter=filter)
+
+        return self.admin.iter_groups(filter=filter)
+
+    def _fetch_group_items(self, group_id):
+        return (self.admin.get_group_users(group_id), self.admin.get_reports(group_id),
+                self.admin.get_datasets(group_id))
+
+    @staticmethod
+    def _workspace_of(snapshot, item_type, item_id):
+        if item_type == InventorySnapshot.report_type:
+            return snapshot.reports[item_id][InventorySnapshot.workspace_id_key]
+
+        if item_type == InventorySnapshot.dataset_type:
+            return snapshot.datasets[item_id][InventorySnapshot.workspace_id_key]
+
+        return item_id
+
+    def _add_group_items(self, executor, pending, snapshot, previous, group_id, users, reports, datasets):
+        # called on the scanning thread only, so the snapshot needs no lock
+        users = [(InventorySnapshot.principal_record(x), InventorySnapshot.access_right(x)) for x in users or ()]
+        report_records = [InventorySnapshot.report_record(x, group_id) for x in reports or ()]
+        dataset_records = [InventorySnapshot.dataset_record(x, group_id) for x in datasets or ()]
+
+        fingerprint = InventorySnapshot.workspace_fingerprint(snapshot.workspaces[group_id], users, report_records,
+                                                              dataset_records)
+        snapshot.fingerprints[group_id] = fingerprint
+
+        snapshot.access[InventorySnapshot.workspace_type].setdefault(group_id, {})
+        for principal, right in users:
+            snapshot.add_right(InventorySnapshot.workspace_type, group_id, principal, right)
+
+        # the users of the items of an unchanged workspace are carried over instead of fetched
+        unchanged = previous is not None and previous.fingerprints.get(group_id) == fingerprint
+
+        for item_type, records, add in ((InventorySnapshot.report_type, report_records, snapshot.add_report),
+                                        (InventorySnapshot.dataset_type, dataset_records, snapshot.add_dataset)):
+            for record in records:
+                if not add(record) or not self.include_item_users:
+                    continue
+
+                if unchanged:
+                    self._carry_access(snapshot, previous, item_type, record['id'])
+                else:
+                    future = executor.submit(self._fetch_item_users, item_type, record['id'])
+                    pending[future] = (item_type, record['id'])
+
+    def _fetch_item_users(self, item_type, item_id):
+        if item_type == InventorySnapshot.report_type:
+            return self.admin.get_report_users(item_id)
+
+        return self.admin.get_dataset_users(item_id)
+
+    @staticmethod
+    def _carry_access(snapshot, previous, item_type, item_id):
+        snapshot.access[item_type].setdefault(item_id, {})
+
+        for identifier, right in previous.access[item_type].get(item_id, {}).items():
+            snapshot.add_right(item_type, item_id, previous.principals[identifier], right)
+
+    def _collect(self, executor, pending, snapshot, previous):
+        done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+
+        for future in done:
+            item_type, item_id = pending.pop(future)
+
+            try:
+                result = future.result()
+            except Exception as e:
+                snapshot.errors.append((item_type, item_id, str(e)))
+                continue
+
+            if item_type == InventorySnapshot.workspace_type:
+                self._add_group_items(executor, pending, snapshot, previous, item_id, *result)
+            else:
+                snapshot.add_access(item_type, item_id, result)
@@ -0,0 +1,196 @@
+# -*- coding: future_fstrings -*-
+import copy
+import time
+import threading
+
+
+class MetadataListing:
+    """
+    A cached listing of the datasets, reports or groups of a workspace, indexed by id and by name
+    """
+    def __init__(self, items, expires_at):
+        """
+        :param items: The Dataset, Report or Group objects of the listing
+        :param expires_at: The time.monotonic() time the listing expires at
+        """
+        self.by_id = {}
+        self.by_name = {}
+        self.expires_at = expires_at
+
+        for item in items:
+            self.add(item)
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __contains__(self, item_id):
+        return str(item_id) in self.by_id
+
+    @property
+    def items(self):
+        """
+        The items of the listing, in the order they were listed or added
+        """
+        return list(self.by_id.values())
+
+    def get(self, item_id):
+        return self.by_id.get(str(item_id))
+
+    def find(self, name):
+        """
+        :return: The items named name; names are not unique within a workspace
+        """
+        return list(self.by_name.get(name, ()))
+
+    def add(self, item):
+        # an item added again replaces the one cached
+        self.remove(item.id)
+
+        self.by_id[str(item.id)] = item
+        self.by_name.setdefault(item.name, []).append(item)
+
+    def remove(self, item_id):
+        item = self.by_id.pop(str(item_id), None)
+        if item is None:
+            return None
+
+        named = self.by_name[item.name]
+        named.remove(item)
+        if not named:
+            del self.by_name[item.name]
+
+        return item
+
+
+class MetadataCache:
+    """
+    Client-level cache of the datasets, reports and groups listed by the Datasets, Reports and Groups operation
+    modules.
+
+    Each listing call stores its result as a MetadataListing of the kind and workspace listed, so existence checks,
+    counts and lookups by id or name, including the ones that find nothing, are answered from dict indexes until the
+    listing expires, instead of listing the workspace again. Calls that create, delete or change an item update the
+    cached listings in place; items created or deleted outside the client are seen once the listing expires, when
+    the lookup is made with refresh=True, or after invalidate().
+
+    The items handed out are the cached objects, shared by every caller: treat them as read-only. Changes made
+    through the operation modules replace a cached item by an updated copy, so items returned earlier don't change.
+    """
+    datasets_kind = 'datasets'
+    reports_kind = 'reports'
+    groups_kind = 'groups'
+
+    # the group_id of invalidate() matching every workspace; None is the user's workspace
+    all_groups = object()
+
+    default_ttl = 60.0
+
+    def __init__(self, ttl=None):
+        """
+        Constructs a metadata cache
+
+        :param ttl: The seconds a listing is used for before it is fetched again; defaults to 60, 0 disables the cache
+        """
+        if ttl is None:
+            ttl = self.default_ttl
+
+        self.ttl = ttl
+
+        # listings by (kind, group id); the group id of the user's workspace is None
+        self._listings = {}
+        self._lock = threading.Lock()
+
+    def get(self, kind, group_id=None):
+        """
+        :param kind: One of datasets_kind, reports_kind or groups_kind
+        :param group_id: The optional id of the workspace listed
+        :return: The cached MetadataListing, None if there is none or it expired
+        """
+        with self._lock:
+            listing = self._listings.get((kind, group_id))
+            if listing is None:
+                return None
+
+            if listing.expires_at <= time.monotonic():
+                del self._listings[(kind, group_id)]
+                return None
+
+            return listing
+
+    def put(self, kind, group_id, items):
+        """
+        Caches a listing, replacing any listing of the same kind and workspace
+        :param kind: One of datasets_kind, reports_kind or groups_kind
+        :param group_id: The optional id of the workspace listed
+        :param items: All items of the workspace
+        :return: The MetadataListing
+        """
+        listing = MetadataListing(items, time.monotonic() + self.ttl)
+
+        if self.ttl > 0:
+            with self._lock:
+                self._listings[(kind, group_id)] = listing
+
+        return listing
+
+    @staticmethod
+    def unique(kind, name, items):
+        """
+        :param kind: The kind of the items, for the error message
+        :param name: The name the items were found by, for the error message
+        :param items: The items found by a name
+        :return: The only item, None if there are none
+        """
+        if not items:
+            return None
+
+        if len(items) > 1:
+            raise ValueError(f'{len(items)} {kind} are named {name!r}: {", ".join(str(x.id) for x in items)}')
+
+        return items[0]
+
+    def add(self, kind, group_id, item):
+        """
+        Adds a created item to the cached listing of its workspace, if that listing is cached
+        """
+        with self._lock:
+            listing = self._listings.get((kind, group_id))
+            if listing is not None:
+                listing.add(item)
+
+    def remove(self, kind, group_id, item_id):
+        """
+        Removes a deleted item from the cached listing of its workspace, if that listing is cached
+        """
+        with self._lock:
+            listing = self._listings.get((kind, group_id))
+            if listing is not None:
+                listing.remove(item_id)
+
+    def update(self, kind, group_id, item_id, **attributes):
+        """
+        Sets attributes of a cached item; the item is replaced by an updated copy, so items returned earlier by
+        listing calls don't change
+        """
+        with self._lock:
+            listing = self._listings.get((kind, group_id))
+            item = listing.get(item_id) if listing is not None else None
+            if item is None:
+                return
+
+            item = copy.copy(item)
+            for name, value in attributes.items():
+                setattr(item, name, value)
+            listing.add(item)
+
+    def invalidate(self, kind=None, group_id=all_groups):
+        """
+        Drops cached listings
+        :param kind: The optional kind of the listings to drop; all kinds if None
+        :param group_id: The id of the workspace of the listings to drop, None for the user's workspace; all
+        workspaces, including the user's workspace, if all_groups
+        """
+        with self._lock:
+            for key in list(self._listings):
+                if (kind is None or key[0] == kind) and (group_id is self.all_groups or key[1] == group_id):
+                    del self._listings[key]
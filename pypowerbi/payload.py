@@ -0,0 +1,169 @@
+# -*- coding: future_fstrings -*-
+import io
+import json
+import math
+import decimal
+import datetime
+import threading
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from .dataset import Row
+from .columnar import is_columnar, columns_from_columnar, iter_row_dicts
+
+
+def _encode_default(o):
+    """
+    Encodes the values the json backends do not handle themselves
+    """
+    if isinstance(o, (datetime.datetime, datetime.date, datetime.time)):
+        # pandas' NaT is a datetime but not equal to itself
+        if o != o:
+            return None
+        return o.isoformat()
+
+    if isinstance(o, decimal.Decimal):
+        return float(o) if o.is_finite() else None
+
+    if isinstance(o, Row):
+        return o.__dict__
+
+    # numpy scalars
+    item = getattr(o, 'item', None)
+    if callable(item):
+        return item()
+
+    raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+
+def _sanitize(value):
+    """
+    Replaces the NaN and infinite values of a row, which have no json representation, with None
+    """
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+
+    if isinstance(value, dict):
+        return {k: _sanitize(v) for k, v in value.items()}
+
+    if isinstance(value, (list, tuple)):
+        return [_sanitize(v) for v in value]
+
+    if isinstance(value, decimal.Decimal) or getattr(value, 'item', None) is not None:
+        return _sanitize(_encode_default(value))
+
+    return value
+
+
+class PayloadEncoder:
+    """
+    Encodes push-row request bodies, {"rows":[...]}, straight to utf-8 json.
+
+    Rows are encoded one by one and written into a buffer kept per thread and reused between payloads, so a payload
+    is built as bytes, without the list of dicts and the json string in between. The payload returned is a copy of
+    the buffer, which is overwritten by the next payload of the thread. datetimes are written in iso format,
+    decimals as numbers and NaN, infinite or NaT values as null. orjson is used when it is installed.
+    """
+    content_type = 'application/json'
+
+    _prefix = b'{"rows":['
+    _suffix = b']}'
+    _separator = b','
+
+    def __init__(self, use_orjson=None):
+        """
+        Constructs a payload encoder
+
+        :param use_orjson: Whether to encode with orjson; defaults to True if orjson is installed
+        """
+        if use_orjson is None:
+            use_orjson = orjson is not None
+        elif use_orjson and orjson is None:
+            raise ImportError('orjson is not installed, install it with: pip install orjson')
+
+        self.use_orjson = use_orjson
+
+        # compact separators, and NaN raises so that only rows holding it take the slower sanitizing path
+        self._json_encoder = json.JSONEncoder(default=_encode_default, allow_nan=False, ensure_ascii=False,
+                                              separators=(',', ':'))
+        self._local = threading.local()
+
+    @classmethod
+    def wrapper_size(cls):
+        """
+        :return: The size in bytes of the {"rows":[]} wrapper around the rows of a payload
+        """
+        return len(cls._prefix) + len(cls._suffix)
+
+    def encode_row(self, row):
+        """
+        Encodes a single row dict, or any other json value
+        :param row: The row dict
+        :return: The utf-8 json of the row
+        """
+        if self.use_orjson:
+            # orjson writes NaN as null and datetimes in iso format itself
+            return orjson.dumps(row, default=_encode_default, option=orjson.OPT_SERIALIZE_NUMPY)
+
+        try:
+            return self._json_encoder.encode(row).encode('utf-8')
+        except ValueError:
+            return self._json_encoder.encode(_sanitize(row)).encode('utf-8')
+
+    def iter_encoded_rows(self, rows):
+        """
+        Encodes rows one by one
+        :param rows: Any rows accepted by Datasets.post_rows
+        :return: A generator of the utf-8 json of each row
+        """
+        if is_columnar(rows):
+            yield from self._iter_encoded_columns(*columns_from_columnar(rows))
+            return
+
+        for row in iter_row_dicts(rows):
+            yield self.encode_row(row)
+
+    def _iter_encoded_columns(self, names, columns):
+        # each row is written from the json of its values, the json of the column names is built once
+        keys = [self.encode_row(str(name)) + b':' for name in names]
+        keys = [b'{' + key if index == 0 else b',' + key for index, key in enumerate(keys)]
+        encode_row = self.encode_row
+
+        for values in zip(*columns):
+            yield b''.join([key + encode_row(value) for key, value in zip(keys, values)]) + b'}'
+
+    def join(self, encoded_rows):
+        """
+        Builds a payload from encoded rows
+        :param encoded_rows: An iterable of the utf-8 json of rows, e.g. from iter_encoded_rows
+        :return: The payload bytes, a copy of the reused buffer that stays valid after the next payload is built
+        """
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            buffer = io.BytesIO()
+            self._local.buffer = buffer
+
+        buffer.seek(0)
+        buffer.truncate()
+
+        buffer.write(self._prefix)
+        first = True
+        for encoded_row in encoded_rows:
+            if not first:
+                buffer.write(self._separator)
+            buffer.write(encoded_row)
+            first = False
+        buffer.write(self._suffix)
+
+        return buffer.getvalue()
+
+    def encode(self, rows):
+        """
+        Encodes a push-row request body
+        :param rows: Any rows accepted by Datasets.post_rows
+        :return: The payload bytes
+        """
+        return self.join(self.iter_encoded_rows(rows))
@@ -0,0 +1,199 @@
+# -*- coding: future_fstrings -*-
+import re
+import time
+import threading
+import urllib.parse
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket allowing rate requests per period, with bursts of up to burst requests.
+
+    Tokens are handed out by reservation: a caller that finds the bucket empty still takes a token and is told how
+    long to wait for it, so waiting callers queue up in the order they arrived instead of being rejected.
+    """
+    def __init__(self, rate, per=1.0, burst=None):
+        """
+        Constructs a token bucket
+
+        :param rate: The number of requests allowed per period
+        :param per: The length of the period in seconds
+        :param burst: The number of requests that may be made at once; defaults to rate
+        """
+        if rate <= 0 or per <= 0:
+            raise ValueError('TokenBucket rate and period must be positive')
+
+        if burst is None:
+            burst = rate
+
+        self.rate = rate
+        self.per = per
+        self.burst = burst
+
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def fill_rate(self):
+        """
+        The number of tokens added per second
+        """
+        return self.rate / self.per
+
+    def reserve(self, tokens=1):
+        """
+        Takes tokens from the bucket
+        :param tokens: The number of tokens to take
+        :return: The number of seconds the caller has to wait before the tokens may be used
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.fill_rate)
+            self._updated = now
+            self._tokens -= tokens
+
+            if self._tokens >= 0:
+                return 0.0
+
+            return -self._tokens / self.fill_rate
+
+    def __repr__(self):
+        return f'<TokenBucket {self.rate}/{self.per}s burst={self.burst}>'
+
+
+class RateBudget:
+    """
+    A named token bucket applied to the requests whose url path matches a pattern
+    """
+    def __init__(self, name, bucket, pattern=None):
+        """
+        Constructs a rate budget
+
+        :param name: The name of the budget
+        :param bucket: The TokenBucket requests are taken from
+        :param pattern: The optional regular expression searched for in the url path; None matches every request
+        """
+        self.name = name
+        self.bucket = bucket
+        self.pattern = re.compile(pattern) if isinstance(pattern, str) else pattern
+
+    def matches(self, path):
+        return self.pattern is None or self.pattern.search(path) is not None
+
+    def __repr__(self):
+        return f'<RateBudget {self.name} {self.bucket}>'
+
+
+class RateLimiter:
+    """
+    Client-side rate limiter with named per-endpoint budgets.
+
+    A request takes one token from every budget matching its url and waits until all of them are available, so a
+    long sweep runs at the highest rate the service allows instead of being throttled.
+    """
+    # documented limits of the Power BI admin APIs
+    activity_events_budget = 'activityevents'
+    activity_events_pattern = r'/admin/activityevents'
+    activity_events_per_hour = 200
+
+    admin_budget = 'admin'
+    admin_pattern = r'/admin/(?!activityevents)'
+    admin_per_hour = 50
+
+    user_budget = 'user'
+
+    def __init__(self, budgets=None):
+        """
+        Constructs a rate limiter
+
+        :param budgets: The optional list of RateBudgets to enforce
+        """
+        self.budgets = list(budgets) if budgets is not None else []
+        self._waited = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def powerbi_defaults(cls, user_rate=None, user_per=60.0):
+        """
+        Creates a rate limiter enforcing the documented Power BI limits: 200 activity event requests per hour and
+        50 requests per hour to the other admin endpoints
+
+        :param user_rate: The optional number of requests per user_per seconds allowed to all endpoints together
+        :param user_per: The period of user_rate in seconds
+        :return: The rate limiter
+        """
+        rate_limiter = cls()
+        rate_limiter.add_budget(cls.activity_events_budget, cls.activity_events_per_hour, 3600.0,
+                                cls.activity_events_pattern)
+        rate_limiter.add_budget(cls.admin_budget, cls.admin_per_hour, 3600.0, cls.admin_pattern)
+
+        if user_rate is not None:
+            rate_limiter.add_budget(cls.user_budget, user_rate, user_per)
+
+        return rate_limiter
+
+    def add_budget(self, name, rate, per=1.0, pattern=None, burst=None):
+        """
+        Adds a named budget
+        :param name: The name of the budget
+        :param rate: The number of requests allowed per period
+        :param per: The length of the period in seconds
+        :param pattern: The optional regular expression searched for in the url path; None matches every request
+        :param burst: The number of requests that may be made at once; defaults to rate
+        :return: The added budget
+        """
+        budget = RateBudget(name, TokenBucket(rate, per, burst), pattern)
+        self.budgets.append(budget)
+
+        return budget
+
+    def get_budget(self, name):
+        """
+        Gets a budget by name
+        :param name: The name of the budget
+        :return: The budget, None if there is no budget with the given name
+        """
+        for budget in self.budgets:
+            if budget.name == name:
+                return budget
+
+        return None
+
+    def reserve(self, method, url):
+        """
+        Takes a token from every budget matching a request
+        :param method: The http method of the request
+        :param url: The url of the request
+        :return: The number of seconds to wait before sending the request
+        """
+        path = urllib.parse.urlsplit(url).path
+        delay = 0.0
+
+        for budget in self.budgets:
+            if budget.matches(path):
+                budget_delay = budget.bucket.reserve()
+                if budget_delay > 0:
+                    with self._lock:
+                        self._waited[budget.name] = self._waited.get(budget.name, 0.0) + budget_delay
+                delay = max(delay, budget_delay)
+
+        return delay
+
+    def acquire(self, method, url):
+        """
+        Blocks until a request may be sent
+        :param method: The http method of the request
+        :param url: The url of the request
+        """
+        delay = self.reserve(method, url)
+        if delay > 0:
+            time.sleep(delay)
+
+    @property
+    def waited(self):
+        """
+        The total number of seconds requests had to wait, by budget name
+        """
+        with self._lock:
+            return dict(self._waited)
@@ -0,0 +1,290 @@
+# -*- coding: future_fstrings -*-
+import time
+import queue
+import collections
+
+from .refresh_poller import RefreshPoller
+
+
+class DatasetRefresh:
+    """
+    The state of the refresh of a dataset run by a RefreshOrchestrator
+    """
+    pending_status = 'Pending'
+    running_status = 'Running'
+    # the final statuses of the refresh history
+    completed_status = 'Completed'
+    failed_status = 'Failed'
+    disabled_status = 'Disabled'
+    cancelled_status = 'Cancelled'
+    # the refresh did not finish within the orchestrator's refresh_timeout
+    timed_out_status = 'TimedOut'
+
+    final_statuses = (completed_status, failed_status, disabled_status, cancelled_status, timed_out_status)
+
+    def __init__(self, group_id, dataset_id, capacity_id=None):
+        self.group_id = group_id
+        self.dataset_id = dataset_id
+        self.capacity_id = capacity_id
+        self.status = self.pending_status
+        self.attempts = 0
+        # the request id returned by refresh_dataset and the UTC time the current attempt was started at
+        self.request_id = None
+        self.triggered_at = None
+        # the refresh history entry of the current attempt, once it is listed
+        self.refresh = None
+        # the error of the last failed attempt
+        self.error = None
+        # the time.monotonic() time before which the refresh is not started (again)
+        self.not_before = 0.0
+
+    @property
+    def key(self):
+        return self.group_id, self.dataset_id
+
+    @property
+    def succeeded(self):
+        return self.status == self.completed_status
+
+    @property
+    def finished(self):
+        return self.status in self.final_statuses
+
+    def __repr__(self):
+        return f'<DatasetRefresh {self.dataset_id} in {self.group_id}: {self.status} after {self.attempts} attempts>'
+
+
+class RefreshOrchestrator:
+    """
+    Refreshes many datasets, limiting the number of refreshes running at once per capacity and per workspace.
+
+    Refreshes are started through Datasets.refresh_dataset as long as the limits of their workspace and capacity
+    allow, the others wait in a queue. Running refreshes are watched by a RefreshPoller, and a refresh that failed, or
+    could not be started, is queued again until it has been attempted max_attempts times. As soon as a refresh
+    finishes, the next queued refresh its limits allow is started, so capacities stay busy without exceeding their
+    parallel refresh limit.
+
+    The capacity of each workspace is looked up in the groups listing of the client, which the client's
+    MetadataCache keeps; workspaces on shared capacity are only limited per workspace.
+    """
+    default_max_per_capacity = 5
+    default_max_per_workspace = 2
+    default_max_attempts = 3
+    default_retry_delay = 60.0
+
+    def __init__(self, client, max_per_capacity=None, max_per_workspace=None, max_attempts=None, retry_delay=None,
+                 refresh_timeout=None, capacities=None, notify_option=None, poller=None):
+        """
+        Constructs a refresh orchestrator
+
+        :param client: The PowerBIClient to refresh the datasets with
+        :param max_per_capacity: The number of refreshes running at once per capacity; defaults to 5
+        :param max_per_workspace: The number of refreshes running at once per workspace; defaults to 2
+        :param max_attempts: The number of times a refresh is attempted before it is given up; defaults to 3
+        :param retry_delay: The seconds a failed refresh waits before it is attempted again; defaults to 60
+        :param refresh_timeout: The optional seconds after which a running refresh is given up
+        :param capacities: An optional dict of group id to capacity id, or callable given a group id and returning its
+        capacity id; defaults to the capacity ids of the client's groups listing
+        :param notify_option: The optional notify_option of the refreshes, see Datasets.refresh_dataset
+        :param poller: The optional RefreshPoller to watch the refreshes with; defaults to a new poller for each run
+        """
+        if max_per_capacity is None:
+            max_per_capacity = self.default_max_per_capacity
+
+        if max_per_workspace is None:
+            max_per_workspace = self.default_max_per_workspace
+
+        if max_attempts is None:
+            max_attempts = self.default_max_attempts
+
+        if retry_delay is None:
+            retry_delay = self.default_retry_delay
+
+        self.client = client
+        self.max_per_capacity = max_per_capacity
+        self.max_per_workspace = max_per_workspace
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.refresh_timeout = refresh_timeout
+        self.capacities = capacities
+        self.notify_option = notify_option
+        self.poller = poller
+
+    def capacity_of(self, group_id):
+        """
+        :param group_id: The id of a workspace, None for the user's workspace
+        :return: The id of the capacity of the workspace, None for shared capacity
+        """
+        if group_id is None:
+            return None
+
+        if callable(self.capacities):
+            return self.capacities(group_id)
+
+        if self.capacities is not None:
+            return self.capacities.get(group_id)
+
+        group = self.client.groups.get_groups_listing().get(group_id)
+        return group.capacity_id if group is not None else None
+
+    def run(self, datasets):
+        """
+        Refreshes datasets and waits for the refreshes to finish
+        :param datasets: An iterable of (group_id, dataset_id) tuples, group_id None for the user's workspace
+        :return: An ordered dict of each (group_id, dataset_id) tuple to its DatasetRefresh
+        """
+        refreshes = collections.OrderedDict()
+        for group_id, dataset_id in datasets:
+            if (group_id, dataset_id) not in refreshes:
+                refreshes[(group_id, dataset_id)] = DatasetRefresh(group_id, dataset_id, self.capacity_of(group_id))
+
+        self.run_refreshes(list(refreshes.values()))
+
+        return refreshes
+
+    def run_refreshes(self, refreshes, ready=None, finished=None):
+        """
+        Runs refreshes until all of them are finished, e.g. for a RefreshScheduler
+        :param refreshes: The DatasetRefreshes, started in the order given as their limits allow; refreshes finished
+        before they start, e.g. cancelled by the finished callable, are dropped from the queue
+        :param ready: An optional callable given a pending DatasetRefresh and returning whether it may start; it is
+        called again when a refresh finishes or a retry delay ends
+        :param finished: An optional callable given each DatasetRefresh that finished, after its status is set
+        """
+        poller = self.poller if self.poller is not None else RefreshPoller(self.client.datasets)
+        pending = collections.deque(refreshes)
+        running = set()
+        counts = collections.Counter()
+        # (refresh, future) of the watched refreshes as they finish
+        completions = queue.Queue()
+
+        try:
+            while pending or running:
+                now = time.monotonic()
+                self._start_ready(pending, running, counts, poller, completions, now, ready, finished)
+
+                if not pending and not running:
+                    break
+
+                # wake up for the next retry of a refresh that may start then, or when a running refresh finishes;
+                # refreshes that are not ready wait for the refreshes they are waiting for
+                retry_times = [x.not_before for x in pending
+                               if x.not_before > now and (ready is None or ready(x))]
+                timeout = max(0.0, min(retry_times) - time.monotonic()) if retry_times else None
+
+                if not running and timeout is None:
+                    # nothing can make the remaining refreshes ready
+                    for refresh in pending:
+                        if refresh.finished:
+                            continue
+
+                        refresh.status = DatasetRefresh.cancelled_status
+                        refresh.error = 'Cancelled as the refresh was never ready to start'
+                        if finished is not None:
+                            finished(refresh)
+                    break
+
+                try:
+                    completion = completions.get(timeout=timeout)
+                except queue.Empty:
+                    continue
+
+                while completion is not None:
+                    self._complete(*completion, pending, running, counts, finished)
+                    try:
+                        completion = completions.get_nowait()
+                    except queue.Empty:
+                        completion = None
+        finally:
+            if poller is not self.poller:
+                poller.close()
+
+    def _limit_keys(self, refresh):
+        keys = [('workspace', refresh.group_id)]
+        if refresh.capacity_id is not None:
+            keys.append(('capacity', refresh.capacity_id))
+
+        return keys
+
+    def _has_room(self, refresh, counts):
+        for kind, key in self._limit_keys(refresh):
+            limit = self.max_per_capacity if kind == 'capacity' else self.max_per_workspace
+            if counts[(kind, key)] >= limit:
+                return False
+
+        return True
+
+    def _start_ready(self, pending, running, counts, poller, completions, now, ready, finished):
+        # refreshes whose limits are full keep their place in the queue, later ones may still start
+        for refresh in list(pending):
+            if refresh.finished:
+                # finished without starting, e.g. cancelled
+                pending.remove(refresh)
+                continue
+
+            if refresh.not_before > now or not self._has_room(refresh, counts):
+                continue
+
+            if ready is not None and not ready(refresh):
+                continue
+
+            pending.remove(refresh)
+            refresh.attempts += 1
+            refresh.refresh = None
+            refresh.triggered_at = RefreshPoller.utc_now()
+
+            try:
+                refresh.request_id = self.client.datasets.refresh_dataset(refresh.dataset_id, self.notify_option,
+                                                                          refresh.group_id)
+            except Exception as e:
+                self._failed(pending, refresh, str(e), finished=finished)
+                continue
+
+            refresh.status = DatasetRefresh.running_status
+            running.add(refresh)
+            for key in self._limit_keys(refresh):
+                counts[key] += 1
+
+            future = poller.watch(refresh.dataset_id, refresh.group_id, refresh.request_id, refresh.triggered_at,
+                                  self.refresh_timeout)
+            future.add_done_callback(lambda f, r=refresh: completions.put((r, f)))
+
+    def _complete(self, refresh, future, pending, running, counts, finished):
+        running.discard(refresh)
+        for key in self._limit_keys(refresh):
+            counts[key] -= 1
+
+        try:
+            entry = future.result()
+        except TimeoutError:
+            refresh.status = DatasetRefresh.timed_out_status
+            refresh.error = f'The refresh did not finish within {self.refresh_timeout} seconds'
+        except Exception as e:
+            # the refresh could not be watched, its outcome is unknown
+            self._failed(pending, refresh, str(e), finished=finished)
+            return
+        else:
+            refresh.refresh = entry
+            status = entry.get('status')
+
+            if status != DatasetRefresh.completed_status:
+                self._failed(pending, refresh, entry.get('serviceExceptionJson') or status, status, finished)
+                return
+
+            refresh.status = status
+            refresh.error = None
+
+        if finished is not None:
+            finished(refresh)
+
+    def _failed(self, pending, refresh, error, status=DatasetRefresh.failed_status, finished=None):
+        refresh.error = error
+
+        if refresh.attempts < self.max_attempts:
+            refresh.status = DatasetRefresh.pending_status
+            refresh.not_before = time.monotonic() + self.retry_delay
+            pending.append(refresh)
+        else:
+            refresh.status = status
+            if finished is not None:
+                finished(refresh)
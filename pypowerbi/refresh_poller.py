@@ -0,0 +1,334 @@
+# -*- coding: future_fstrings -*-
+import time
+import heapq
+import datetime
+import itertools
+import threading
+import statistics
+
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class RefreshWatch:
+    """
+    A refresh watched by a RefreshPoller
+    """
+    def __init__(self, dataset_id, group_id, request_id, triggered_at, deadline):
+        self.dataset_id = dataset_id
+        self.group_id = group_id
+        self.request_id = request_id
+        self.triggered_at = triggered_at
+        # the time.monotonic() time the watch times out at, None if it never does
+        self.deadline = deadline
+        self.future = Future()
+        # the seconds waited before the last status check
+        self.interval = None
+        # the checks that did not find the refresh in the refresh history
+        self.unlisted_checks = 0
+
+    @property
+    def key(self):
+        return self.group_id, self.dataset_id
+
+
+class RefreshPoller:
+    """
+    Waits for many in-flight dataset refreshes at once.
+
+    watch() returns a future that resolves to the refresh history entry of a refresh once it reached a final status.
+    A background thread checks the due refreshes together on a small pool of worker threads, one
+    Datasets.get_dataset_refresh_history call covering every watched refresh of a dataset that is due, or due within
+    min_interval.
+
+    The interval between checks of a refresh follows the refresh history of its dataset: the first check, which
+    reads the last few refreshes, learns the median duration of the completed ones, and the next check is made when
+    the refresh is expected to finish. Refreshes running longer than expected, and refreshes of datasets without a
+    history, are checked at growing intervals, so long refreshes cost few requests and short ones are seen finishing
+    soon after they do.
+    """
+    default_max_workers = 4
+    default_min_interval = 5.0
+    default_max_interval = 300.0
+    default_initial_interval = 15.0
+    default_backoff = 1.5
+    default_max_unlisted_checks = 60
+
+    # the refresh history entries read by each check, enough to learn the usual refresh duration
+    history_top = 10
+    # the tolerance of the comparison of the local clock with the start times of the service
+    clock_skew = datetime.timedelta(seconds=5)
+
+    final_statuses = ('Completed', 'Failed', 'Disabled', 'Cancelled')
+
+    def __init__(self, datasets, max_workers=None, min_interval=None, max_interval=None, initial_interval=None,
+                 backoff=None, max_unlisted_checks=None):
+        """
+        Constructs a refresh poller
+
+        :param datasets: The Datasets operations module to read the refresh history with, e.g. client.datasets
+        :param max_workers: The number of status checks made concurrently; defaults to 4
+        :param min_interval: The minimum seconds between checks of a refresh; defaults to 5
+        :param max_interval: The maximum seconds between checks of a refresh; defaults to 300
+        :param initial_interval: The seconds before the first check of a refresh whose usual duration is not known
+        yet; defaults to 15
+        :param backoff: The factor the interval grows by while a refresh runs longer than expected; defaults to 1.5
+        :param max_unlisted_checks: The checks a refresh may stay missing from the refresh history before its watch
+        fails with a LookupError, e.g. for a request id of another dataset; defaults to 60
+        """
+        if max_workers is None:
+            max_workers = self.default_max_workers
+
+        if min_interval is None:
+            min_interval = self.default_min_interval
+
+        if max_interval is None:
+            max_interval = self.default_max_interval
+
+        if initial_interval is None:
+            initial_interval = self.default_initial_interval
+
+        if backoff is None:
+            backoff = self.default_backoff
+
+        if max_unlisted_checks is None:
+            max_unlisted_checks = self.default_max_unlisted_checks
+
+        self.datasets = datasets
+        self.max_workers = max_workers
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.initial_interval = initial_interval
+        self.backoff = backoff
+        self.max_unlisted_checks = max_unlisted_checks
+
+        # the median seconds of the completed refreshes of each (group id, dataset id), None if there are none
+        self.expected_durations = {}
+
+        # (due time, sequence number, watch) tuples of the refreshes to check
+        self._due = []
+        self._sequence = itertools.count()
+        self._executor = None
+        self._thread = None
+        self._closed = False
+
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+
+    @staticmethod
+    def utc_now():
+        """
+        :return: The current time as a naive UTC datetime, as the refresh history times are
+        """
+        return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+    @classmethod
+    def match_refresh(cls, history, request_id=None, triggered_at=None):
+        """
+        Finds the entry of a refresh in a refresh history
+        :param history: The refresh history entries, newest first, as returned by get_dataset_refresh_history
+        :param request_id: The request id returned by refresh_dataset
+        :param triggered_at: The naive UTC datetime the refresh was started at, used if there is no request id
+        :return: The refresh history entry, None if it is not listed yet
+        """
+        for entry in history:
+            if request_id is not None:
+                if entry.get('requestId') == request_id:
+                    return entry
+            elif triggered_at is None:
+                return entry
+            elif entry.get('startTime') is not None and entry['startTime'] >= triggered_at - cls.clock_skew:
+                # without a request id, the newest refresh started after the trigger is taken
+                return entry
+
+        return None
+
+    @classmethod
+    def expected_duration(cls, history):
+        """
+        :param history: Refresh history entries
+        :return: The median seconds of the completed refreshes, None if there are none
+        """
+        durations = [(x['endTime'] - x['startTime']).total_seconds() for x in history
+                     if x.get('status') == 'Completed' and x.get('startTime') and x.get('endTime')]
+
+        return statistics.median(durations) if durations else None
+
+    def watch(self, dataset_id, group_id=None, request_id=None, triggered_at=None, timeout=None):
+        """
+        Watches a refresh until it finishes
+        :param dataset_id: The id of the refreshed dataset
+        :param group_id: The optional id of the group of the dataset
+        :param request_id: The request id returned by refresh_dataset
+        :param triggered_at: The naive UTC datetime the refresh was started at, used to find the refresh in the history
+        if there is no request id; without either, the first refresh started from now on is watched
+        :param timeout: The optional seconds after which the future fails with a TimeoutError
+        :return: A Future resolving to the refresh history entry of the finished refresh
+        """
+        if request_id is None and triggered_at is None:
+            # the newest refresh listed may be an earlier one that finished already
+            triggered_at = self.utc_now()
+
+        now = time.monotonic()
+        watch = RefreshWatch(dataset_id, group_id, request_id, triggered_at,
+                             now + timeout if timeout is not None else None)
+
+        with self._condition:
+            if self._closed:
+                raise ValueError('Cannot watch refreshes with a closed poller')
+
+            if self._thread is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+                self._thread = threading.Thread(target=self._run, name='RefreshPoller', daemon=True)
+                self._thread.start()
+
+            expected = self.expected_durations.get(watch.key)
+            watch.interval = self._clamp(expected if expected is not None else self.initial_interval)
+            self._schedule(watch, now + watch.interval)
+
+        return watch.future
+
+    def wait(self, refreshes, timeout=None):
+        """
+        Waits for many refreshes
+        :param refreshes: An iterable of (dataset_id, group_id, request_id) or
+        (dataset_id, group_id, request_id, triggered_at) tuples, see watch()
+        :param timeout: The optional seconds after which waiting fails with a TimeoutError
+        :return: The list of the refresh history entries of the finished refreshes, in the order given
+        """
+        futures = [self.watch(*refresh, timeout=timeout) for refresh in refreshes]
+
+        return [x.result() for x in futures]
+
+    def close(self):
+        """
+        Stops the background thread; refreshes still watched are cancelled
+        """
+        with self._condition:
+            self._closed = True
+            due = self._due
+            self._due = []
+            self._condition.notify_all()
+
+        for _, _, watch in due:
+            watch.future.cancel()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _clamp(self, interval):
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def _schedule(self, watch, due):
+        # called with the lock held
+        heapq.heappush(self._due, (due, next(self._sequence), watch))
+        self._condition.notify_all()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._closed and (not self._due or self._due[0][0] > time.monotonic()):
+                    self._condition.wait(self._due[0][0] - time.monotonic() if self._due else None)
+
+                if self._closed:
+                    return
+
+                # every due refresh of a dataset is checked by the same request
+                batches = {}
+                now = time.monotonic()
+                while self._due and self._due[0][0] <= now:
+                    _, _, watch = heapq.heappop(self._due)
+                    if not watch.future.cancelled():
+                        batches.setdefault(watch.key, []).append(watch)
+
+                # refreshes of a checked dataset due soon are checked by the same request as well
+                if batches:
+                    later = []
+                    for item in self._due:
+                        due, _, watch = item
+                        if watch.key in batches and due <= now + self.min_interval:
+                            if not watch.future.cancelled():
+                                batches[watch.key].append(watch)
+                        else:
+                            later.append(item)
+
+                    if len(later) != len(self._due):
+                        heapq.heapify(later)
+                        self._due = later
+
+            for (group_id, dataset_id), watches in batches.items():
+                self._executor.submit(self._check, dataset_id, group_id, watches)
+
+    def _check(self, dataset_id, group_id, watches):
+        try:
+            history = self.datasets.get_dataset_refresh_history(dataset_id, group_id, self.history_top)
+        except Exception as e:
+            for watch in watches:
+                if not watch.future.done():
+                    watch.future.set_exception(e)
+            return
+
+        now = time.monotonic()
+        utc_now = self.utc_now()
+        rescheduled = []
+
+        for watch in watches:
+            entry = self.match_refresh(history, watch.request_id, watch.triggered_at)
+
+            if watch.future.done():
+                # cancelled by the caller
+                continue
+
+            if entry is not None and entry.get('status') in self.final_statuses:
+                watch.future.set_result(entry)
+                continue
+
+            if watch.deadline is not None and now >= watch.deadline:
+                watch.future.set_exception(TimeoutError(f'The refresh of dataset {dataset_id} did not finish in time'))
+                continue
+
+            if entry is None:
+                watch.unlisted_checks += 1
+                if watch.unlisted_checks >= self.max_unlisted_checks:
+                    watch.future.set_exception(LookupError(f'The refresh of dataset {dataset_id} is not listed in its '
+                                                           f'refresh history after {watch.unlisted_checks} checks'))
+                    continue
+
+            # learn the usual duration from the refreshes before this one
+            expected = self.expected_duration([x for x in history if x is not entry])
+            self.expected_durations[watch.key] = expected
+
+            started = entry.get('startTime') if entry is not None else None
+            if entry is None:
+                # not listed yet, the refresh is only queued by the service
+                interval = self.min_interval
+            else:
+                elapsed = (utc_now - started).total_seconds() if started is not None else None
+                if expected is not None and elapsed is not None and elapsed < expected:
+                    # check again when the refresh is expected to be done
+                    interval = expected - elapsed
+                else:
+                    # running longer than expected, or nothing to expect, back off
+                    interval = watch.interval * self.backoff
+
+            watch.interval = self._clamp(interval)
+            if watch.deadline is not None:
+                interval = min(watch.interval, max(0.0, watch.deadline - now))
+            else:
+                interval = watch.interval
+            rescheduled.append((watch, now + interval))
+
+        with self._condition:
+            if self._closed:
+                for watch, _ in rescheduled:
+                    watch.future.cancel()
+                return
+
+            for watch, due in rescheduled:
+                self._schedule(watch, due)
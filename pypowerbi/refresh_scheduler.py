@@ -0,0 +1,123 @@
+# -*- coding: future_fstrings -*-
+import collections
+
+from .refresh_orchestrator import DatasetRefresh, RefreshOrchestrator
+
+
+class RefreshScheduler:
+    """
+    Refreshes datasets that depend on each other, e.g. composite models built on dataflow-fed datasets.
+
+    The dependencies are a graph of (group_id, dataset_id) nodes. A dataset is refreshed as soon as the refreshes of
+    all the datasets it depends on completed, so independent branches of the graph refresh in parallel, within the
+    per-capacity and per-workspace limits of the RefreshOrchestrator running the refreshes. When a refresh fails for
+    good, the datasets depending on it, directly or not, are cancelled without being refreshed; the other branches
+    carry on.
+    """
+    def __init__(self, client, orchestrator=None):
+        """
+        Constructs a refresh scheduler
+
+        :param client: The PowerBIClient to refresh the datasets with
+        :param orchestrator: The optional RefreshOrchestrator running the refreshes, for its limits, retries and
+        poller; defaults to a RefreshOrchestrator of the client with default settings
+        """
+        if orchestrator is None:
+            orchestrator = RefreshOrchestrator(client)
+
+        self.client = client
+        self.orchestrator = orchestrator
+
+    @staticmethod
+    def graph(dependencies):
+        """
+        :param dependencies: A dict of each (group_id, dataset_id) node to an iterable of the nodes it depends on
+        :return: An ordered dict of every node, including nodes only depended on, to the list of the nodes it depends on
+        """
+        parents = collections.OrderedDict()
+        for node, node_parents in dependencies.items():
+            parents.setdefault(tuple(node), [])
+            for parent in node_parents:
+                parent = tuple(parent)
+                parents.setdefault(parent, [])
+                if parent not in parents[tuple(node)]:
+                    parents[tuple(node)].append(parent)
+
+        return parents
+
+    @classmethod
+    def topological_order(cls, dependencies):
+        """
+        :param dependencies: A dict of each (group_id, dataset_id) node to an iterable of the nodes it depends on
+        :return: The list of the nodes, each after the nodes it depends on; a ValueError is raised if the dependencies
+        have a cycle
+        """
+        parents = cls.graph(dependencies)
+        children = {node: [] for node in parents}
+        remaining = {}
+        for node, node_parents in parents.items():
+            remaining[node] = len(node_parents)
+            for parent in node_parents:
+                children[parent].append(node)
+
+        ready = collections.deque(node for node, count in remaining.items() if count == 0)
+        order = []
+        while ready:
+            node = ready.popleft()
+            order.append(node)
+            for child in children[node]:
+                remaining[child] -= 1
+                if remaining[child] == 0:
+                    ready.append(child)
+
+        if len(order) != len(parents):
+            # the nodes of the cycles and the nodes depending on them
+            unordered = [node for node, count in remaining.items() if count > 0]
+            raise ValueError(f'The refresh dependencies have a cycle, cannot order {", ".join(map(str, unordered))}')
+
+        return order
+
+    def run(self, dependencies):
+        """
+        Refreshes datasets in the order of their dependencies and waits for the refreshes to finish
+        :param dependencies: A dict of each (group_id, dataset_id) node to an iterable of the nodes it depends on,
+        group_id None for the user's workspace; nodes only depended on are refreshed as well
+        :return: An ordered dict of each node, in dependency order, to its DatasetRefresh; the refreshes of the nodes
+        depending on a failed refresh have the status DatasetRefresh.cancelled_status
+        """
+        parents = self.graph(dependencies)
+        order = self.topological_order(dependencies)
+
+        children = collections.defaultdict(list)
+        for node, node_parents in parents.items():
+            for parent in node_parents:
+                children[parent].append(node)
+
+        refreshes = collections.OrderedDict()
+        for group_id, dataset_id in order:
+            refreshes[(group_id, dataset_id)] = DatasetRefresh(group_id, dataset_id,
+                                                               self.orchestrator.capacity_of(group_id))
+
+        def ready(refresh):
+            return all(refreshes[x].succeeded for x in parents[refresh.key])
+
+        def finished(refresh):
+            if refresh.succeeded:
+                return
+
+            # everything downstream of a failed refresh is cancelled, the orchestrator drops it from its queue
+            downstream = collections.deque(children[refresh.key])
+            while downstream:
+                node = downstream.popleft()
+                if refreshes[node].status == DatasetRefresh.cancelled_status:
+                    continue
+
+                refreshes[node].status = DatasetRefresh.cancelled_status
+                refreshes[node].error = f'Cancelled as the refresh of dataset {refresh.dataset_id} in ' \
+                                        f'{refresh.group_id} did not complete: {refresh.status}'
+                downstream.extend(children[node])
+
+        # parents are queued before their children, so the refreshes start in dependency order
+        self.orchestrator.run_refreshes(list(refreshes.values()), ready, finished)
+
+        return refreshes
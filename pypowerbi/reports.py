@@ -2,12 +2,12 @@
 import io
 from typing import Optional
 
-import requests
 import json
 from requests.exceptions import HTTPError
 
 import pypowerbi.client
 from pypowerbi.report import Report
+from pypowerbi.metadata_cache import MetadataCache
 
 
 class Reports:
@@ -30,24 +30,44 @@ class Reports:
         """
         Evaluates the number of reports
         :param group_id: The optional group id
-        :return: The number of reports as returned by the API
+        :return: The number of reports as returned by the API, or by the client's metadata cache
         """
-        return len(self.get_reports(group_id))
+        return len(self.get_reports_listing(group_id))
 
-    def has_report(self, report_id, group_id=None):
+    def has_report(self, report_id, group_id=None, refresh=False):
         """
         Evaluates if the report exists
         :param report_id: The id of the report to evaluate
         :param group_id: The optional group id
+        :param refresh: If True, the reports are listed even if they are cached, e.g. to see a report created outside
+        the client since they were listed
         :return: True if the report exists, False otherwise
         """
-        reports = self.get_reports(group_id)
+        return report_id in self.get_reports_listing(group_id, refresh)
 
-        for report in reports:
-            if report.id == str(report_id):
-                return True
+    def get_reports_listing(self, group_id=None, refresh=False):
+        """
+        Gets the reports from the client's metadata cache, listing them if they are not cached
+        :param group_id: The optional group id to get reports from
+        :param refresh: If True, the reports are listed even if they are cached
+        :return: The MetadataListing of the reports, indexed by id and by name
+        """
+        listing = None if refresh else self.client.metadata_cache.get(MetadataCache.reports_kind, group_id)
+        if listing is None:
+            listing = self._list_reports(group_id)
 
-        return False
+        return listing
+
+    def find_report_by_name(self, name, group_id=None, refresh=False):
+        """
+        Finds a report by its name, using the client's metadata cache
+        :param name: The name of the report
+        :param group_id: The optional group id to find the report in
+        :param refresh: If True, the reports are listed even if they are cached
+        :return: The report, None if there is no report of that name
+        """
+        listing = self.get_reports_listing(group_id, refresh)
+        return MetadataCache.unique(MetadataCache.reports_kind, name, listing.find(name))
 
     def get_reports(self, group_id=None):
         """
@@ -56,6 +76,9 @@ class Reports:
         :param group_id: The optional group id to get reports from
         :return: The list of reports for the given group
         """
+        return self._list_reports(group_id).items
+
+    def _list_reports(self, group_id):
         # group_id can be none, account for it
         if group_id is None:
             groups_part = '/'
@@ -68,7 +91,7 @@ class Reports:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.get(url, headers=headers)
+        response = self.client.transport.get(url, headers=headers)
 
         # 200 - OK. Indicates success. List of reports.
         if response.status_code == 200:
@@ -76,23 +99,22 @@ class Reports:
         else:
             raise HTTPError(response, f'Get reports request returned http error: {response.json()}')
 
-        return reports
+        return self.client.metadata_cache.put(MetadataCache.reports_kind, group_id, reports)
 
-    def get_report(self, report_id, group_id=None):
+    def get_report(self, report_id, group_id=None, refresh=False):
         """
         Gets a report
         https://msdn.microsoft.com/en-us/library/mt784668.aspx
         :param report_id: The id of the report to get
         :param group_id: The optional group id
-        :return: The report as returned by the API
+        :param refresh: If True, the reports are listed even if they are cached
+        :return: The report as returned by the API, shared with the client's metadata cache
         """
-        reports = self.get_reports(group_id)
-
-        for report in reports:
-            if report.id == report_id:
-                return report
+        report = self.get_reports_listing(group_id, refresh).get(report_id)
+        if report is None:
+            raise RuntimeError('Could not find report')
 
-        raise RuntimeError('Could not find report')
+        return report
 
     def clone_report(self, report_id, name, target_group_id, dataset_id, group_id=None):
         """
@@ -126,13 +148,18 @@ class Reports:
             json_dict[Report.target_workspace_id_key] = str(target_group_id)
 
         # get the response
-        response = requests.post(url, headers=headers, json=json_dict)
+        response = self.client.transport.post(url, headers=headers, json=json_dict)
 
         # 200 - OK. Indicates success.
         if response.status_code != 200:
             raise HTTPError(response, f'Clone report request returned http error: {response.json()}')
 
-        return Report.from_dict(json.loads(response.text))
+        report = Report.from_dict(json.loads(response.text))
+        # without a target group the clone is created next to the original
+        self.client.metadata_cache.add(MetadataCache.reports_kind,
+                                       target_group_id if target_group_id is not None else group_id, report)
+
+        return report
 
     def delete_report(self, report_id, group_id=None):
         """
@@ -153,12 +180,14 @@ class Reports:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.delete(url, headers=headers)
+        response = self.client.transport.delete(url, headers=headers)
 
         # 200 - OK. Indicates success.
         if response.status_code != 200:
             raise HTTPError(response, f'Delete report request returned http error: {response.json()}')
 
+        self.client.metadata_cache.remove(MetadataCache.reports_kind, group_id, report_id)
+
     def rebind_report(self, report_id, dataset_id, group_id=None):
         """
         Rebinds a report to another dataset
@@ -183,12 +212,14 @@ class Reports:
         }
 
         # get the response
-        response = requests.post(url, headers=headers, json=json_dict)
+        response = self.client.transport.post(url, headers=headers, json=json_dict)
 
         # 200 - OK. Indicates success.
         if response.status_code != 200:
             raise HTTPError(response, f'Rebind report request returned http error: {response.json()}')
 
+        self.client.metadata_cache.update(MetadataCache.reports_kind, group_id, report_id, dataset_id=dataset_id)
+
     def generate_token(self, report_id, token_request, group_id):
         """
         Generates an embed token for a report
@@ -207,7 +238,7 @@ class Reports:
         json_dict = pypowerbi.client.TokenRequestEncoder().default(token_request)
 
         # get the response
-        response = requests.post(url, headers=headers, json=json_dict)
+        response = self.client.transport.post(url, headers=headers, json=json_dict)
 
         # 200 - OK. Indicates success.
         if response.status_code != 200:
@@ -243,7 +274,7 @@ class Reports:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.get(url, headers=headers)
+        response = self.client.transport.get(url, headers=headers)
 
         # 200 is the only valid response. Show an error in other cases.
         if response.status_code != 200:
@@ -0,0 +1,89 @@
+# -*- coding: future_fstrings -*-
+from concurrent.futures import ThreadPoolExecutor
+
+from .metadata_cache import MetadataCache
+
+
+class NameResolver:
+    """
+    Resolves batches of dataset, report and group names to the items they name.
+
+    Names are looked up in the name indexes of the client's MetadataCache. The names of a batch are grouped by kind
+    and workspace, so each workspace is listed at most once per batch, and only if its listing is not cached or
+    does not hold one of the names asked for. The listings needed are fetched concurrently.
+    """
+    default_max_workers = 4
+
+    kinds = (MetadataCache.datasets_kind, MetadataCache.reports_kind, MetadataCache.groups_kind)
+
+    def __init__(self, client, max_workers=None):
+        """
+        Constructs a name resolver
+
+        :param client: The PowerBIClient to list the items with
+        :param max_workers: The number of listings fetched concurrently; defaults to 4
+        """
+        if max_workers is None:
+            max_workers = self.default_max_workers
+
+        self.client = client
+        self.max_workers = max_workers
+
+    def resolve(self, kind, name, group_id=None):
+        """
+        Resolves a single name, see resolve_many
+        :return: The item, None if there is no item of that name
+        """
+        return self.resolve_many([(kind, name, group_id)])[(kind, name, group_id)]
+
+    def resolve_many(self, names):
+        """
+        Resolves a batch of names
+        :param names: An iterable of (kind, name, group_id) tuples, kind being one of MetadataCache.datasets_kind,
+        reports_kind or groups_kind, and group_id the optional id of the workspace, None for groups
+        :return: A dict of each (kind, name, group_id) tuple to the Dataset, Report or Group of that name, None if there
+        is none; a ValueError is raised if a name is not unique within its workspace
+        """
+        names = list(dict.fromkeys(tuple(x) for x in names))
+        cache = self.client.metadata_cache
+
+        listings = {}
+        stale = []
+        for kind, name, group_id in names:
+            if kind not in self.kinds:
+                raise ValueError(f'Cannot resolve names of kind {kind!r}, expected one of {self.kinds}')
+
+            key = self._key(kind, group_id)
+            if key not in listings:
+                listings[key] = cache.get(*key)
+
+            # a name missing from a cached listing may have been created since, list the workspace again
+            listing = listings[key]
+            if (listing is None or name not in listing.by_name) and key not in stale:
+                stale.append(key)
+
+        if stale:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(stale))) as executor:
+                for key, listing in zip(stale, executor.map(lambda x: self._list(*x), stale)):
+                    listings[key] = listing
+
+        resolved = {}
+        for kind, name, group_id in names:
+            listing = listings[self._key(kind, group_id)]
+            resolved[(kind, name, group_id)] = MetadataCache.unique(kind, name, listing.find(name))
+
+        return resolved
+
+    @staticmethod
+    def _key(kind, group_id):
+        # groups are not listed per workspace
+        return kind, group_id if kind != MetadataCache.groups_kind else None
+
+    def _list(self, kind, group_id):
+        if kind == MetadataCache.datasets_kind:
+            return self.client.datasets.get_datasets_listing(group_id, refresh=True)
+
+        if kind == MetadataCache.reports_kind:
+            return self.client.reports.get_reports_listing(group_id, refresh=True)
+
+        return self.client.groups.get_groups_listing(refresh=True)
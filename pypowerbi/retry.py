@@ -0,0 +1,165 @@
+# -*- coding: future_fstrings -*-
+import re
+import random
+import datetime
+import threading
+import urllib.parse
+
+from email.utils import parsedate_to_datetime
+
+
+class RetryPolicy:
+    """
+    Decides whether, and after how long, a throttled request should be sent again.
+
+    Responses with a retryable status code (429 Too Many Requests and 503 Service Unavailable by default) are
+    retried after the delay given by their Retry-After header, or after an exponential backoff with full jitter
+    when the service does not send one. Retries stop once max_retries is reached or once the next delay would
+    exceed the total time budget of the request.
+
+    A throttled request was turned away before it was processed, so it is retried whatever its method. Any other
+    retryable status may come back after the service already acted on the request, so it is only retried for
+    idempotent methods; retrying e.g. a POST of rows could insert them twice.
+    """
+    default_retry_statuses = (429, 503)
+    throttled_statuses = (429,)
+    idempotent_methods = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+    retry_after_header = 'Retry-After'
+
+    # ids in urls are replaced by this placeholder so retries are counted per endpoint rather than per object
+    id_placeholder = '{id}'
+    id_regex = re.compile('^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$')
+
+    def __init__(self, max_retries=5, backoff_factor=1.0, max_backoff=60.0, total_timeout=300.0,
+                 retry_statuses=None, jitter=True):
+        """
+        Constructs a retry policy
+
+        :param max_retries: The maximum number of times a single request is retried
+        :param backoff_factor: The base delay in seconds; the n-th retry waits up to backoff_factor * 2 ** n seconds
+        :param max_backoff: The upper bound in seconds of a single computed backoff delay
+        :param total_timeout: The total time budget in seconds for a request including all of its retries, None for
+        no budget
+        :param retry_statuses: The http status codes to retry; defaults to 429 and 503
+        :param jitter: If True, computed backoff delays are drawn uniformly between 0 and the exponential delay
+        """
+        if retry_statuses is None:
+            retry_statuses = self.default_retry_statuses
+
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.total_timeout = total_timeout
+        self.retry_statuses = frozenset(retry_statuses)
+        self.jitter = jitter
+
+        self._retry_counts = {}
+        self._lock = threading.Lock()
+
+    def is_retryable(self, response, method=None):
+        """
+        Evaluates if the response has a status that should be retried
+        :param response: The http response
+        :param method: The http method of the request; statuses other than throttling are only retried for idempotent
+        methods, or if the method is not given
+        :return: True if the request should be retried, False otherwise
+        """
+        if response.status_code not in self.retry_statuses:
+            return False
+
+        if response.status_code in self.throttled_statuses or method is None:
+            return True
+
+        return method.upper() in self.idempotent_methods
+
+    def get_retry_delay(self, attempt, response, elapsed):
+        """
+        Computes how long to wait before sending a request again
+        :param attempt: The number of retries already made for the request
+        :param response: The retryable http response that was received
+        :param elapsed: The seconds spent on the request so far
+        :return: The delay in seconds, or None if the request should not be retried
+        """
+        if attempt >= self.max_retries:
+            return None
+
+        delay = self.retry_after(response)
+        if delay is None:
+            delay = self.backoff(attempt)
+
+        if self.total_timeout is not None and elapsed + delay > self.total_timeout:
+            return None
+
+        return delay
+
+    def backoff(self, attempt):
+        """
+        Computes the exponential backoff delay for a retry
+        :param attempt: The number of retries already made for the request
+        :return: The delay in seconds
+        """
+        delay = min(self.max_backoff, self.backoff_factor * (2 ** attempt))
+
+        if self.jitter:
+            delay = random.uniform(0, delay)
+
+        return delay
+
+    @classmethod
+    def retry_after(cls, response):
+        """
+        Reads the delay requested by the service from the Retry-After header of a response
+        :param response: The http response
+        :return: The delay in seconds, or None if the header is missing or malformed
+        """
+        value = response.headers.get(cls.retry_after_header)
+        if value is None:
+            return None
+
+        # the header is either a number of seconds or an http date
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=datetime.timezone.utc)
+
+        return max(0.0, (retry_at - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+
+    @classmethod
+    def endpoint_key(cls, method, url):
+        """
+        Creates the key retries of a request are counted under, e.g. 'GET /v1.0/myorg/groups/{id}/datasets'
+        :param method: The http method of the request
+        :param url: The url of the request
+        :return: The endpoint key
+        """
+        path = urllib.parse.urlsplit(url).path
+        segments = [cls.id_placeholder if cls.id_regex.match(x) else x for x in path.split('/')]
+
+        return f'{method.upper()} {"/".join(segments)}'
+
+    def record_retry(self, method, url):
+        """
+        Counts a retry against the endpoint of a request
+        :param method: The http method of the request
+        :param url: The url of the request
+        """
+        key = self.endpoint_key(method, url)
+
+        with self._lock:
+            self._retry_counts[key] = self._retry_counts.get(key, 0) + 1
+
+    @property
+    def retry_counts(self):
+        """
+        The number of retries made so far, by endpoint key
+        """
+        with self._lock:
+            return dict(self._retry_counts)
@@ -0,0 +1,424 @@
+# -*- coding: future_fstrings -*-
+import os
+import json
+import threading
+import collections
+
+from .payload import PayloadEncoder
+from .ingestion import RowIngestor
+
+
+class RowSpool:
+    """
+    Durable write-ahead spool for push rows.
+
+    append() writes rows to append-only segment files before returning, and a background thread reads them back a
+    chunk at a time and posts them through Datasets.post_payload, acknowledging each chunk by recording the segment
+    and offset up to which rows have been sent. Only that position and the chunk being posted are held in memory, so
+    the rows piling up during an outage only take disk space. Rows that could not be posted are retried, and rows left
+    unacknowledged when the process stops are replayed by the next spool opened on the same directory. Delivery is
+    at least once: a chunk posted just before a crash, but not yet acknowledged, is posted again.
+
+    Rows the service rejects, with a 4xx status other than 429, or that failed max_attempts times, are moved to the
+    dead letter file of the directory, so they do not hold up the rows appended after them.
+
+    Each line of a segment holds one row as the json array [dataset_id, table_name, group_id, row]; the lines of the
+    dead letter file add the error the rows were rejected with, [dataset_id, table_name, group_id, row, error].
+    """
+    segment_suffix = '.seg'
+    offsets_file_name = 'offsets.json'
+    dead_letter_file_name = 'dead_letter.jsonl'
+
+    default_segment_bytes = 64 * 1024 * 1024
+    default_flush_interval = 1.0
+    default_retry_interval = 5.0
+    default_max_attempts = 50
+    default_close_timeout = 30.0
+
+    def __init__(self, datasets, directory, segment_bytes=None, flush_interval=None, retry_interval=None,
+                 rows_per_request=None, max_bytes_per_request=None, sync=True, max_attempts=None):
+        """
+        Constructs a row spool, replaying any rows left unacknowledged in directory
+
+        :param datasets: The Datasets operations module to post the rows with, e.g. client.datasets
+        :param directory: The directory holding the segment files, created if it does not exist
+        :param segment_bytes: The size at which a new segment file is started; defaults to 64 MiB
+        :param flush_interval: The seconds rows may wait for more rows before being posted; defaults to 1
+        :param retry_interval: The seconds to wait before posting again after an error; defaults to 5
+        :param rows_per_request: The maximum number of rows per request; defaults to, and is capped at, 10000
+        :param max_bytes_per_request: The maximum json size of a request in bytes; defaults to 8 MiB
+        :param sync: If True, append() fsyncs the segment file before returning
+        :param max_attempts: The number of times the rows of a table are posted before they are moved to the dead
+        letter file; defaults to 50
+        """
+        if segment_bytes is None:
+            segment_bytes = self.default_segment_bytes
+
+        if flush_interval is None:
+            flush_interval = self.default_flush_interval
+
+        if retry_interval is None:
+            retry_interval = self.default_retry_interval
+
+        if rows_per_request is None or rows_per_request > RowIngestor.max_rows_per_request:
+            rows_per_request = RowIngestor.max_rows_per_request
+
+        if max_bytes_per_request is None:
+            max_bytes_per_request = RowIngestor.default_max_bytes_per_request
+
+        if max_attempts is None:
+            max_attempts = self.default_max_attempts
+
+        self.datasets = datasets
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.flush_interval = flush_interval
+        self.retry_interval = retry_interval
+        self.rows_per_request = rows_per_request
+        self.max_bytes_per_request = max_bytes_per_request
+        self.sync = sync
+        self.max_attempts = max_attempts
+        self.payload_encoder = PayloadEncoder()
+
+        # the last error raised by post_payload, None once a chunk has been posted again
+        self.last_error = None
+        # the number of rows moved to the dead letter file
+        self.dead_lettered = 0
+
+        # the segment and offset up to which rows are acknowledged, the rows after it are posted next
+        self._acked_segment = None
+        self._acked_offset = 0
+        # the number of rows not acknowledged yet
+        self._pending = 0
+        self._segment = None
+        self._segment_file = None
+        self._flush_requests = 0
+        self._closing = False
+
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+
+        os.makedirs(directory, exist_ok=True)
+        self._recover()
+        self._open_segment(max(self._segments(), default=-1) + 1)
+        if self._acked_segment is None:
+            self._acked_segment = self._segment
+        self._save_offsets()
+
+        self._thread = threading.Thread(target=self._run, name='RowSpool', daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self):
+        """
+        The number of rows not acknowledged yet
+        """
+        with self._lock:
+            return self._pending
+
+    def append(self, dataset_id, table_name, rows, group_id=None):
+        """
+        Writes rows to the spool; they are posted in the background
+        :param dataset_id: The id of the dataset to post rows to
+        :param table_name: The name of the table to post rows to
+        :param rows: Any rows accepted by Datasets.post_rows
+        :param group_id: The optional id of the group to post rows to
+        :return: The number of rows written
+        """
+        # the header of each line, without its closing bracket, to which the row json is appended
+        header = json.dumps([dataset_id, table_name, group_id]).encode('utf-8')[:-1] + b','
+        encoded_rows = list(self.payload_encoder.iter_encoded_rows(rows))
+
+        with self._condition:
+            if self._closing:
+                raise ValueError('Cannot append rows to a closed spool')
+
+            if self._segment_file.tell() >= self.segment_bytes:
+                self._open_segment(self._segment + 1)
+
+            for encoded_row in encoded_rows:
+                self._segment_file.write(header + encoded_row + b']\n')
+
+            self._segment_file.flush()
+            if self.sync:
+                os.fsync(self._segment_file.fileno())
+
+            self._pending += len(encoded_rows)
+            self._condition.notify_all()
+
+        return len(encoded_rows)
+
+    def flush(self, timeout=None):
+        """
+        Blocks until every row appended so far is acknowledged
+        :param timeout: The optional maximum number of seconds to wait
+        :return: True if all rows were posted, False if the timeout expired first
+        """
+        with self._condition:
+            self._flush_requests += 1
+            self._condition.notify_all()
+            try:
+                return self._condition.wait_for(lambda: not self._pending, timeout)
+            finally:
+                self._flush_requests -= 1
+
+    @property
+    def dead_letter_path(self):
+        return os.path.join(self.directory, self.dead_letter_file_name)
+
+    @staticmethod
+    def is_retryable(error):
+        """
+        Evaluates if posting rows again may succeed after an error
+        :param error: The exception raised by post_payload
+        :return: False if the service rejected the rows, with a 4xx status other than 429 Too Many Requests
+        """
+        # the operation modules pass the response as the first argument of HTTPError
+        response = getattr(error, 'response', None)
+        if response is None and error.args:
+            response = error.args[0]
+
+        status_code = getattr(response, 'status_code', None)
+        if not isinstance(status_code, int):
+            return True
+
+        return not (400 <= status_code < 500 and status_code != 429)
+
+    def close(self, flush=True, timeout=None):
+        """
+        Stops the background thread. Rows that are not acknowledged stay in the spool directory.
+        :param flush: If True, waits for all appended rows to be posted first
+        :param timeout: The maximum number of seconds to wait for the flush; defaults to 30, rows still pending then
+        are replayed by the next spool opened on the directory
+        """
+        if timeout is None:
+            timeout = self.default_close_timeout
+
+        if flush:
+            self.flush(timeout)
+
+        with self._condition:
+            self._closing = True
+            self._condition.notify_all()
+
+        self._thread.join()
+
+        with self._lock:
+            if self._segment_file is not None:
+                self._segment_file.close()
+                self._segment_file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _segment_path(self, segment):
+        return os.path.join(self.directory, f'{segment:012d}{self.segment_suffix}')
+
+    def _segments(self):
+        return sorted(int(name[:-len(self.segment_suffix)]) for name in os.listdir(self.directory)
+                      if name.endswith(self.segment_suffix))
+
+    def _open_segment(self, segment):
+        if self._segment_file is not None:
+            self._segment_file.close()
+
+        self._segment = segment
+        self._segment_file = open(self._segment_path(segment), 'ab')
+
+    def _recover(self):
+        offsets_path = os.path.join(self.directory, self.offsets_file_name)
+        offsets = {}
+        if os.path.exists(offsets_path):
+            with open(offsets_path, 'r') as offsets_file:
+                offsets = {int(segment): offset for segment, offset in json.load(offsets_file).items()}
+
+        for segment in self._segments():
+            path = self._segment_path(segment)
+            # the rows after the first unacknowledged one were never acknowledged
+            offset = offsets.get(segment, 0) if self._acked_segment is None else 0
+
+            # the rows are counted, not kept, they are read again when they are posted
+            rows = 0
+            complete = offset
+            with open(path, 'rb') as segment_file:
+                segment_file.seek(offset)
+                for line in segment_file:
+                    if not line.endswith(b'\n'):
+                        break
+                    complete += len(line)
+                    rows += 1
+
+            # a line cut short by a crash was never acknowledged to the producer, drop it
+            if complete < os.path.getsize(path):
+                with open(path, 'r+b') as segment_file:
+                    segment_file.truncate(complete)
+
+            if not rows and self._acked_segment is None:
+                self._remove_segment(segment)
+                continue
+
+            if self._acked_segment is None:
+                self._acked_segment = segment
+                self._acked_offset = offset
+            self._pending += rows
+
+    def _remove_segment(self, segment):
+        path = self._segment_path(segment)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def _save_offsets(self):
+        offsets_path = os.path.join(self.directory, self.offsets_file_name)
+        temp_path = f'{offsets_path}.tmp'
+
+        with open(temp_path, 'w') as offsets_file:
+            json.dump({str(self._acked_segment): self._acked_offset}, offsets_file)
+            offsets_file.flush()
+            os.fsync(offsets_file.fileno())
+
+        os.replace(temp_path, offsets_path)
+
+    def _read_batch(self, segment, offset, end_segment, end_offset):
+        """
+        Reads the rows of the next chunk from the segment files
+        :return: A list of (segment, end offset, (dataset_id, table_name, group_id), row json) of the rows after the
+        offset of the segment, up to end_offset of end_segment, the end of the rows appended so far
+        """
+        batch = []
+        batch_bytes = self.payload_encoder.wrapper_size()
+
+        while True:
+            path = self._segment_path(segment)
+            if os.path.exists(path):
+                with open(path, 'rb') as segment_file:
+                    segment_file.seek(offset)
+
+                    while segment != end_segment or offset < end_offset:
+                        line = segment_file.readline()
+                        if not line:
+                            break
+
+                        dataset_id, table_name, group_id, row = json.loads(line)
+                        encoded_row = self.payload_encoder.encode_row(row)
+                        row_bytes = len(encoded_row) + 1
+                        if batch and (len(batch) >= self.rows_per_request or
+                                      batch_bytes + row_bytes > self.max_bytes_per_request):
+                            return batch
+
+                        offset += len(line)
+                        batch.append((segment, offset, (dataset_id, table_name, group_id), encoded_row))
+                        batch_bytes += row_bytes
+
+            if segment >= end_segment:
+                return batch
+
+            segment, offset = segment + 1, 0
+
+    def _run(self):
+        # the chunk being posted, the tables of it already posted and the failed attempts of each table, kept until the
+        # whole chunk is acknowledged
+        batch = None
+        posted = set()
+        attempts = collections.Counter()
+
+        while True:
+            with self._condition:
+                while not self._pending and not self._closing:
+                    self._condition.wait()
+
+                # close() has flushed already if asked to, anything still queued is replayed by the next spool
+                if self._closing:
+                    return
+
+                if batch is None:
+                    # give producers flush_interval to fill a chunk unless one is full or a flush is waiting
+                    if self._pending < self.rows_per_request and not self._flush_requests and not self._closing:
+                        self._condition.wait(self.flush_interval)
+
+                    # the rows appended so far end at the current position of the segment written to
+                    start = (self._acked_segment, self._acked_offset)
+                    end = (self._segment, self._segment_file.tell())
+
+            if batch is None:
+                batch = self._read_batch(*start, *end)
+
+            failure = self._post_batch(batch, posted)
+            if failure is not None:
+                key, encoded_rows, error = failure
+                attempts[key] += 1
+
+                if not self.is_retryable(error) or attempts[key] >= self.max_attempts:
+                    # rows that will not be accepted are set aside, the other tables of the chunk carry on
+                    self._dead_letter(key, encoded_rows, error)
+                    posted.add(key)
+                    with self._condition:
+                        self.last_error = error
+                        self.dead_lettered += len(encoded_rows)
+                    continue
+
+                with self._condition:
+                    self.last_error = error
+                    if not self._closing:
+                        self._condition.wait(self.retry_interval)
+                continue
+
+            with self._condition:
+                self.last_error = None
+                self._acknowledge(batch)
+                self._condition.notify_all()
+
+            batch = None
+            posted = set()
+            attempts = collections.Counter()
+
+    def _post_batch(self, batch, posted):
+        """
+        Posts the rows of each table of a chunk in the order they were appended
+        :return: None if every table was posted, the (key, encoded rows, error) of the table that failed otherwise
+        """
+        tables = collections.OrderedDict()
+        for _, _, key, encoded_row in batch:
+            tables.setdefault(key, []).append(encoded_row)
+
+        for key, encoded_rows in tables.items():
+            # a table posted before an error is not posted again when the chunk is retried
+            if key in posted:
+                continue
+
+            dataset_id, table_name, group_id = key
+            try:
+                self.datasets.post_payload(dataset_id, table_name, self.payload_encoder.join(encoded_rows), group_id)
+            except Exception as e:
+                return key, encoded_rows, e
+            posted.add(key)
+
+        return None
+
+    def _dead_letter(self, key, encoded_rows, error):
+        # the header of each line, without its closing bracket, as in the segment files
+        header = json.dumps(list(key)).encode('utf-8')[:-1] + b','
+        trailer = b',' + json.dumps(str(error)).encode('utf-8') + b']\n'
+
+        with open(self.dead_letter_path, 'ab') as dead_letter_file:
+            for encoded_row in encoded_rows:
+                dead_letter_file.write(header + encoded_row + trailer)
+
+            dead_letter_file.flush()
+            if self.sync:
+                os.fsync(dead_letter_file.fileno())
+
+    def _acknowledge(self, batch):
+        # called with the lock held, the batch always starts at the acknowledged position
+        segment, offset, _, _ = batch[-1]
+        self._pending -= len(batch)
+
+        # segments the acknowledged position moved past have all been posted, and are no longer written to
+        for done in range(self._acked_segment, segment):
+            self._remove_segment(done)
+
+        self._acked_segment = segment
+        self._acked_offset = offset
+        self._save_offsets()
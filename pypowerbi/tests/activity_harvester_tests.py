@@ -0,0 +1,94 @@
+# -*- coding: future_fstrings -*-
+
+import time
+import random
+import datetime
+import threading
+from unittest import TestCase
+
+from pypowerbi.activity_harvester import ActivityLogHarvester
+from pypowerbi.client import PowerBIClient
+from pypowerbi.rate_limit import RateLimiter
+from pypowerbi.transport import Transport
+from pypowerbi.tests.transport_tests import MockSession
+
+
+utc = datetime.timezone.utc
+
+
+class MockActivityLogs:
+    def __init__(self, events_per_window=3):
+        self.events_per_window = events_per_window
+        self.windows = []
+        self._lock = threading.Lock()
+
+    def iter_activity_events(self, st, et=None, filter=None):
+        with self._lock:
+            self.windows.append((st, et, filter))
+
+        time.sleep(random.uniform(0, 0.01))
+        step = (et - st) / self.events_per_window
+        # the service does not return events in time order
+        for x in reversed(range(self.events_per_window)):
+            yield {'Id': f'{st.isoformat()}-{x}', 'CreationTime': st + step * x}
+
+
+class ActivityLogHarvesterTests(TestCase):
+    def test_day_windows(self):
+        harvester = ActivityLogHarvester(MockActivityLogs())
+
+        windows = list(harvester.iter_windows(datetime.date(2019, 12, 16), datetime.date(2019, 12, 18)))
+
+        self.assertEqual([
+            (datetime.datetime(2019, 12, 16, tzinfo=utc), datetime.datetime(2019, 12, 16, 23, 59, 59, tzinfo=utc)),
+            (datetime.datetime(2019, 12, 17, tzinfo=utc), datetime.datetime(2019, 12, 17, 23, 59, 59, tzinfo=utc)),
+        ], windows)
+
+    def test_windows_do_not_cross_midnight(self):
+        harvester = ActivityLogHarvester(MockActivityLogs(), window=datetime.timedelta(hours=10))
+
+        windows = list(harvester.iter_windows(datetime.datetime(2019, 12, 16, 12), datetime.datetime(2019, 12, 17, 12)))
+
+        self.assertEqual([datetime.datetime(2019, 12, 16, 12, tzinfo=utc), datetime.datetime(2019, 12, 16, 22, tzinfo=utc),
+                          datetime.datetime(2019, 12, 17, tzinfo=utc), datetime.datetime(2019, 12, 17, 10, tzinfo=utc)],
+                         [window[0] for window in windows])
+        for st, et in windows:
+            self.assertEqual(st.date(), et.date())
+
+    def test_busy_days_are_split(self):
+        def window(day):
+            return datetime.timedelta(hours=6) if day == datetime.date(2019, 12, 17) else datetime.timedelta(days=1)
+
+        harvester = ActivityLogHarvester(MockActivityLogs(), window=window)
+
+        windows = list(harvester.iter_windows(datetime.date(2019, 12, 16), datetime.date(2019, 12, 19)))
+
+        self.assertEqual(6, len(windows))
+
+    def test_events_in_time_order(self):
+        activity_logs = MockActivityLogs()
+        harvester = ActivityLogHarvester(activity_logs, max_workers=4)
+
+        events = list(harvester.harvest(datetime.date(2019, 12, 1), datetime.date(2019, 12, 31), "Activity eq 'x'"))
+
+        self.assertEqual(90, len(events))
+        creation_times = [event['CreationTime'] for event in events]
+        self.assertEqual(sorted(creation_times), creation_times)
+        self.assertEqual(30, len(activity_logs.windows))
+        self.assertTrue(all(window[2] == "Activity eq 'x'" for window in activity_logs.windows))
+
+    def test_activity_events_are_rate_limited(self):
+        client = PowerBIClient('https://api.powerbi.com', {'accessToken': 'token'}, Transport(session=MockSession([])))
+        self.assertIsNone(client.rate_limiter)
+
+        ActivityLogHarvester(client.activity_logs)
+
+        budget = client.rate_limiter.get_budget(RateLimiter.activity_events_budget)
+        self.assertTrue(budget.matches('/v1.0/myorg/admin/activityevents'))
+        self.assertFalse(budget.matches('/v1.0/myorg/groups'))
+
+        # a limiter of the client is kept, and its budget is not added twice
+        rate_limiter = client.rate_limiter
+        ActivityLogHarvester(client.activity_logs)
+        self.assertIs(rate_limiter, client.rate_limiter)
+        self.assertEqual(1, len(rate_limiter.budgets))
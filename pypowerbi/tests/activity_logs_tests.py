@@ -0,0 +1,70 @@
+# -*- coding: future_fstrings -*-
+
+import json
+import asyncio
+import datetime
+from unittest import TestCase
+
+from pypowerbi.client import PowerBIClient
+from pypowerbi.transport import Transport
+from pypowerbi.async_client import AsyncPowerBIClient
+from pypowerbi.async_transport import AsyncTransport
+from pypowerbi.tests.transport_tests import MockSession, MockResponse
+from pypowerbi.tests.async_client_tests import MockAsyncSession
+
+
+def activity_events_page(ids, continuation_token=None):
+    return {
+        'activityEventEntities': [{'Id': x, 'CreationTime': '2019-12-16T19:35:40'} for x in ids],
+        'continuationUri': f'https://api.powerbi.com/v1.0/myorg/admin/activityevents?continuationToken='
+                           f"'{continuation_token}'" if continuation_token is not None else None,
+        'continuationToken': continuation_token,
+        'lastResultSet': continuation_token is None,
+    }
+
+
+class ActivityLogsTests(TestCase):
+    def setUp(self):
+        self.session = MockSession([
+            MockResponse(text=json.dumps(activity_events_page([], 'a'))),
+            MockResponse(text=json.dumps(activity_events_page([1, 2], 'b'))),
+            MockResponse(text=json.dumps(activity_events_page([3]))),
+        ])
+        self.client = PowerBIClient('https://api.powerbi.com', {'accessToken': 'token'},
+                                    Transport(session=self.session))
+
+    def test_query(self):
+        start = datetime.datetime(2019, 12, 16, 1, 2, 3)
+        end = datetime.datetime(2019, 12, 16, 4, 5, 6)
+
+        self.client.activity_logs.get_activity_logs(start, end, "Activity eq 'viewreport'")
+
+        self.assertEqual("https://api.powerbi.com/v1.0/myorg/admin/activityevents?"
+                         "startDateTime='2019-12-16T01:02:03'&endDateTime='2019-12-16T04:05:06'"
+                         "&$filter=Activity eq 'viewreport'", self.session.requests[0][1])
+        self.assertTrue(self.session.requests[1][1].endswith("continuationToken='a'"))
+
+    def test_events_are_streamed(self):
+        events = self.client.activity_logs.iter_activity_events(datetime.date(2019, 12, 16))
+
+        first = next(events)
+        # only the pages up to the first event have been fetched
+        self.assertEqual(2, len(self.session.requests))
+        self.assertEqual(1, first['Id'])
+        self.assertEqual(datetime.datetime(2019, 12, 16, 19, 35, 40, tzinfo=datetime.timezone.utc),
+                         first['CreationTime'])
+
+        self.assertEqual([2, 3], [event['Id'] for event in events])
+        self.assertEqual(3, len(self.session.requests))
+
+    def test_async_events(self):
+        session = MockAsyncSession({
+            "endDateTime='2019-12-16T23:59:59'": activity_events_page([1], 'a'),
+            "continuationToken='a'": activity_events_page([2]),
+        })
+        client = AsyncPowerBIClient('https://api.powerbi.com', {'accessToken': 'token'},
+                                    AsyncTransport(session=session))
+
+        events = asyncio.run(client.activity_logs.get_activity_logs(datetime.date(2019, 12, 16)))
+
+        self.assertEqual([1, 2], [event['Id'] for event in events])
@@ -0,0 +1,106 @@
+# -*- coding: future_fstrings -*-
+
+import os
+import shutil
+import datetime
+import tempfile
+from unittest import TestCase, mock
+
+from pypowerbi.activity_event import ActivityEvent
+from pypowerbi.activity_store import ActivityEventStore
+
+
+utc = datetime.timezone.utc
+
+
+def make_event(x, day=16, hour=0):
+    return {
+        'Id': f'event-{x}',
+        'CreationTime': datetime.datetime(2019, 12, day, hour, x % 60, x // 60, tzinfo=utc),
+        'UserId': f'user{x % 3}@contoso.com',
+        'Activity': 'ViewReport' if x % 2 else 'ExportReport',
+        'ItemName': f'report {x % 5}',
+        'IsSuccess': True,
+    }
+
+
+class ActivityEventStoreTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = ActivityEventStore(self.directory)
+
+        self.events = [make_event(x, day=16 + x % 3, hour=x % 24) for x in range(300)]
+        # written in several batches, out of time order
+        for batch in range(0, 300, 100):
+            self.store.write(reversed(self.events[batch:batch + 100]))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def expected(self, predicate):
+        return sorted((event for event in self.events if predicate(event)), key=lambda event: event['CreationTime'])
+
+    def test_partitioned_by_day(self):
+        self.assertEqual([datetime.date(2019, 12, 16), datetime.date(2019, 12, 17), datetime.date(2019, 12, 18)],
+                         self.store.days())
+        self.assertEqual(3, len(os.listdir(os.path.join(self.directory, '2019-12-17'))))
+
+    def test_query_all_in_time_order(self):
+        events = list(self.store.query())
+
+        self.assertEqual(self.expected(lambda event: True), events)
+
+    def test_query_by_user_and_activity(self):
+        events = list(self.store.query(user_id='user1@contoso.com', activity='ViewReport'))
+
+        self.assertEqual(self.expected(lambda event: event['UserId'] == 'user1@contoso.com' and
+                                       event['Activity'] == 'ViewReport'), events)
+        self.assertEqual(0, self.store.count(user_id='nobody@contoso.com'))
+
+    def test_query_by_time_range_and_item(self):
+        start = datetime.datetime(2019, 12, 17, 6)
+        end = datetime.date(2019, 12, 18)
+
+        events = list(self.store.query(start, end, item_name='report 2', columns=['Id']))
+
+        expected = self.expected(lambda event: start.replace(tzinfo=utc) <= event['CreationTime'] <
+                                 datetime.datetime(2019, 12, 18, tzinfo=utc) and event['ItemName'] == 'report 2')
+        self.assertEqual([{'Id': event['Id'], 'CreationTime': event['CreationTime']} for event in expected], events)
+        self.assertTrue(events)
+
+    def test_compact(self):
+        self.store.compact(datetime.date(2019, 12, 17))
+
+        self.assertEqual(1, len(os.listdir(os.path.join(self.directory, '2019-12-17'))))
+        # a new store reads the segments from disk
+        store = ActivityEventStore(self.directory)
+        self.assertEqual(self.expected(lambda event: True), list(store.query()))
+
+    def test_replayed_events_are_stored_once(self):
+        # a page delivered again, e.g. replayed by an ActivityLogSync after a crash, with one new event
+        replayed = self.events[:100] + [make_event(300), make_event(300)]
+
+        self.assertEqual(1, self.store.write(replayed))
+        self.assertEqual(301, self.store.count())
+
+    def test_interrupted_compact_is_deduplicated(self):
+        day = datetime.date(2019, 12, 17)
+        # the merged segment is written but the segments it merged are not all removed
+        with mock.patch('pypowerbi.activity_store.os.remove', side_effect=OSError('interrupted')):
+            with self.assertRaises(OSError):
+                self.store.compact(day)
+        self.assertEqual(4, len(os.listdir(os.path.join(self.directory, '2019-12-17'))))
+
+        self.store.compact(day)
+
+        self.assertEqual(1, len(os.listdir(os.path.join(self.directory, '2019-12-17'))))
+        self.assertEqual(self.expected(lambda event: True), list(self.store.query()))
+
+    def test_write_activity_events(self):
+        event = ActivityEvent.from_dict({'Id': 'event', 'CreationTime': '2019-12-20T10:00:00', 'UserId': 'user',
+                                         'Activity': 'ViewReport'})
+        self.store.write([event])
+
+        self.assertEqual([{'Id': 'event', 'CreationTime': datetime.datetime(2019, 12, 20, 10, tzinfo=utc),
+                           'UserId': 'user', 'Activity': 'ViewReport'}],
+                         list(self.store.query(datetime.date(2019, 12, 20))))
@@ -0,0 +1,101 @@
+# -*- coding: future_fstrings -*-
+
+import os
+import json
+import shutil
+import datetime
+import tempfile
+import urllib.parse
+from unittest import TestCase
+
+from pypowerbi.client import PowerBIClient
+from pypowerbi.transport import Transport
+from pypowerbi.activity_sync import ActivityLogSync
+from pypowerbi.tests.transport_tests import MockResponse
+from pypowerbi.tests.activity_logs_tests import activity_events_page
+
+
+class ActivityEventsSession:
+    """
+    Serves three pages for every day, 'first', 'second' and the last one, failing the second page once if asked to
+    """
+    def __init__(self, fail_once=False):
+        self.headers = {}
+        self.requests = []
+        self.fail_once = fail_once
+
+    def request(self, method, url, **kwargs):
+        self.requests.append(url)
+        query = urllib.parse.unquote(url)
+
+        if 'continuationToken' not in query:
+            day = query.split("startDateTime='")[1][:10]
+            return MockResponse(text=json.dumps(activity_events_page([f'{day}-1'], f'{day}|second')))
+
+        token = query.split("continuationToken='")[1].rstrip("'")
+        day, page = token.split('|')
+        if page == 'second':
+            if self.fail_once:
+                self.fail_once = False
+                return MockResponse(status_code=400, text='{"error": "failed"}')
+            return MockResponse(text=json.dumps(activity_events_page([f'{day}-2'], f'{day}|last')))
+
+        return MockResponse(text=json.dumps(activity_events_page([f'{day}-3'])))
+
+    def close(self):
+        pass
+
+
+class ActivityLogSyncTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.state_path = os.path.join(self.directory, 'state.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def client(self, session):
+        return PowerBIClient('https://api.powerbi.com', {'accessToken': 'token'}, Transport(session=session))
+
+    def test_sync_resumes_after_failure(self):
+        session = ActivityEventsSession(fail_once=True)
+        sync = ActivityLogSync(self.client(session).activity_logs, self.state_path, start=datetime.date(2019, 12, 16))
+        handled = []
+
+        with self.assertRaises(Exception):
+            sync.sync(lambda events: handled.extend(event['Id'] for event in events), until=datetime.date(2019, 12, 18))
+
+        self.assertEqual(['2019-12-16-1'], handled)
+        self.assertEqual(1, len([url for url in session.requests if 'continuationToken' not in url]))
+
+        count = sync.sync(lambda events: handled.extend(event['Id'] for event in events), until=datetime.date(2019, 12, 18))
+
+        # the first page is not fetched again
+        self.assertEqual(5, count)
+        self.assertEqual(['2019-12-16-1', '2019-12-16-2', '2019-12-16-3', '2019-12-17-1', '2019-12-17-2',
+                          '2019-12-17-3'], handled)
+        self.assertEqual(2, len([url for url in session.requests if 'continuationToken' not in url]))
+        self.assertEqual(datetime.datetime(2019, 12, 18, tzinfo=datetime.timezone.utc), sync.synced_until)
+
+    def test_steady_state_fetches_new_windows_only(self):
+        session = ActivityEventsSession()
+        activity_logs = self.client(session).activity_logs
+        handled = []
+
+        ActivityLogSync(activity_logs, self.state_path, start=datetime.date(2019, 12, 16)).sync(
+            handled.extend, until=datetime.date(2019, 12, 17))
+        session.requests.clear()
+
+        # the start is only used for the first sync
+        ActivityLogSync(activity_logs, self.state_path, start=datetime.date(2019, 1, 1)).sync(
+            handled.extend, until=datetime.datetime(2019, 12, 17, 12))
+
+        self.assertEqual(6, len(handled))
+        self.assertIn("startDateTime='2019-12-17T00:00:00'&endDateTime='2019-12-17T11:59:59'",
+                      urllib.parse.unquote(session.requests[0]))
+
+    def test_first_sync_requires_start(self):
+        sync = ActivityLogSync(self.client(ActivityEventsSession()).activity_logs, self.state_path)
+
+        with self.assertRaises(ValueError):
+            sync.sync(list)
@@ -0,0 +1,101 @@
+# -*- coding: future_fstrings -*-
+
+import json
+import threading
+import urllib.parse
+from unittest import TestCase
+
+from pypowerbi.admin import Admin
+from pypowerbi.client import PowerBIClient
+from pypowerbi.group import Group
+from pypowerbi.report import Report
+from pypowerbi.dataset import Dataset
+from pypowerbi.transport import Transport
+from pypowerbi.tests.transport_tests import MockResponse
+
+
+class GroupsSession:
+    def __init__(self, group_count):
+        self.headers = {}
+        self.requests = []
+        self.group_count = group_count
+        self._lock = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        with self._lock:
+            self.requests.append(url)
+
+        query = dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(url).query))
+        top = int(query['$top'])
+        skip = int(query.get('$skip', 0))
+
+        groups = [{
+            'id': f'g{x}',
+            'name': f'group {x}',
+            'capacityId': 'c1',
+            'type': 'Workspace',
+            'state': 'Active',
+            'reports': [{'id': f'r{x}', 'name': f'report {x}', 'datasetId': f'd{x}'}],
+            'datasets': [{'id': f'd{x}', 'name': f'dataset {x}'}],
+        } for x in range(skip, min(skip + top, self.group_count))]
+
+        return MockResponse(text=json.dumps({'value': groups}))
+
+    def close(self):
+        pass
+
+
+class AdminTests(TestCase):
+    def client(self, session):
+        return PowerBIClient('https://api.powerbi.com', {'accessToken': 'token'}, Transport(session=session))
+
+    def test_iter_groups_pages(self):
+        session = GroupsSession(25)
+
+        groups = list(self.client(session).admin.iter_groups(expand='reports,datasets', page_size=10))
+
+        self.assertEqual([f'g{x}' for x in range(25)], [group.id for group in groups])
+        self.assertEqual(3, len(session.requests))
+        self.assertIn('$expand=reports%2Cdatasets', session.requests[0])
+        self.assertIn('$skip=20', session.requests[2])
+
+    def test_iter_groups_is_lazy(self):
+        session = GroupsSession(25)
+
+        groups = self.client(session).admin.iter_groups(page_size=10, prefetch=False)
+        next(groups)
+
+        self.assertEqual(1, len(session.requests))
+        groups.close()
+
+    def test_iter_groups_exact_pages(self):
+        session = GroupsSession(20)
+
+        groups = list(self.client(session).admin.iter_groups(page_size=10))
+
+        self.assertEqual(20, len(groups))
+        # the empty third page ends the paging
+        self.assertEqual(3, len(session.requests))
+
+    def test_iter_groups_page_size(self):
+        session = GroupsSession(25)
+        admin = self.client(session).admin
+
+        for page_size in (0, Admin.max_groups_page_size + 1):
+            with self.assertRaises(ValueError):
+                admin.iter_groups(page_size=page_size)
+
+        self.assertEqual([], session.requests)
+
+    def test_expanded_group(self):
+        session = GroupsSession(1)
+
+        group = next(self.client(session).admin.iter_groups(expand='reports,datasets'))
+
+        self.assertIsInstance(group, Group)
+        self.assertEqual('c1', group.capacity_id)
+        self.assertEqual('Workspace', group.type)
+        self.assertIsInstance(group.reports[0], Report)
+        self.assertEqual('d0', group.reports[0].dataset_id)
+        self.assertIsInstance(group.datasets[0], Dataset)
+        self.assertIsNone(group.users)
@@ -0,0 +1,148 @@
+# -*- coding: future_fstrings -*-
+
+import json
+import asyncio
+import inspect
+from types import SimpleNamespace
+from unittest import TestCase
+
+from pypowerbi.async_client import AsyncPowerBIClient
+from pypowerbi.async_transport import AsyncTransport
+from pypowerbi.async_datasets import AsyncDatasets
+from pypowerbi.async_reports import AsyncReports
+from pypowerbi.async_groups import AsyncGroups
+from pypowerbi.async_gateways import AsyncGateways
+from pypowerbi.async_imports import AsyncImports
+from pypowerbi.datasets import Datasets
+from pypowerbi.reports import Reports
+from pypowerbi.groups import Groups
+from pypowerbi.gateways import Gateways
+from pypowerbi.imports import Imports
+from pypowerbi.retry import RetryPolicy
+from pypowerbi.dataset import Dataset
+from pypowerbi.report import Report
+
+
+class MockRawResponse:
+    def __init__(self, status, body, headers=None):
+        self.status = status
+        self.body = json.dumps(body).encode('utf-8')
+        self.headers = headers if headers is not None else {}
+
+    async def read(self):
+        return self.body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+class MockAsyncSession:
+    def __init__(self, bodies):
+        self.bodies = bodies
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def request(self, method, url, **kwargs):
+        self.requests.append((method, url, kwargs))
+        session = self
+
+        class Tracked(MockRawResponse):
+            async def __aenter__(self):
+                session.in_flight += 1
+                session.max_in_flight = max(session.max_in_flight, session.in_flight)
+                await asyncio.sleep(0)
+                return self
+
+            async def __aexit__(self, exc_type, exc_val, exc_tb):
+                session.in_flight -= 1
+
+        for suffix, body in self.bodies.items():
+            if url.endswith(suffix):
+                return Tracked(200, body)
+
+        return Tracked(404, {'error': 'not found'})
+
+    async def close(self):
+        pass
+
+
+class AsyncPowerBIClientTests(TestCase):
+    def test_returns_sync_models(self):
+        session = MockAsyncSession({
+            'datasets': {'value': [{'id': 'd1', 'name': 'dataset'}]},
+            'reports/': {'value': [{'id': 'r1', 'name': 'report'}]},
+        })
+        client = AsyncPowerBIClient('https://api.powerbi.com', {'accessToken': 'token'},
+                                    AsyncTransport(session=session))
+
+        async def run():
+            return await asyncio.gather(client.datasets.get_datasets('g1'), client.reports.get_reports('g1'))
+
+        datasets, reports = asyncio.run(run())
+
+        self.assertIsInstance(datasets[0], Dataset)
+        self.assertEqual('d1', datasets[0].id)
+        self.assertIsInstance(reports[0], Report)
+        self.assertEqual('https://api.powerbi.com/v1.0/myorg/groups/g1/datasets', session.requests[0][1])
+
+    def test_concurrency_is_bounded(self):
+        session = MockAsyncSession({'datasets': {'value': []}})
+        client = AsyncPowerBIClient('https://api.powerbi.com', {'accessToken': 'token'},
+                                    AsyncTransport(max_concurrency=3, session=session))
+
+        async def run():
+            await asyncio.gather(*[client.datasets.get_datasets(f'g{x}') for x in range(20)])
+
+        asyncio.run(run())
+
+        self.assertEqual(20, len(session.requests))
+        self.assertLessEqual(session.max_in_flight, 3)
+
+    def test_refresh_dataset_returns_request_id(self):
+        session = SimpleNamespace(requests=[])
+
+        def request(method, url, **kwargs):
+            session.requests.append((method, url))
+            return MockRawResponse(202, {}, {'RequestId': 'abc'})
+
+        session.request = request
+        client = AsyncPowerBIClient('https://api.powerbi.com', {'accessToken': 'token'},
+                                    AsyncTransport(session=session))
+
+        self.assertEqual('abc', asyncio.run(client.datasets.refresh_dataset('d1', group_id='g1')))
+        self.assertEqual(('POST', 'https://api.powerbi.com/v1.0/myorg/groups/g1/datasets/d1/refreshes'),
+                         session.requests[0])
+
+    def test_mirrors_sync_operations(self):
+        # conveniences built on the synchronous client only, see AsyncPowerBIClient
+        sync_only = {'get_datasets_listing', 'get_reports_listing', 'get_groups_listing', 'find_dataset_by_name',
+                     'find_report_by_name', 'find_group_by_name', 'wait_for_refresh', 'wait_for_refreshes'}
+
+        for sync_class, async_class in [(Datasets, AsyncDatasets), (Reports, AsyncReports), (Groups, AsyncGroups),
+                                        (Gateways, AsyncGateways), (Imports, AsyncImports)]:
+            for name, value in vars(sync_class).items():
+                if inspect.isfunction(value) and not name.startswith('_') and name not in sync_only:
+                    self.assertTrue(asyncio.iscoroutinefunction(getattr(async_class, name, None)),
+                                    f'{async_class.__name__}.{name}')
+
+    def test_retried_bodies_are_built_again(self):
+        responses = [MockRawResponse(429, {}, {'Retry-After': '0'}), MockRawResponse(200, {'value': []})]
+        session = SimpleNamespace(requests=[])
+
+        def request(method, url, **kwargs):
+            session.requests.append(kwargs['data'])
+            return responses.pop(0)
+
+        session.request = request
+        transport = AsyncTransport(session=session, retry_policy=RetryPolicy())
+        bodies = iter(['first', 'second'])
+
+        response = asyncio.run(transport.post('https://api.powerbi.com/v1.0/myorg/imports',
+                                              data_factory=lambda: next(bodies)))
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(['first', 'second'], session.requests)
@@ -0,0 +1,102 @@
+# -*- coding: future_fstrings -*-
+
+import os
+import datetime
+import tempfile
+from unittest import TestCase, mock
+
+from pypowerbi.authentication import TokenProvider, AdalTokenProvider, FileTokenCache, get_authentication_context
+from pypowerbi.client import PowerBIClient
+
+
+def make_token(access_token, expires_in_seconds):
+    expires_on = datetime.datetime.now() + datetime.timedelta(seconds=expires_in_seconds)
+    return {
+        'accessToken': access_token,
+        'expiresOn': str(expires_on),
+        'expiresIn': expires_in_seconds,
+    }
+
+
+class TokenProviderTests(TestCase):
+    def test_static_token(self):
+        client = PowerBIClient('https://api.powerbi.com', {'accessToken': 'static'})
+
+        self.assertEqual({'Authorization': 'Bearer static'}, client.auth_header)
+        self.assertEqual('static', client.token['accessToken'])
+        self.assertFalse(client.token_provider.can_refresh)
+
+    def test_expiry_from_token(self):
+        expires_at = TokenProvider.expiry_from_token(make_token('a', 3600))
+        remaining = (expires_at - datetime.datetime.now(datetime.timezone.utc)).total_seconds()
+
+        self.assertAlmostEqual(3600, remaining, delta=5)
+        self.assertIsNone(TokenProvider.expiry_from_token({'accessToken': 'a'}))
+
+    def test_refreshes_before_expiry(self):
+        tokens = [make_token('first', 100), make_token('second', 3600)]
+        calls = []
+
+        def acquire(**kwargs):
+            calls.append(kwargs)
+            return tokens.pop(0)
+
+        provider = AdalTokenProvider(acquire, resource='resource', background_refresh=False)
+
+        # the first token expires within the refresh margin, so the next lookup refreshes it
+        self.assertEqual('Bearer first', provider.auth_header['Authorization'])
+        self.assertEqual('Bearer second', provider.auth_header['Authorization'])
+        self.assertEqual('Bearer second', provider.auth_header['Authorization'])
+        self.assertEqual([{'resource': 'resource'}, {'resource': 'resource'}], calls)
+
+    def test_background_refresh_is_scheduled(self):
+        provider = AdalTokenProvider(lambda: make_token('token', 3600))
+        provider.refresh()
+
+        try:
+            self.assertIsNotNone(provider._timer)
+            self.assertTrue(provider._timer.daemon)
+        finally:
+            provider.close()
+
+        self.assertIsNone(provider._timer)
+
+
+class FileTokenCacheTests(TestCase):
+    def test_cache_is_persisted(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'tokens.json')
+
+            cache = FileTokenCache(path)
+            cache.add([{'_authority': 'authority', 'resource': 'resource', '_clientId': 'client', 'userId': 'user',
+                        'accessToken': 'cached'}])
+
+            self.assertTrue(os.path.exists(path))
+
+            reloaded = FileTokenCache(path)
+            entries = [entry for key, entry in reloaded.read_items()]
+            self.assertEqual('cached', entries[0]['accessToken'])
+
+
+class AuthenticationContextTests(TestCase):
+    def test_contexts_are_shared_per_authority(self):
+        context = get_authentication_context('https://login.windows.net/contoso.onmicrosoft.com')
+
+        self.assertIs(context, get_authentication_context('https://login.windows.net/contoso.onmicrosoft.com'))
+        self.assertIsNot(context, get_authentication_context('https://login.windows.net/fabrikam.onmicrosoft.com'))
+
+    def test_service_principal_requires_tenant(self):
+        with self.assertRaises(ValueError):
+            PowerBIClient.get_client_with_client_secret('client', 'secret')
+
+    @mock.patch('adal.AuthenticationContext.acquire_token_with_client_credentials')
+    def test_client_secret_factory(self, acquire):
+        acquire.return_value = make_token('service-principal', 3600)
+
+        client = PowerBIClient.get_client_with_client_secret('client', 'secret', tenant_id='contoso.onmicrosoft.com')
+        try:
+            self.assertEqual('Bearer service-principal', client.auth_header['Authorization'])
+            acquire.assert_called_once_with(resource=PowerBIClient.default_resource_url, client_id='client',
+                                            client_secret='secret')
+        finally:
+            client.close()
@@ -0,0 +1,81 @@
+# -*- coding: future_fstrings -*-
+
+import json
+import datetime
+from unittest import TestCase, skipUnless
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pandas
+except ImportError:
+    pandas = None
+
+from pypowerbi.client import PowerBIClient
+from pypowerbi.dataset import Row
+from pypowerbi.transport import Transport
+from pypowerbi.columnar import is_columnar, iter_row_dicts
+from pypowerbi.payload import PayloadEncoder
+from pypowerbi.tests.transport_tests import MockSession
+
+
+class ColumnarTests(TestCase):
+    def test_is_columnar(self):
+        self.assertTrue(is_columnar({'id': [1, 2]}))
+        self.assertFalse(is_columnar([{'id': 1}]))
+        self.assertFalse(is_columnar([Row(id=1)]))
+
+    def test_rows_from_column_lists(self):
+        rows = list(iter_row_dicts({'id': [1, 2, 3], 'name': ['a', 'b', 'c']}))
+
+        self.assertEqual([{'id': 1, 'name': 'a'}, {'id': 2, 'name': 'b'}, {'id': 3, 'name': 'c'}], rows)
+
+    def test_rows_from_row_objects(self):
+        rows = list(iter_row_dicts([Row(id=1, name='a'), {'id': 2, 'name': 'b'}]))
+
+        self.assertEqual([{'id': 1, 'name': 'a'}, {'id': 2, 'name': 'b'}], rows)
+
+    def test_column_lengths_must_match(self):
+        with self.assertRaises(ValueError):
+            list(iter_row_dicts({'id': [1, 2, 3], 'name': ['a', 'b']}))
+
+    def test_post_columnar_rows(self):
+        session = MockSession()
+        client = PowerBIClient('https://api.powerbi.com', {'accessToken': 'token'}, Transport(session=session))
+
+        client.datasets.post_rows('dataset', 'table', {'id': [1, 2], 'name': ['a', 'b']})
+
+        method, url, kwargs = session.requests[0]
+        self.assertEqual('POST', method.upper())
+        self.assertEqual({'rows': [{'id': 1, 'name': 'a'}, {'id': 2, 'name': 'b'}]}, json.loads(kwargs['data']))
+
+    @skipUnless(numpy is not None, 'numpy is not installed')
+    def test_rows_from_structured_array(self):
+        rows = numpy.array([(1, 0.5, '2020-01-02T03:04:05'), (2, numpy.nan, 'NaT')],
+                           dtype=[('id', 'i8'), ('value', 'f8'), ('at', 'datetime64[ns]')])
+
+        self.assertTrue(is_columnar(rows))
+        self.assertEqual({'rows': [{'id': 1, 'value': 0.5, 'at': '2020-01-02T03:04:05'},
+                                   {'id': 2, 'value': None, 'at': None}]}, json.loads(PayloadEncoder().encode(rows)))
+
+    @skipUnless(pandas is not None, 'pandas is not installed')
+    def test_rows_from_dataframe(self):
+        rows = pandas.DataFrame({
+            'id': [1, 2],
+            'name': ['a', 'b'],
+            'at': pandas.to_datetime(['2020-01-02 03:04:05.123456', None]),
+            'local': pandas.to_datetime(['2020-01-02 03:04:05', None]).tz_localize('Europe/Amsterdam'),
+        })
+
+        self.assertEqual([
+            {'id': 1, 'name': 'a', 'at': datetime.datetime(2020, 1, 2, 3, 4, 5, 123456),
+             'local': datetime.datetime(2020, 1, 2, 3, 4, 5, tzinfo=rows['local'][0].tzinfo)},
+            {'id': 2, 'name': 'b', 'at': None, 'local': None},
+        ], list(iter_row_dicts(rows)))
+        self.assertEqual({'rows': [
+            {'id': 1, 'name': 'a', 'at': '2020-01-02T03:04:05.123456', 'local': '2020-01-02T03:04:05+01:00'},
+            {'id': 2, 'name': 'b', 'at': None, 'local': None},
+        ]}, json.loads(PayloadEncoder().encode(rows)))
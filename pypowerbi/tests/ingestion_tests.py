@@ -0,0 +1,174 @@
+# -*- coding: future_fstrings -*-
+
+import json
+import time
+import random
+import threading
+from unittest import TestCase
+
+from requests.exceptions import HTTPError
+
+from pypowerbi.dataset import Row
+from pypowerbi.ingestion import RowIngestor, BufferedTable
+
+
+class MockDatasets:
+    def __init__(self, fail_on_call=None, jitter=0.0):
+        self.calls = []
+        self.fail_on_call = fail_on_call
+        self.jitter = jitter
+        self._lock = threading.Lock()
+
+    def post_payload(self, dataset_id, table_name, payload, group_id=None):
+        rows = json.loads(payload)['rows']
+
+        if self.jitter:
+            time.sleep(random.uniform(0, self.jitter))
+
+        with self._lock:
+            self.calls.append((dataset_id, table_name, list(rows), group_id))
+            if self.fail_on_call is not None and len(self.calls) == self.fail_on_call:
+                raise HTTPError('Post row request returned http error')
+
+
+class RowIngestorTests(TestCase):
+    def test_chunks_stay_within_row_limit(self):
+        datasets = MockDatasets()
+
+        with RowIngestor(datasets, rows_per_request=50000) as ingestor:
+            self.assertEqual(RowIngestor.max_rows_per_request, ingestor.rows_per_request)
+            result = ingestor.ingest('dataset', 'table', ({'id': x} for x in range(25001)))
+
+        self.assertEqual(25001, result.rows)
+        self.assertEqual(3, result.chunks)
+        self.assertEqual([10000, 10000, 5001], sorted((len(x[2]) for x in datasets.calls), reverse=True))
+        self.assertGreater(result.rows_per_second, 0)
+
+    def test_chunks_stay_within_byte_limit(self):
+        datasets = MockDatasets()
+        rows = [Row(id=x, name='x' * 100) for x in range(100)]
+
+        with RowIngestor(datasets, max_bytes_per_request=1000) as ingestor:
+            ingestor.ingest('dataset', 'table', rows)
+
+        self.assertEqual(100, sum(len(x[2]) for x in datasets.calls))
+        for call in datasets.calls:
+            self.assertLessEqual(len(call[2]), 8)
+
+    def test_preserve_order(self):
+        datasets = MockDatasets(jitter=0.005)
+
+        with RowIngestor(datasets, max_workers=8, rows_per_request=10, preserve_order=True) as ingestor:
+            ingestor.ingest('dataset', 'table', [{'id': x} for x in range(500)])
+
+        posted_ids = [row['id'] for call in datasets.calls for row in call[2]]
+        self.assertEqual(list(range(500)), posted_ids)
+
+    def test_failures_are_raised(self):
+        datasets = MockDatasets(fail_on_call=2)
+
+        with RowIngestor(datasets, max_workers=1, rows_per_request=10, preserve_order=True) as ingestor:
+            with self.assertRaises(HTTPError):
+                ingestor.ingest('dataset', 'table', [{'id': x} for x in range(100)])
+
+        # chunks after the failed one are not sent out of order
+        self.assertEqual(2, len(datasets.calls))
+
+    def test_ingest_after_failure(self):
+        datasets = MockDatasets(fail_on_call=1)
+
+        with RowIngestor(datasets, max_workers=2, rows_per_request=10, preserve_order=True) as ingestor:
+            with self.assertRaises(HTTPError):
+                ingestor.ingest('dataset', 'table', [{'id': x} for x in range(30)])
+
+            # the failure of the earlier call does not stop the rows of the next one
+            result = ingestor.ingest('dataset', 'table', [{'id': x} for x in range(100, 150)])
+            self.assertEqual(50, result.rows)
+            self.assertEqual({}, ingestor._tails)
+
+        posted_ids = [row['id'] for call in datasets.calls[1:] for row in call[2]]
+        self.assertEqual(list(range(100, 150)), posted_ids)
+
+
+class BufferedTableTests(TestCase):
+    def test_flush_on_row_count(self):
+        datasets = MockDatasets()
+
+        with BufferedTable(datasets, 'dataset', 'table', max_rows=100, max_latency=60,
+                           max_pending_flushes=1) as table:
+            threads = [threading.Thread(target=table.add_rows, args=([{'id': x} for x in range(y, y + 100)],))
+                       for y in range(0, 1000, 100)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(1000, table.rows_posted)
+        self.assertEqual(list(range(1000)), sorted(row['id'] for call in datasets.calls for row in call[2]))
+        self.assertTrue(all(len(call[2]) == 100 for call in datasets.calls))
+
+    def test_flush_waits_for_taken_chunks(self):
+        datasets = MockDatasets(jitter=0.2)
+        table = BufferedTable(datasets, 'dataset', 'table', max_rows=10, max_latency=60, max_pending_flushes=1)
+
+        # the first chunk holds the only flush slot, so the producer of the second one blocks before submitting it
+        table.add_rows([{'id': x} for x in range(10)])
+        producer = threading.Thread(target=table.add_rows, args=([{'id': x} for x in range(10, 20)],))
+        producer.start()
+
+        deadline = time.monotonic() + 5
+        while not table._taken and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+        table.flush()
+        self.assertEqual(list(range(20)), sorted(row['id'] for call in datasets.calls for row in call[2]))
+
+        producer.join()
+        table.close()
+
+    def test_full_buffer_is_sent_at_once(self):
+        datasets = MockDatasets()
+
+        with BufferedTable(datasets, 'dataset', 'table', max_rows=10, max_latency=60) as table:
+            table.add_rows([{'id': x} for x in range(10)])
+
+            deadline = time.monotonic() + 5
+            while not datasets.calls and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            self.assertEqual([list(range(10))], [[row['id'] for row in call[2]] for call in datasets.calls])
+
+    def test_flush_on_byte_size(self):
+        datasets = MockDatasets()
+
+        with BufferedTable(datasets, 'dataset', 'table', max_bytes=1000, max_latency=60) as table:
+            for x in range(100):
+                table.add({'id': x, 'name': 'x' * 100})
+
+        self.assertEqual(100, sum(len(call[2]) for call in datasets.calls))
+        self.assertTrue(all(len(call[2]) <= 8 for call in datasets.calls))
+
+    def test_flush_on_latency(self):
+        datasets = MockDatasets()
+
+        table = BufferedTable(datasets, 'dataset', 'table', group_id='group', max_latency=0.05)
+        table.add(Row(id=1))
+
+        deadline = time.monotonic() + 5
+        while not datasets.calls and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual([('dataset', 'table', [{'id': 1}], 'group')], datasets.calls)
+        table.close()
+
+    def test_flush_errors_are_raised(self):
+        datasets = MockDatasets(fail_on_call=1)
+        table = BufferedTable(datasets, 'dataset', 'table', max_latency=60)
+
+        table.add({'id': 1})
+        with self.assertRaises(HTTPError):
+            table.flush()
+
+        table.add({'id': 2})
+        table.close()
+        self.assertEqual(2, len(datasets.calls))
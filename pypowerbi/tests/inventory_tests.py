@@ -0,0 +1,272 @@
+# -*- coding: future_fstrings -*-
+
+import os
+import json
+import time
+import shutil
+import tempfile
+import threading
+import urllib.parse
+from unittest import TestCase
+
+from pypowerbi.client import PowerBIClient
+from pypowerbi.transport import Transport
+from pypowerbi.inventory import InventorySnapshot, InventoryScanner
+from pypowerbi.tests.transport_tests import MockResponse
+
+
+def user(identifier, right_key, right):
+    return {
+        right_key: right,
+        'displayName': f'user {identifier}',
+        'emailAddress': f'{identifier}@contoso.com',
+        'identifier': identifier,
+        'principalType': 'User',
+    }
+
+
+class TenantSession:
+    """
+    Serves the admin api of a tenant of group_count workspaces, each holding a report and a dataset, the report of
+    every workspace bound to the dataset of the first one as well, which is therefore listed by every workspace
+    """
+    def __init__(self, group_count, delay=0.0, failing_reports=()):
+        self.headers = {}
+        self.requests = []
+        self.group_count = group_count
+        self.delay = delay
+        self.failing_reports = set(failing_reports)
+        # changes to the tenant, by item id
+        self.report_names = {}
+        self.dataset_readers = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def groups(self, skip, top, expanded):
+        groups = []
+        for x in range(skip, min(skip + top, self.group_count)):
+            group = {'id': f'g{x}', 'name': f'group {x}', 'capacityId': 'c1', 'type': 'Workspace', 'state': 'Active'}
+            if expanded:
+                group['users'] = self.group_users(f'g{x}')
+                group['reports'] = self.reports(f'g{x}')
+                group['datasets'] = self.datasets(f'g{x}')
+            groups.append(group)
+
+        return groups
+
+    @staticmethod
+    def group_users(group_id):
+        return [user('admin', 'groupUserAccessRight', 'Admin'),
+                user(f'member-{group_id}', 'groupUserAccessRight', 'Member')]
+
+    def reports(self, group_id):
+        report_id = f'r-{group_id}'
+        return [{'id': report_id, 'name': self.report_names.get(report_id, f'report {group_id}'), 'datasetId': 'd-g0'}]
+
+    @staticmethod
+    def datasets(group_id):
+        # the shared dataset is listed by every workspace
+        return [{'id': f'd-{group_id}', 'name': f'dataset {group_id}'}, {'id': 'd-g0', 'name': 'dataset g0'}]
+
+    def request(self, method, url, **kwargs):
+        with self._lock:
+            self.requests.append(url)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+        try:
+            time.sleep(self.delay)
+            return self.respond(url)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def respond(self, url):
+        split = urllib.parse.urlsplit(url)
+        parts = [x for x in split.path.split('/') if x]
+        parts = parts[parts.index('admin') + 1:]
+
+        if parts == ['groups']:
+            query = dict(urllib.parse.parse_qsl(split.query))
+            value = self.groups(int(query.get('$skip', 0)), int(query['$top']), '$expand' in query)
+        elif parts[0] == 'groups' and parts[2] == 'users':
+            value = self.group_users(parts[1])
+        elif parts[0] == 'groups' and parts[2] == 'reports':
+            value = self.reports(parts[1])
+        elif parts[0] == 'groups' and parts[2] == 'datasets':
+            value = self.datasets(parts[1])
+        elif parts[0] == 'reports':
+            if parts[1] in self.failing_reports:
+                return MockResponse(status_code=404, text='{"error": "not found"}')
+            value = [user('admin', 'reportUserAccessRight', 'Owner')]
+        elif parts[0] == 'datasets':
+            value = [user('admin', 'datasetUserAccessRight', 'ReadWriteReshareExplore'),
+                     user(self.dataset_readers.get(parts[1], f'reader-{parts[1]}'), 'datasetUserAccessRight', 'Read')]
+        else:
+            raise AssertionError(f'Unexpected url {url}')
+
+        return MockResponse(text=json.dumps({'value': value}))
+
+    def close(self):
+        pass
+
+
+class InventoryScannerTests(TestCase):
+    def scanner(self, session, **kwargs):
+        client = PowerBIClient('https://api.powerbi.com', {'accessToken': 'token'}, Transport(session=session))
+        return InventoryScanner(client.admin, **kwargs)
+
+    def assert_inventory(self, snapshot, group_count):
+        self.assertEqual(len(snapshot.workspaces), group_count)
+        self.assertEqual(len(snapshot.reports), group_count)
+        self.assertEqual(len(snapshot.datasets), group_count)
+        self.assertEqual(snapshot.errors, [])
+
+        # the shared dataset belongs to whichever workspace listed it first
+        self.assertEqual({x['id'] for x in snapshot.workspace_datasets('g1')} - {'d-g0'}, {'d-g1'})
+        self.assertEqual(sorted(x['id'] for x in snapshot.dataset_reports('d-g0')),
+                         sorted(f'r-g{x}' for x in range(group_count)))
+        self.assertEqual([x['id'] for x in snapshot.workspace_reports('g2')], ['r-g2'])
+
+        # principals are stored once however many items they have access to
+        self.assertEqual(len(snapshot.principals), 1 + 2 * group_count)
+        self.assertEqual(snapshot.principals['admin']['emailAddress'], 'admin@contoso.com')
+
+        admin_access = snapshot.principal_access('admin')
+        self.assertEqual(len(admin_access), 3 * group_count)
+        self.assertEqual(admin_access[(InventorySnapshot.workspace_type, 'g3')], 'Admin')
+        self.assertEqual(admin_access[(InventorySnapshot.report_type, 'r-g3')], 'Owner')
+        self.assertEqual(snapshot.item_access(InventorySnapshot.dataset_type, 'd-g1'),
+                         {'admin': 'ReadWriteReshareExplore', 'reader-d-g1': 'Read'})
+
+    def test_scan_expanded(self):
+        session = TenantSession(10)
+        snapshot = self.scanner(session).scan()
+
+        self.assert_inventory(snapshot, 10)
+
+        # the shared dataset is stored once, in the first workspace that listed it
+        self.assertEqual(snapshot.datasets['d-g0'][InventorySnapshot.workspace_id_key], 'g0')
+
+        # one listing request, then the users of each report and each distinct dataset
+        self.assertEqual(len(session.requests), 1 + 10 + 10)
+        self.assertEqual(sum(1 for x in session.requests if x.endswith('/datasets/d-g0/users')), 1)
+
+    def test_scan_per_workspace(self):
+        session = TenantSession(10)
+        snapshot = self.scanner(session, expand=False).scan()
+
+        self.assert_inventory(snapshot, 10)
+        self.assertFalse(any('$expand' in x for x in session.requests))
+        self.assertEqual(len(session.requests), 1 + 3 * 10 + 10 + 10)
+
+    def test_scan_without_item_users(self):
+        session = TenantSession(5)
+        snapshot = self.scanner(session, include_item_users=False).scan()
+
+        self.assertEqual(len(session.requests), 1)
+        self.assertEqual(len(snapshot.reports), 5)
+        self.assertEqual(snapshot.item_access(InventorySnapshot.report_type, 'r-g0'), {})
+
+    def test_requests_are_concurrent_and_bounded(self):
+        session = TenantSession(20, delay=0.01)
+        self.scanner(session, max_workers=4).scan()
+
+        self.assertGreater(session.max_in_flight, 1)
+        # the prefetched listing page may run next to the pool
+        self.assertLessEqual(session.max_in_flight, 4 + 1)
+
+    def test_failed_items_are_recorded(self):
+        session = TenantSession(3, failing_reports=['r-g1'])
+        snapshot = self.scanner(session).scan()
+
+        self.assertEqual([(x[0], x[1]) for x in snapshot.errors], [(InventorySnapshot.report_type, 'r-g1')])
+        self.assertEqual(len(snapshot.reports), 3)
+        self.assertEqual(snapshot.item_access(InventorySnapshot.report_type, 'r-g0'), {'admin': 'Owner'})
+
+
+class InventorySnapshotTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def scanner(self, session):
+        client = PowerBIClient('https://api.powerbi.com', {'accessToken': 'token'}, Transport(session=session))
+        return InventoryScanner(client.admin)
+
+    def test_save_and_load(self):
+        snapshot = self.scanner(TenantSession(5)).scan()
+        path = os.path.join(self.directory, 'inventory.snapshot')
+        snapshot.save(path)
+
+        loaded = InventorySnapshot.load(path)
+
+        self.assertEqual(loaded.to_dict(), snapshot.to_dict())
+        self.assertEqual(loaded.taken_at, snapshot.taken_at)
+        self.assertEqual(len(loaded.dataset_reports('d-g0')), 5)
+        self.assertEqual(loaded.principal_access('admin'), snapshot.principal_access('admin'))
+        self.assertTrue(loaded.diff(snapshot).is_empty)
+        self.assertFalse(os.path.exists(f'{path}.tmp'))
+
+    def test_diff(self):
+        session = TenantSession(5)
+        previous = self.scanner(session).scan()
+
+        session.group_count = 6
+        session.report_names['r-g1'] = 'renamed'
+        session.dataset_readers['d-g2'] = 'new-reader'
+        current = self.scanner(session).scan()
+
+        diff = current.diff(previous)
+
+        self.assertEqual([x['id'] for x in diff.workspaces['added']], ['g5'])
+        self.assertEqual(diff.workspaces['removed'], [])
+        self.assertEqual(diff.reports['modified'], {'r-g1': {'name': ('report g1', 'renamed')}})
+        self.assertEqual({x['id'] for x in diff.datasets['added']}, {'d-g5'})
+        self.assertEqual(diff.access['removed'], {(InventorySnapshot.dataset_type, 'd-g2', 'reader-d-g2'): 'Read'})
+        self.assertIn((InventorySnapshot.dataset_type, 'd-g2', 'new-reader'), diff.access['added'])
+        self.assertIn((InventorySnapshot.workspace_type, 'g5', 'member-g5'), diff.access['added'])
+        self.assertFalse(diff.is_empty)
+
+        removed = previous.diff(current)
+        self.assertEqual([x['id'] for x in removed.workspaces['removed']], ['g5'])
+
+    def test_rescan_refetches_changed_workspaces_only(self):
+        session = TenantSession(10)
+        scanner = self.scanner(session)
+        previous = scanner.scan()
+
+        session.requests.clear()
+        unchanged = scanner.rescan(previous)
+
+        # only the listing is requested, everything else is carried over
+        self.assertEqual(len(session.requests), 1)
+        self.assertTrue(unchanged.diff(previous).is_empty)
+
+        session.requests.clear()
+        session.report_names['r-g4'] = 'renamed'
+        changed = scanner.rescan(previous)
+
+        self.assertEqual(sorted(x.split('/admin/')[1] for x in session.requests[1:]),
+                         ['datasets/d-g4/users', 'reports/r-g4/users'])
+        diff = changed.diff(previous)
+        self.assertEqual(list(diff.reports['modified']), ['r-g4'])
+        self.assertEqual(diff.access, {'added': {}, 'removed': {}, 'modified': {}})
+
+    def test_rescan_refetches_failed_workspaces(self):
+        session = TenantSession(3, failing_reports=['r-g1'])
+        scanner = self.scanner(session)
+        previous = scanner.scan()
+        self.assertNotIn('g1', previous.fingerprints)
+
+        session.failing_reports.clear()
+        session.requests.clear()
+        current = scanner.rescan(previous)
+
+        self.assertEqual(sorted(x.split('/admin/')[1] for x in session.requests[1:]),
+                         ['datasets/d-g1/users', 'reports/r-g1/users'])
+        self.assertEqual(current.errors, [])
+        self.assertEqual(current.item_access(InventorySnapshot.report_type, 'r-g1'), {'admin': 'Owner'})
@@ -0,0 +1,212 @@
+# -*- coding: future_fstrings -*-
+
+import io
+import json
+import time
+from unittest import TestCase
+
+from pypowerbi.client import PowerBIClient
+from pypowerbi.dataset import Dataset, Table, Column
+from pypowerbi.report import Report
+from pypowerbi.transport import Transport
+from pypowerbi.metadata_cache import MetadataCache, MetadataListing
+from pypowerbi.tests.transport_tests import MockResponse, MockSession
+
+
+def listing_response(items):
+    return MockResponse(text=json.dumps({'value': items}))
+
+
+class MetadataListingTests(TestCase):
+    def test_indexes(self):
+        listing = MetadataListing([Report('r1', 'sales', None, None, 'd1'), Report('r2', 'sales', None, None, 'd2'),
+                                   Report('r3', 'costs', None, None, 'd1')], time.monotonic() + 60)
+
+        self.assertEqual(len(listing), 3)
+        self.assertIn('r2', listing)
+        self.assertEqual(listing.get('r3').name, 'costs')
+        self.assertEqual([x.id for x in listing.find('sales')], ['r1', 'r2'])
+
+        listing.remove('r1')
+        self.assertEqual([x.id for x in listing.find('sales')], ['r2'])
+
+        listing.remove('r2')
+        self.assertEqual(listing.find('sales'), [])
+        self.assertNotIn('sales', listing.by_name)
+
+
+class MetadataCacheTests(TestCase):
+    def client(self, session, ttl=None):
+        return PowerBIClient('https://api.powerbi.com', {'accessToken': 'token'}, Transport(session=session),
+                             metadata_cache=MetadataCache(ttl))
+
+    def test_has_dataset_lists_once(self):
+        session = MockSession([listing_response([{'id': 'd1', 'name': 'sales'}, {'id': 'd2', 'name': 'costs'}])])
+        client = self.client(session)
+
+        for _ in range(10):
+            self.assertTrue(client.datasets.has_dataset('d1', 'g1'))
+            self.assertTrue(client.datasets.has_dataset('d2', 'g1'))
+        self.assertEqual(client.datasets.count('g1'), 2)
+
+        self.assertEqual(len(session.requests), 1)
+
+    def test_missing_id_is_answered_from_cache(self):
+        session = MockSession([listing_response([{'id': 'd1', 'name': 'sales'}]),
+                               listing_response([{'id': 'd1', 'name': 'sales'}, {'id': 'd2', 'name': 'costs'}])])
+        client = self.client(session)
+
+        for _ in range(5):
+            self.assertFalse(client.datasets.has_dataset('missing', 'g1'))
+        self.assertIsNone(client.datasets.find_dataset_by_name('costs', 'g1'))
+        self.assertEqual(len(session.requests), 1)
+
+        # created outside the client since the listing was cached
+        self.assertTrue(client.datasets.has_dataset('d2', 'g1', refresh=True))
+        self.assertEqual(client.datasets.find_dataset_by_name('costs', 'g1').id, 'd2')
+        self.assertEqual(len(session.requests), 2)
+
+    def test_listings_are_per_group(self):
+        session = MockSession([listing_response([{'id': 'r1', 'name': 'sales'}]),
+                               listing_response([{'id': 'r2', 'name': 'sales'}])])
+        client = self.client(session)
+
+        self.assertTrue(client.reports.has_report('r1', 'g1'))
+        self.assertFalse(client.reports.has_report('r1', 'g2'))
+        self.assertEqual(client.reports.get_report('r2', 'g2').name, 'sales')
+        self.assertEqual(len(session.requests), 2)
+
+    def test_get_listing_refreshes_cache(self):
+        session = MockSession([listing_response([{'id': 'd1', 'name': 'sales'}]),
+                               listing_response([{'id': 'd2', 'name': 'costs'}])])
+        client = self.client(session)
+
+        self.assertTrue(client.datasets.has_dataset('d1'))
+        client.datasets.get_datasets()
+
+        self.assertEqual(client.datasets.count(), 1)
+        self.assertTrue(client.datasets.has_dataset('d2'))
+        self.assertEqual(client.datasets.find_dataset_by_name('costs').id, 'd2')
+        self.assertEqual(len(session.requests), 2)
+
+    def test_ttl_expiry(self):
+        session = MockSession([listing_response([{'id': 'g1', 'name': 'finance'}]),
+                               listing_response([{'id': 'g1', 'name': 'finance'}, {'id': 'g2', 'name': 'sales'}])])
+        client = self.client(session, ttl=0.05)
+
+        self.assertEqual(client.groups.count(), 1)
+        self.assertEqual(client.groups.count(), 1)
+        time.sleep(0.1)
+        self.assertEqual(client.groups.count(), 2)
+        self.assertTrue(client.groups.has_group('g2'))
+        self.assertEqual(len(session.requests), 2)
+
+    def test_disabled_cache(self):
+        session = MockSession([listing_response([{'id': 'g1', 'name': 'finance'}]) for _ in range(3)])
+        client = self.client(session, ttl=0)
+
+        for _ in range(3):
+            self.assertTrue(client.groups.has_group('g1'))
+        self.assertEqual(len(session.requests), 3)
+
+    def test_filtered_groups_are_not_cached(self):
+        session = MockSession([listing_response([{'id': 'g1', 'name': 'finance'}]),
+                               listing_response([{'id': 'g1', 'name': 'finance'}, {'id': 'g2', 'name': 'sales'}])])
+        client = self.client(session)
+
+        client.groups.get_groups(filter_str="name eq 'finance'")
+        self.assertTrue(client.groups.has_group('g2'))
+        self.assertEqual(len(session.requests), 2)
+
+    def test_mutations_update_cache(self):
+        session = MockSession([
+            listing_response([{'id': 'd1', 'name': 'sales'}]),
+            MockResponse(status_code=201, text=json.dumps({'id': 'd2', 'name': 'costs'})),
+            MockResponse(),
+            listing_response([{'id': 'r1', 'name': 'sales', 'datasetId': 'd1'}]),
+            MockResponse(),
+            MockResponse(text=json.dumps({'id': 'r2', 'name': 'sales copy', 'datasetId': 'd2'})),
+            MockResponse(),
+        ])
+        client = self.client(session)
+
+        self.assertTrue(client.datasets.has_dataset('d1', 'g1'))
+        dataset = Dataset('costs', tables=[Table('t', columns=[Column('c', 'string')])])
+        client.datasets.post_dataset(dataset, 'g1')
+        self.assertTrue(client.datasets.has_dataset('d2', 'g1'))
+        client.datasets.delete_dataset('d1', 'g1')
+        self.assertFalse(client.datasets.has_dataset('d1', 'g1'))
+        self.assertEqual(client.datasets.count('g1'), 1)
+
+        original = client.reports.get_report('r1', 'g1')
+        client.reports.rebind_report('r1', 'd2', 'g1')
+        self.assertEqual(client.reports.get_report('r1', 'g1').dataset_id, 'd2')
+        # reports returned earlier are not changed
+        self.assertEqual(original.dataset_id, 'd1')
+
+        client.reports.clone_report('r1', 'sales copy', None, 'd2', 'g1')
+        self.assertEqual(client.reports.count('g1'), 2)
+        client.reports.delete_report('r1', 'g1')
+        self.assertFalse(client.reports.has_report('r1', 'g1'))
+        self.assertTrue(client.reports.has_report('r2', 'g1'))
+
+        # the mutating calls, and one listing per kind
+        self.assertEqual([x[0] for x in session.requests], ['GET', 'POST', 'DELETE', 'GET', 'POST', 'POST', 'DELETE'])
+
+    def test_create_group_and_import_update_cache(self):
+        session = MockSession([
+            listing_response([{'id': 'g1', 'name': 'finance'}]),
+            MockResponse(text=json.dumps({'id': 'g2', 'name': 'sales'})),
+            listing_response([{'id': 'd1', 'name': 'sales'}]),
+            MockResponse(status_code=202, text=json.dumps({'id': 'i1', 'name': 'sales'})),
+            listing_response([{'id': 'd1', 'name': 'sales'}, {'id': 'd2', 'name': 'imported'}]),
+        ])
+        client = self.client(session)
+
+        self.assertFalse(client.groups.has_group('g2'))
+        client.groups.create_group('sales')
+        self.assertTrue(client.groups.has_group('g2'))
+
+        self.assertEqual(client.datasets.count('g2'), 1)
+        client.imports.upload_file(io.BytesIO(b''), 'imported', group_id='g2')
+        self.assertEqual(client.datasets.count('g2'), 2)
+        self.assertEqual(len(session.requests), 5)
+
+    def test_invalidate(self):
+        cache = MetadataCache()
+        cache.put(MetadataCache.datasets_kind, 'g1', [])
+        cache.put(MetadataCache.datasets_kind, 'g2', [])
+        cache.put(MetadataCache.reports_kind, 'g1', [])
+
+        cache.invalidate(MetadataCache.datasets_kind, 'g1')
+        self.assertIsNone(cache.get(MetadataCache.datasets_kind, 'g1'))
+        self.assertIsNotNone(cache.get(MetadataCache.datasets_kind, 'g2'))
+
+        cache.invalidate(group_id='g1')
+        self.assertIsNone(cache.get(MetadataCache.reports_kind, 'g1'))
+
+        # None is the user's workspace, not every workspace
+        cache.put(MetadataCache.datasets_kind, None, [])
+        cache.invalidate(MetadataCache.datasets_kind, None)
+        self.assertIsNone(cache.get(MetadataCache.datasets_kind))
+        self.assertIsNotNone(cache.get(MetadataCache.datasets_kind, 'g2'))
+
+        cache.invalidate()
+        self.assertIsNone(cache.get(MetadataCache.datasets_kind, 'g2'))
+
+    def test_import_to_my_workspace_keeps_other_listings(self):
+        session = MockSession([
+            listing_response([{'id': 'd1', 'name': 'sales'}]),
+            listing_response([{'id': 'd2', 'name': 'costs'}]),
+            MockResponse(status_code=202, text=json.dumps({'id': 'i1', 'name': 'imported'})),
+            listing_response([{'id': 'd2', 'name': 'costs'}, {'id': 'd3', 'name': 'imported'}]),
+        ])
+        client = self.client(session)
+
+        self.assertEqual(client.datasets.count('g1'), 1)
+        self.assertEqual(client.datasets.count(), 1)
+        client.imports.upload_file(io.BytesIO(b''), 'imported')
+
+        self.assertEqual(client.datasets.count('g1'), 1)
+        self.assertEqual(client.datasets.count(), 2)
+        self.assertEqual(len(session.requests), 4)
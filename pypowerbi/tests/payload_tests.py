@@ -0,0 +1,63 @@
+# -*- coding: future_fstrings -*-
+
+import json
+import decimal
+import datetime
+from unittest import TestCase
+
+from pypowerbi.dataset import Row
+from pypowerbi.payload import PayloadEncoder, orjson
+
+
+class PayloadEncoderTests(TestCase):
+    def encoders(self):
+        encoders = [PayloadEncoder(use_orjson=False)]
+        if orjson is not None:
+            encoders.append(PayloadEncoder(use_orjson=True))
+        return encoders
+
+    def test_encode_rows(self):
+        for encoder in self.encoders():
+            payload = encoder.encode([Row(id=1, name='a'), {'id': 2, 'name': 'ü'}])
+
+            self.assertIsInstance(payload, bytes)
+            self.assertEqual({'rows': [{'id': 1, 'name': 'a'}, {'id': 2, 'name': 'ü'}]}, json.loads(payload))
+
+    def test_encode_special_values(self):
+        row = {
+            'timestamp': datetime.datetime(2019, 3, 5, 3, 9, 31, 493000),
+            'date': datetime.date(2019, 3, 5),
+            'amount': decimal.Decimal('12.50'),
+            'nan': float('nan'),
+            'inf': float('inf'),
+            'nan_decimal': decimal.Decimal('NaN'),
+        }
+
+        for encoder in self.encoders():
+            decoded = json.loads(encoder.encode([row]))['rows'][0]
+
+            self.assertEqual('2019-03-05T03:09:31.493000', decoded['timestamp'])
+            self.assertEqual('2019-03-05', decoded['date'])
+            self.assertEqual(12.5, decoded['amount'])
+            self.assertIsNone(decoded['nan'])
+            self.assertIsNone(decoded['inf'])
+            self.assertIsNone(decoded['nan_decimal'])
+
+    def test_encode_columnar_rows(self):
+        for encoder in self.encoders():
+            payload = encoder.encode({'id': [1, 2], 'value': [0.5, float('nan')]})
+
+            self.assertEqual({'rows': [{'id': 1, 'value': 0.5}, {'id': 2, 'value': None}]}, json.loads(payload))
+
+    def test_buffer_reused(self):
+        encoder = PayloadEncoder()
+
+        first = encoder.encode([{'id': x} for x in range(100)])
+        second = encoder.encode([{'id': 1}])
+
+        self.assertEqual(100, len(json.loads(first)['rows']))
+        self.assertEqual(b'{"rows":[{"id":1}]}', second)
+
+    def test_empty_payload(self):
+        self.assertEqual(b'{"rows":[]}', PayloadEncoder().encode([]))
+        self.assertEqual(len(b'{"rows":[]}'), PayloadEncoder.wrapper_size())
@@ -0,0 +1,63 @@
+# -*- coding: future_fstrings -*-
+
+from unittest import TestCase, mock
+
+from pypowerbi.rate_limit import TokenBucket, RateLimiter
+from pypowerbi.transport import Transport
+from pypowerbi.tests.transport_tests import MockSession
+
+
+class TokenBucketTests(TestCase):
+    def test_burst_then_wait(self):
+        bucket = TokenBucket(rate=2, per=1.0)
+
+        self.assertEqual(0, bucket.reserve())
+        self.assertEqual(0, bucket.reserve())
+        # the bucket is empty, callers queue up behind each other
+        self.assertAlmostEqual(0.5, bucket.reserve(), places=2)
+        self.assertAlmostEqual(1.0, bucket.reserve(), places=2)
+
+    def test_invalid_rate(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=0)
+
+
+class RateLimiterTests(TestCase):
+    activity_url = "https://api.powerbi.com/v1.0/myorg/admin/activityevents?startDateTime='2020-01-01T00:00:00'"
+    admin_url = 'https://api.powerbi.com/v1.0/myorg/admin/groups?$top=5000'
+    datasets_url = 'https://api.powerbi.com/v1.0/myorg/datasets'
+
+    def test_powerbi_default_budgets(self):
+        rate_limiter = RateLimiter.powerbi_defaults(user_rate=1000)
+
+        activity_budget = rate_limiter.get_budget(RateLimiter.activity_events_budget)
+        admin_budget = rate_limiter.get_budget(RateLimiter.admin_budget)
+        user_budget = rate_limiter.get_budget(RateLimiter.user_budget)
+
+        self.assertTrue(activity_budget.matches('/v1.0/myorg/admin/activityevents'))
+        self.assertFalse(admin_budget.matches('/v1.0/myorg/admin/activityevents'))
+        self.assertTrue(admin_budget.matches('/v1.0/myorg/admin/groups'))
+        self.assertFalse(admin_budget.matches('/v1.0/myorg/datasets'))
+        self.assertTrue(user_budget.matches('/v1.0/myorg/datasets'))
+
+    def test_budgets_are_independent(self):
+        rate_limiter = RateLimiter()
+        rate_limiter.add_budget('admin', 1, 3600.0, RateLimiter.admin_pattern)
+
+        self.assertEqual(0, rate_limiter.reserve('GET', self.admin_url))
+        self.assertAlmostEqual(3600, rate_limiter.reserve('GET', self.admin_url), delta=1)
+        self.assertEqual(0, rate_limiter.reserve('GET', self.datasets_url))
+        self.assertIn('admin', rate_limiter.waited)
+
+    @mock.patch('pypowerbi.rate_limit.time.sleep')
+    def test_transport_waits(self, sleep):
+        rate_limiter = RateLimiter()
+        rate_limiter.add_budget('activityevents', 1, 10.0, RateLimiter.activity_events_pattern)
+        transport = Transport(session=MockSession(), rate_limiter=rate_limiter)
+
+        transport.get(self.activity_url)
+        sleep.assert_not_called()
+
+        transport.get(self.activity_url)
+        self.assertEqual(1, sleep.call_count)
+        self.assertAlmostEqual(10, sleep.call_args[0][0], delta=0.1)
@@ -0,0 +1,161 @@
+# -*- coding: future_fstrings -*-
+
+import datetime
+import threading
+import collections
+from types import SimpleNamespace
+from unittest import TestCase
+
+from requests.exceptions import HTTPError
+
+from pypowerbi.client import PowerBIClient
+from pypowerbi.transport import Transport
+from pypowerbi.refresh_orchestrator import DatasetRefresh, RefreshOrchestrator
+from pypowerbi.refresh_poller import RefreshPoller
+from pypowerbi.tests.transport_tests import MockResponse, MockSession
+
+
+class MockRefreshDatasets:
+    """
+    Simulates refreshes that finish after a number of refresh history checks, recording the number of refreshes
+    running at once per group and capacity
+    """
+    def __init__(self, capacities, polls=2, failures=None, start_failures=None, request_ids=True):
+        self.capacities = capacities
+        self.polls = polls
+        # the number of times the refreshes of a dataset fail, or fail to start, before they succeed
+        self.failures = collections.Counter(failures or {})
+        self.start_failures = collections.Counter(start_failures or {})
+        self.request_ids = request_ids
+        self.started = []
+        self.history = collections.defaultdict(list)
+        self.running = {}
+        self.max_running = collections.Counter()
+        self._lock = threading.Lock()
+
+    def _running_counts(self):
+        counts = collections.Counter()
+        for group_id, _ in self.running:
+            counts[('workspace', group_id)] += 1
+            counts[('capacity', self.capacities.get(group_id))] += 1
+        return counts
+
+    def refresh_dataset(self, dataset_id, notify_option=None, group_id=None):
+        with self._lock:
+            if self.start_failures[dataset_id]:
+                self.start_failures[dataset_id] -= 1
+                raise HTTPError('Too many refreshes')
+
+            request_id = f'{dataset_id}-{len(self.started)}'
+            self.started.append((group_id, dataset_id))
+            entry = {
+                'requestId': request_id if self.request_ids else None,
+                'status': 'Unknown',
+                'startTime': datetime.datetime.utcnow(),
+                'endTime': None,
+            }
+            self.history[dataset_id].insert(0, entry)
+            self.running[(group_id, dataset_id)] = [entry, self.polls]
+
+            for key, count in self._running_counts().items():
+                self.max_running[key] = max(self.max_running[key], count)
+
+            return request_id if self.request_ids else None
+
+    def get_dataset_refresh_history(self, dataset_id, group_id=None, top=None):
+        with self._lock:
+            state = self.running.get((group_id, dataset_id))
+            if state is not None:
+                state[1] -= 1
+                if state[1] <= 0:
+                    entry = state[0]
+                    if self.failures[dataset_id]:
+                        self.failures[dataset_id] -= 1
+                        entry['status'] = 'Failed'
+                        entry['serviceExceptionJson'] = '{"errorCode": "ModelRefreshFailed"}'
+                    else:
+                        entry['status'] = 'Completed'
+                    entry['endTime'] = datetime.datetime.utcnow()
+                    del self.running[(group_id, dataset_id)]
+
+            return [dict(x) for x in self.history[dataset_id][:top]]
+
+
+class RefreshOrchestratorTests(TestCase):
+    capacities = {'g1': 'c1', 'g2': 'c1', 'g3': 'c2', 'g4': None}
+
+    def orchestrator(self, datasets, **kwargs):
+        client = SimpleNamespace(datasets=datasets)
+        kwargs.setdefault('poller', RefreshPoller(datasets, min_interval=0.001, max_interval=0.01,
+                                                  initial_interval=0.001))
+        kwargs.setdefault('retry_delay', 0)
+        return RefreshOrchestrator(client, capacities=self.capacities, **kwargs)
+
+    def test_refreshes_within_limits(self):
+        datasets = MockRefreshDatasets(self.capacities)
+        pairs = [(f'g{x % 4 + 1}', f'd{x}') for x in range(24)]
+
+        results = self.orchestrator(datasets, max_per_capacity=3, max_per_workspace=2).run(pairs)
+
+        self.assertEqual(list(results), pairs)
+        self.assertTrue(all(x.succeeded and x.attempts == 1 for x in results.values()))
+        self.assertEqual(len(datasets.started), 24)
+
+        self.assertLessEqual(datasets.max_running[('capacity', 'c1')], 3)
+        self.assertLessEqual(datasets.max_running[('capacity', 'c2')], 2)
+        for group_id in self.capacities:
+            self.assertLessEqual(datasets.max_running[('workspace', group_id)], 2)
+        # the limits are filled, not just respected
+        self.assertEqual(datasets.max_running[('capacity', 'c1')], 3)
+
+    def test_duplicates_are_refreshed_once(self):
+        datasets = MockRefreshDatasets(self.capacities)
+        results = self.orchestrator(datasets).run([('g1', 'd1'), ('g1', 'd1')])
+
+        self.assertEqual(len(results), 1)
+        self.assertEqual(datasets.started, [('g1', 'd1')])
+
+    def test_failures_are_retried(self):
+        datasets = MockRefreshDatasets(self.capacities, failures={'d1': 1, 'd2': 5}, start_failures={'d3': 1})
+        results = self.orchestrator(datasets, max_attempts=3).run([('g1', 'd1'), ('g2', 'd2'), ('g3', 'd3')])
+
+        self.assertTrue(results[('g1', 'd1')].succeeded)
+        self.assertEqual(results[('g1', 'd1')].attempts, 2)
+
+        failed = results[('g2', 'd2')]
+        self.assertEqual(failed.status, DatasetRefresh.failed_status)
+        self.assertEqual(failed.attempts, 3)
+        self.assertIn('ModelRefreshFailed', failed.error)
+
+        self.assertTrue(results[('g3', 'd3')].succeeded)
+        self.assertEqual(results[('g3', 'd3')].attempts, 2)
+
+    def test_refreshes_without_request_ids(self):
+        datasets = MockRefreshDatasets(self.capacities, request_ids=False)
+        results = self.orchestrator(datasets).run([('g1', 'd1'), ('g4', 'd2')])
+
+        self.assertTrue(all(x.succeeded for x in results.values()))
+        self.assertEqual(results[('g4', 'd2')].refresh['status'], 'Completed')
+
+    def test_refresh_timeout(self):
+        datasets = MockRefreshDatasets(self.capacities, polls=10 ** 6)
+        results = self.orchestrator(datasets, refresh_timeout=0.05).run([('g1', 'd1')])
+
+        self.assertEqual(results[('g1', 'd1')].status, DatasetRefresh.timed_out_status)
+        self.assertEqual(results[('g1', 'd1')].attempts, 1)
+
+    def test_capacity_from_groups_listing(self):
+        groups = {'g1': SimpleNamespace(capacity_id='c1'), 'g2': SimpleNamespace(capacity_id=None)}
+        client = SimpleNamespace(groups=SimpleNamespace(get_groups_listing=lambda: groups))
+        orchestrator = RefreshOrchestrator(client)
+
+        self.assertEqual(orchestrator.capacity_of('g1'), 'c1')
+        self.assertIsNone(orchestrator.capacity_of('g2'))
+        self.assertIsNone(orchestrator.capacity_of('g3'))
+        self.assertIsNone(orchestrator.capacity_of(None))
+
+    def test_refresh_dataset_returns_request_id(self):
+        session = MockSession([MockResponse(status_code=202, text='', headers={'RequestId': 'abc'})])
+        client = PowerBIClient('https://api.powerbi.com', {'accessToken': 'token'}, Transport(session=session))
+
+        self.assertEqual(client.datasets.refresh_dataset('d1', group_id='g1'), 'abc')
@@ -0,0 +1,181 @@
+# -*- coding: future_fstrings -*-
+
+import json
+import datetime
+import threading
+import collections
+from unittest import TestCase, mock
+
+from pypowerbi.client import PowerBIClient
+from pypowerbi.transport import Transport
+from pypowerbi.refresh_poller import RefreshPoller, RefreshWatch
+from pypowerbi.tests.transport_tests import MockResponse, MockSession
+
+
+def history_entry(request_id, status, started_seconds_ago, duration=None):
+    start_time = RefreshPoller.utc_now() - datetime.timedelta(seconds=started_seconds_ago)
+    return {
+        'requestId': request_id,
+        'status': status,
+        'startTime': start_time,
+        'endTime': start_time + datetime.timedelta(seconds=duration) if duration is not None else None,
+    }
+
+
+class HistoryDatasets:
+    """
+    Serves refresh histories that are changed by the test, counting the history calls per dataset
+    """
+    def __init__(self, histories):
+        self.histories = histories
+        self.calls = collections.Counter()
+        self._lock = threading.Lock()
+
+    def get_dataset_refresh_history(self, dataset_id, group_id=None, top=None):
+        with self._lock:
+            self.calls[dataset_id] += 1
+            return [dict(x) for x in self.histories[dataset_id][:top]]
+
+
+class RefreshPollerTests(TestCase):
+    def poller(self, datasets, **kwargs):
+        kwargs.setdefault('min_interval', 0.05)
+        kwargs.setdefault('max_interval', 0.1)
+        kwargs.setdefault('initial_interval', 0.01)
+        return RefreshPoller(datasets, **kwargs)
+
+    def test_match_refresh(self):
+        history = [history_entry('r3', 'Unknown', 1), history_entry('r2', 'Completed', 100, 10),
+                   history_entry('r1', 'Failed', 200, 10)]
+
+        self.assertEqual(RefreshPoller.match_refresh(history, 'r2')['requestId'], 'r2')
+        self.assertIsNone(RefreshPoller.match_refresh(history, 'r0'))
+        # without a request id, the newest refresh, or the newest one started after the trigger
+        self.assertEqual(RefreshPoller.match_refresh(history)['requestId'], 'r3')
+        triggered_at = RefreshPoller.utc_now() - datetime.timedelta(seconds=150)
+        self.assertEqual(RefreshPoller.match_refresh(history[1:], triggered_at=triggered_at)['requestId'], 'r2')
+        self.assertIsNone(RefreshPoller.match_refresh(history[2:], triggered_at=triggered_at))
+
+    def test_expected_duration(self):
+        history = [history_entry('r4', 'Unknown', 1), history_entry('r3', 'Completed', 100, 30),
+                   history_entry('r2', 'Failed', 200, 5), history_entry('r1', 'Completed', 300, 50),
+                   history_entry('r0', 'Completed', 400, 40)]
+
+        self.assertEqual(RefreshPoller.expected_duration(history), 40)
+        self.assertIsNone(RefreshPoller.expected_duration(history[:1]))
+
+    def test_batches_checks_per_dataset(self):
+        datasets = HistoryDatasets({
+            'd1': [history_entry('r2', 'Completed', 5, 1), history_entry('r1', 'Failed', 10, 1)],
+            'd2': [history_entry('r3', 'Completed', 5, 1)],
+        })
+
+        with self.poller(datasets) as poller:
+            entries = poller.wait([('d1', 'g1', 'r1'), ('d1', 'g1', 'r2'), ('d2', 'g1', 'r3')], timeout=5)
+
+        self.assertEqual([x['status'] for x in entries], ['Failed', 'Completed', 'Completed'])
+        self.assertEqual(datasets.calls, {'d1': 1, 'd2': 1})
+
+    def test_resolves_when_finished(self):
+        running = history_entry('r1', 'Unknown', 0)
+        datasets = HistoryDatasets({'d1': [running]})
+
+        with self.poller(datasets, min_interval=0.001, max_interval=0.01, initial_interval=0.001) as poller:
+            future = poller.watch('d1', request_id='r1')
+            self.assertFalse(future.done())
+
+            running['status'] = 'Completed'
+            self.assertEqual(future.result(timeout=5)['status'], 'Completed')
+
+        self.assertGreater(datasets.calls['d1'], 0)
+
+    def test_ignores_earlier_refreshes(self):
+        datasets = HistoryDatasets({'d1': [history_entry('r1', 'Completed', 100, 10)]})
+
+        with self.poller(datasets, min_interval=0.001, max_interval=0.01, initial_interval=0.001) as poller:
+            # without a request id or trigger time, only a refresh started from now on is watched
+            future = poller.watch('d1')
+            with self.assertRaises(TimeoutError):
+                poller.wait([('d1', None, None, RefreshPoller.utc_now())], timeout=0.05)
+            self.assertFalse(future.done())
+
+            datasets.histories['d1'] = [history_entry('r2', 'Completed', 0, 0)] + datasets.histories['d1']
+            self.assertEqual(future.result(timeout=5)['requestId'], 'r2')
+
+    def test_unlisted_refresh_fails(self):
+        datasets = HistoryDatasets({'d1': [history_entry('r1', 'Completed', 100, 10)]})
+
+        with self.poller(datasets, min_interval=0.001, max_interval=0.01, initial_interval=0.001,
+                         max_unlisted_checks=3) as poller:
+            future = poller.watch('d1', request_id='r0')
+            self.assertIsInstance(future.exception(timeout=5), LookupError)
+
+        self.assertEqual(datasets.calls['d1'], 3)
+
+    def test_timeout(self):
+        datasets = HistoryDatasets({'d1': [history_entry('r1', 'Unknown', 0)]})
+
+        with self.poller(datasets) as poller:
+            future = poller.watch('d1', request_id='r1', timeout=0.2)
+            self.assertIsInstance(future.exception(timeout=5), TimeoutError)
+
+            with self.assertRaises(TimeoutError):
+                poller.wait([('d1', None, 'r1')], timeout=0.2)
+
+    def test_closed_poller_cancels_watches(self):
+        datasets = HistoryDatasets({'d1': []})
+        poller = self.poller(datasets, initial_interval=60)
+        future = poller.watch('d1')
+        poller.close()
+
+        self.assertTrue(future.cancelled())
+        with self.assertRaises(ValueError):
+            poller.watch('d1')
+
+    def test_intervals_follow_history(self):
+        history = [history_entry('r1', 'Completed', 300, 60), history_entry('r0', 'Completed', 600, 60)]
+        datasets = HistoryDatasets({'d1': history})
+        poller = RefreshPoller(datasets, min_interval=1, max_interval=300, initial_interval=15, backoff=2)
+
+        def check(started_seconds_ago):
+            if started_seconds_ago is None:
+                datasets.histories['d1'] = history
+            else:
+                datasets.histories['d1'] = [history_entry('r2', 'Unknown', started_seconds_ago)] + history
+
+            watch = RefreshWatch('d1', 'g1', 'r2', None, None)
+            watch.interval = 15
+            poller._check('d1', 'g1', [watch])
+            return watch.interval
+
+        # not listed yet
+        self.assertEqual(check(None), 1)
+        # the next check is made when the refresh is expected to be done
+        self.assertAlmostEqual(check(10), 50, delta=1)
+        # running longer than expected, backing off
+        self.assertEqual(check(90), 30)
+        self.assertEqual(poller.expected_durations[('g1', 'd1')], 60)
+
+        # the learnt duration schedules the first check of the next refresh
+        poller.watch('d1', 'g1', 'r3')
+        self.assertEqual(poller._due[-1][2].interval, 60)
+        poller.close()
+
+    def test_datasets_wait_for_refreshes(self):
+        def history_response(status):
+            return MockResponse(text=json.dumps({'value': [{
+                'requestId': 'r1', 'status': status, 'startTime': '2020-01-01T10:00:00.000Z',
+                'endTime': '2020-01-01T10:01:00.000Z' if status != 'Unknown' else None}]}))
+
+        session = MockSession([history_response('Unknown'), history_response('Completed')])
+        client = PowerBIClient('https://api.powerbi.com', {'accessToken': 'token'}, Transport(session=session))
+
+        with mock.patch.object(RefreshPoller, 'default_initial_interval', 0.001), \
+                mock.patch.object(RefreshPoller, 'default_min_interval', 0.001):
+            entry = client.datasets.wait_for_refresh('d1', 'g1', 'r1', timeout=5)
+
+        self.assertEqual(entry['status'], 'Completed')
+        self.assertEqual(entry['endTime'], datetime.datetime(2020, 1, 1, 10, 1))
+        self.assertEqual(len(session.requests), 2)
+        self.assertIn('/groups/g1/', session.requests[0][1])
+        self.assertTrue(session.requests[0][1].endswith(f'refreshes?$top={RefreshPoller.history_top}'))
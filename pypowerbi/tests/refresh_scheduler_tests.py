@@ -0,0 +1,135 @@
+# -*- coding: future_fstrings -*-
+
+from types import SimpleNamespace
+from unittest import TestCase
+
+from pypowerbi.refresh_orchestrator import DatasetRefresh, RefreshOrchestrator
+from pypowerbi.refresh_poller import RefreshPoller
+from pypowerbi.refresh_scheduler import RefreshScheduler
+from pypowerbi.tests.refresh_orchestrator_tests import MockRefreshDatasets
+
+
+class RefreshSchedulerTests(TestCase):
+    capacities = {'g1': 'c1', 'g2': 'c1', 'g3': 'c2'}
+
+    def scheduler(self, datasets, **kwargs):
+        client = SimpleNamespace(datasets=datasets)
+        kwargs.setdefault('poller', RefreshPoller(datasets, min_interval=0.001, max_interval=0.01,
+                                                  initial_interval=0.001))
+        kwargs.setdefault('retry_delay', 0)
+        return RefreshScheduler(client, RefreshOrchestrator(client, capacities=self.capacities, **kwargs))
+
+    def assertRefreshedAfter(self, datasets, dataset_id, parent_id):
+        child = datasets.history[dataset_id][0]
+        parent = datasets.history[parent_id][0]
+        self.assertEqual(parent['status'], 'Completed')
+        self.assertGreaterEqual(child['startTime'], parent['endTime'])
+
+    def test_topological_order(self):
+        dependencies = {('g1', 'd3'): [('g1', 'd2')], ('g1', 'd2'): [('g1', 'd1')], ('g2', 'd4'): []}
+        order = RefreshScheduler.topological_order(dependencies)
+
+        self.assertEqual(len(order), 4)
+        self.assertLess(order.index(('g1', 'd1')), order.index(('g1', 'd2')))
+        self.assertLess(order.index(('g1', 'd2')), order.index(('g1', 'd3')))
+
+    def test_cycle(self):
+        dependencies = {('g1', 'd1'): [('g1', 'd3')], ('g1', 'd2'): [('g1', 'd1')], ('g1', 'd3'): [('g1', 'd2')],
+                        ('g1', 'd4'): []}
+
+        with self.assertRaises(ValueError):
+            RefreshScheduler.topological_order(dependencies)
+
+        datasets = MockRefreshDatasets(self.capacities)
+        with self.assertRaises(ValueError):
+            self.scheduler(datasets).run(dependencies)
+        self.assertEqual(datasets.started, [])
+
+    def test_parents_refresh_first(self):
+        datasets = MockRefreshDatasets(self.capacities)
+        # a diamond in g1 and g2, and an independent chain in g3
+        dependencies = {
+            ('g2', 'd2'): [('g1', 'd1')],
+            ('g2', 'd3'): [('g1', 'd1')],
+            ('g2', 'd4'): [('g2', 'd2'), ('g2', 'd3')],
+            ('g3', 'd6'): [('g3', 'd5')],
+        }
+
+        results = self.scheduler(datasets).run(dependencies)
+
+        self.assertEqual(len(results), 6)
+        self.assertTrue(all(x.succeeded and x.attempts == 1 for x in results.values()))
+        self.assertRefreshedAfter(datasets, 'd2', 'd1')
+        self.assertRefreshedAfter(datasets, 'd3', 'd1')
+        self.assertRefreshedAfter(datasets, 'd4', 'd2')
+        self.assertRefreshedAfter(datasets, 'd4', 'd3')
+        self.assertRefreshedAfter(datasets, 'd6', 'd5')
+
+        # independent branches run in parallel
+        self.assertEqual(set(datasets.started[:2]), {('g1', 'd1'), ('g3', 'd5')})
+        self.assertEqual(datasets.max_running[('workspace', 'g2')], 2)
+
+    def test_failure_cancels_downstream(self):
+        datasets = MockRefreshDatasets(self.capacities, failures={'d2': 5})
+        dependencies = {
+            ('g1', 'd2'): [('g1', 'd1')],
+            ('g1', 'd3'): [('g1', 'd2')],
+            ('g1', 'd4'): [('g1', 'd3'), ('g1', 'd1')],
+            ('g1', 'd5'): [('g1', 'd1')],
+        }
+
+        results = self.scheduler(datasets, max_attempts=2).run(dependencies)
+
+        self.assertEqual(results[('g1', 'd2')].status, DatasetRefresh.failed_status)
+        self.assertEqual(results[('g1', 'd2')].attempts, 2)
+        for dataset_id in ('d3', 'd4'):
+            self.assertEqual(results[('g1', dataset_id)].status, DatasetRefresh.cancelled_status)
+            self.assertEqual(results[('g1', dataset_id)].attempts, 0)
+            self.assertIn('d2', results[('g1', dataset_id)].error)
+        self.assertTrue(results[('g1', 'd1')].succeeded)
+        self.assertTrue(results[('g1', 'd5')].succeeded)
+
+        self.assertNotIn(('g1', 'd3'), datasets.started)
+        self.assertNotIn(('g1', 'd4'), datasets.started)
+
+    def test_limits(self):
+        datasets = MockRefreshDatasets(self.capacities)
+        dependencies = {(f'g{x % 3 + 1}', f'd{x}'): [('g3', 'root')] for x in range(12)}
+
+        results = self.scheduler(datasets, max_per_capacity=3, max_per_workspace=2).run(dependencies)
+
+        self.assertEqual(list(results)[0], ('g3', 'root'))
+        self.assertTrue(all(x.succeeded for x in results.values()))
+        self.assertLessEqual(datasets.max_running[('capacity', 'c1')], 3)
+        for group_id in self.capacities:
+            self.assertLessEqual(datasets.max_running[('workspace', group_id)], 2)
+
+    def test_waits_for_retries_without_spinning(self):
+        datasets = MockRefreshDatasets(self.capacities, failures={'d1': 1})
+        orchestrator = self.scheduler(datasets, max_attempts=2, retry_delay=0.2).orchestrator
+        parent = DatasetRefresh('g1', 'd1', 'c1')
+        child = DatasetRefresh('g1', 'd2', 'c1')
+        ready_calls = []
+
+        def ready(refresh):
+            ready_calls.append(refresh.dataset_id)
+            return refresh is parent or parent.succeeded
+
+        orchestrator.run_refreshes([parent, child], ready)
+
+        self.assertTrue(parent.succeeded and child.succeeded)
+        self.assertEqual(parent.attempts, 2)
+        # the child is looked at when the parent finishes or its retry is due, not continuously
+        self.assertLess(ready_calls.count('d2'), 10)
+
+    def test_refreshes_never_ready_are_cancelled(self):
+        datasets = MockRefreshDatasets(self.capacities)
+        orchestrator = self.scheduler(datasets).orchestrator
+        refresh = DatasetRefresh('g1', 'd1', 'c1')
+        finished = []
+
+        orchestrator.run_refreshes([refresh], lambda x: False, finished.append)
+
+        self.assertEqual(refresh.status, DatasetRefresh.cancelled_status)
+        self.assertEqual(finished, [refresh])
+        self.assertEqual(datasets.started, [])
@@ -0,0 +1,138 @@
+# -*- coding: future_fstrings -*-
+
+import json
+import threading
+import urllib.parse
+from unittest import TestCase
+
+from pypowerbi.client import PowerBIClient
+from pypowerbi.transport import Transport
+from pypowerbi.metadata_cache import MetadataCache
+from pypowerbi.resolver import NameResolver
+from pypowerbi.tests.transport_tests import MockResponse
+
+
+class WorkspacesSession:
+    """
+    Serves the datasets, reports and groups listings of a dict of workspace id to its items
+    """
+    def __init__(self, workspaces):
+        self.headers = {}
+        self.requests = []
+        self.workspaces = workspaces
+        self._lock = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        with self._lock:
+            self.requests.append(url)
+
+        parts = [x for x in urllib.parse.urlsplit(url).path.split('/') if x]
+        parts = parts[parts.index('myorg') + 1:]
+
+        if parts == ['groups']:
+            value = [{'id': group_id, 'name': workspace['name']} for group_id, workspace in self.workspaces.items()
+                     if group_id is not None]
+        else:
+            group_id = parts[1] if parts[0] == 'groups' else None
+            value = self.workspaces[group_id][parts[-1]]
+
+        return MockResponse(text=json.dumps({'value': value}))
+
+    def close(self):
+        pass
+
+
+def workspaces():
+    return {
+        None: {'name': 'My workspace', 'datasets': [{'id': 'd0', 'name': 'scratch'}], 'reports': []},
+        'g1': {
+            'name': 'finance',
+            'datasets': [{'id': 'd1', 'name': 'sales'}, {'id': 'd2', 'name': 'costs'}],
+            'reports': [{'id': 'r1', 'name': 'sales', 'datasetId': 'd1'}, {'id': 'r2', 'name': 'dup'},
+                        {'id': 'r3', 'name': 'dup'}],
+        },
+        'g2': {
+            'name': 'marketing',
+            'datasets': [{'id': 'd3', 'name': 'sales'}],
+            'reports': [{'id': 'r4', 'name': 'campaigns', 'datasetId': 'd3'}],
+        },
+    }
+
+
+class NameResolutionTests(TestCase):
+    def client(self, session):
+        return PowerBIClient('https://api.powerbi.com', {'accessToken': 'token'}, Transport(session=session))
+
+    def test_find_by_name(self):
+        session = WorkspacesSession(workspaces())
+        client = self.client(session)
+
+        self.assertEqual(client.datasets.find_dataset_by_name('sales', 'g1').id, 'd1')
+        self.assertEqual(client.datasets.find_dataset_by_name('costs', 'g1').id, 'd2')
+        self.assertEqual(client.datasets.find_dataset_by_name('sales', 'g2').id, 'd3')
+        self.assertEqual(client.datasets.find_dataset_by_name('scratch').id, 'd0')
+        self.assertEqual(client.reports.find_report_by_name('campaigns', 'g2').id, 'r4')
+        self.assertEqual(client.groups.find_group_by_name('marketing').id, 'g2')
+
+        # one listing per workspace and kind
+        self.assertEqual(len(session.requests), 5)
+
+    def test_find_missing_name_with_refresh(self):
+        tenant = workspaces()
+        session = WorkspacesSession(tenant)
+        client = self.client(session)
+
+        self.assertEqual(client.datasets.find_dataset_by_name('sales', 'g1').id, 'd1')
+        tenant['g1']['datasets'].append({'id': 'd9', 'name': 'new'})
+
+        self.assertIsNone(client.datasets.find_dataset_by_name('new', 'g1'))
+        self.assertEqual(client.datasets.find_dataset_by_name('new', 'g1', refresh=True).id, 'd9')
+        self.assertIsNone(client.datasets.find_dataset_by_name('missing', 'g1'))
+        self.assertEqual(len(session.requests), 2)
+
+    def test_ambiguous_name(self):
+        client = self.client(WorkspacesSession(workspaces()))
+
+        with self.assertRaises(ValueError):
+            client.reports.find_report_by_name('dup', 'g1')
+
+    def test_resolve_many(self):
+        session = WorkspacesSession(workspaces())
+        client = self.client(session)
+        client.datasets.get_datasets('g2')
+        session.requests.clear()
+
+        names = [
+            (MetadataCache.datasets_kind, 'sales', 'g1'),
+            (MetadataCache.datasets_kind, 'costs', 'g1'),
+            (MetadataCache.datasets_kind, 'sales', 'g2'),
+            (MetadataCache.reports_kind, 'sales', 'g1'),
+            (MetadataCache.reports_kind, 'campaigns', 'g2'),
+            (MetadataCache.reports_kind, 'missing', 'g2'),
+            (MetadataCache.groups_kind, 'finance', None),
+            (MetadataCache.datasets_kind, 'sales', 'g1'),
+        ]
+        resolved = NameResolver(client).resolve_many(names)
+
+        self.assertEqual({key: item.id if item is not None else None for key, item in resolved.items()}, {
+            (MetadataCache.datasets_kind, 'sales', 'g1'): 'd1',
+            (MetadataCache.datasets_kind, 'costs', 'g1'): 'd2',
+            (MetadataCache.datasets_kind, 'sales', 'g2'): 'd3',
+            (MetadataCache.reports_kind, 'sales', 'g1'): 'r1',
+            (MetadataCache.reports_kind, 'campaigns', 'g2'): 'r4',
+            (MetadataCache.reports_kind, 'missing', 'g2'): None,
+            (MetadataCache.groups_kind, 'finance', None): 'g1',
+        })
+
+        # the cached datasets of g2 hold their name, everything else is listed once
+        paths = sorted('/'.join(x for x in urllib.parse.urlsplit(url).path.split('/myorg/')[1].split('/') if x)
+                       for url in session.requests)
+        self.assertEqual(paths, ['groups', 'groups/g1/datasets', 'groups/g1/reports', 'groups/g2/reports'])
+
+        session.requests.clear()
+        NameResolver(client).resolve_many(names[:5])
+        self.assertEqual(session.requests, [])
+
+    def test_resolve_unknown_kind(self):
+        with self.assertRaises(ValueError):
+            NameResolver(self.client(WorkspacesSession(workspaces()))).resolve('dashboards', 'sales')
@@ -0,0 +1,181 @@
+# -*- coding: future_fstrings -*-
+
+import os
+import json
+import time
+import shutil
+import tempfile
+from unittest import TestCase, mock
+
+from requests.exceptions import HTTPError
+
+from pypowerbi.spool import RowSpool
+from pypowerbi.tests.transport_tests import MockResponse
+from pypowerbi.tests.ingestion_tests import MockDatasets
+
+
+class FailingDatasets(MockDatasets):
+    def post_payload(self, dataset_id, table_name, payload, group_id=None):
+        raise IOError('Service unavailable')
+
+
+class RejectingDatasets(MockDatasets):
+    """
+    Rejects the rows of one table with an http status, posting the others
+    """
+    def __init__(self, table_name, status_code):
+        super().__init__()
+        self.table_name = table_name
+        self.status_code = status_code
+        self.rejected = 0
+
+    def post_payload(self, dataset_id, table_name, payload, group_id=None):
+        if table_name == self.table_name:
+            self.rejected += 1
+            response = MockResponse(self.status_code, text='{"error": {"code": "InvalidRequest"}}')
+            raise HTTPError(response, f'Post row request returned http error: {response.json()}')
+
+        super().post_payload(dataset_id, table_name, payload, group_id)
+
+
+class RowSpoolTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def posted_ids(self, datasets, table_name='table'):
+        return [row['id'] for call in datasets.calls if call[1] == table_name for row in call[2]]
+
+    def test_rows_are_posted(self):
+        datasets = MockDatasets()
+
+        with RowSpool(datasets, self.directory, flush_interval=0.01, rows_per_request=100) as spool:
+            spool.append('dataset', 'table', [{'id': x} for x in range(250)])
+            spool.append('dataset', 'other', [{'id': x} for x in range(10)], group_id='group')
+            self.assertTrue(spool.flush(timeout=5))
+            self.assertEqual(0, spool.pending)
+
+        self.assertEqual(list(range(250)), self.posted_ids(datasets))
+        self.assertEqual(list(range(10)), self.posted_ids(datasets, 'other'))
+        self.assertTrue(all(len(call[2]) <= 100 for call in datasets.calls))
+        self.assertIn(('dataset', 'other', [{'id': x} for x in range(10)], 'group'), datasets.calls)
+
+    def test_unsent_rows_are_replayed(self):
+        spool = RowSpool(FailingDatasets(), self.directory, flush_interval=0.01, retry_interval=0.01)
+        spool.append('dataset', 'table', [{'id': x} for x in range(20)])
+        self.assertFalse(spool.flush(timeout=0.1))
+        self.assertIsInstance(spool.last_error, IOError)
+        spool.close(flush=False)
+
+        datasets = MockDatasets()
+        with RowSpool(datasets, self.directory, flush_interval=0.01) as spool:
+            self.assertTrue(spool.flush(timeout=5))
+
+        self.assertEqual(list(range(20)), self.posted_ids(datasets))
+
+    def test_acknowledged_rows_are_not_replayed(self):
+        with RowSpool(MockDatasets(), self.directory, flush_interval=0.01, segment_bytes=100) as spool:
+            for x in range(20):
+                spool.append('dataset', 'table', [{'id': x}])
+            self.assertTrue(spool.flush(timeout=5))
+
+        # acknowledged segments are removed, only the last one written to is kept
+        self.assertLessEqual(len([name for name in os.listdir(self.directory) if name.endswith('.seg')]), 1)
+
+        datasets = MockDatasets()
+        with RowSpool(datasets, self.directory, flush_interval=0.01) as spool:
+            self.assertTrue(spool.flush(timeout=5))
+
+        self.assertEqual([], datasets.calls)
+
+    def test_partial_line_is_dropped(self):
+        spool = RowSpool(FailingDatasets(), self.directory, retry_interval=10)
+        spool.append('dataset', 'table', [{'id': 1}, {'id': 2}])
+        spool.close(flush=False)
+
+        segment_path = os.path.join(self.directory, sorted(os.listdir(self.directory))[0])
+        with open(segment_path, 'ab') as segment_file:
+            segment_file.write(b'["dataset","table",null,{"id":')
+
+        datasets = MockDatasets()
+        with RowSpool(datasets, self.directory, flush_interval=0.01) as spool:
+            self.assertTrue(spool.flush(timeout=5))
+
+        self.assertEqual([1, 2], self.posted_ids(datasets))
+
+    def test_outage_rows_are_read_back_from_disk(self):
+        datasets = MockDatasets()
+        available = [False]
+
+        def post_payload(dataset_id, table_name, payload, group_id=None):
+            if not available[0]:
+                raise IOError('Service unavailable')
+            MockDatasets.post_payload(datasets, dataset_id, table_name, payload, group_id)
+
+        datasets.post_payload = post_payload
+
+        with RowSpool(datasets, self.directory, flush_interval=0.01, retry_interval=0.01, segment_bytes=1000,
+                      rows_per_request=50) as spool:
+            for x in range(0, 1000, 100):
+                spool.append('dataset', 'table', [{'id': y} for y in range(x, x + 100)])
+            self.assertFalse(spool.flush(timeout=0.05))
+            self.assertEqual(1000, spool.pending)
+            # only the position of the first unacknowledged row is kept, the rows stay in the segment files
+            self.assertGreater(len([name for name in os.listdir(self.directory) if name.endswith('.seg')]), 5)
+
+            available[0] = True
+            self.assertTrue(spool.flush(timeout=5))
+
+        self.assertEqual(list(range(1000)), self.posted_ids(datasets))
+        self.assertTrue(all(len(call[2]) <= 50 for call in datasets.calls))
+        self.assertLessEqual(len([name for name in os.listdir(self.directory) if name.endswith('.seg')]), 1)
+
+    def dead_letters(self):
+        with open(os.path.join(self.directory, RowSpool.dead_letter_file_name), 'rb') as dead_letter_file:
+            return [json.loads(line) for line in dead_letter_file]
+
+    def test_rejected_rows_are_dead_lettered(self):
+        datasets = RejectingDatasets('deleted', 400)
+
+        with RowSpool(datasets, self.directory, flush_interval=0.01, retry_interval=10) as spool:
+            spool.append('dataset', 'deleted', [{'id': x} for x in range(3)])
+            spool.append('dataset', 'table', [{'id': x} for x in range(5)])
+            self.assertTrue(spool.flush(timeout=5))
+            self.assertEqual(3, spool.dead_lettered)
+
+        # the rejected table is not retried and does not hold up the other rows
+        self.assertEqual(1, datasets.rejected)
+        self.assertEqual(list(range(5)), self.posted_ids(datasets))
+
+        dead_letters = self.dead_letters()
+        self.assertEqual([['dataset', 'deleted', None, {'id': x}] for x in range(3)], [x[:4] for x in dead_letters])
+        self.assertIn('InvalidRequest', dead_letters[0][4])
+
+    def test_throttled_rows_are_retried(self):
+        self.assertTrue(RowSpool.is_retryable(HTTPError(MockResponse(429), 'throttled')))
+        self.assertTrue(RowSpool.is_retryable(HTTPError(MockResponse(503), 'unavailable')))
+        self.assertTrue(RowSpool.is_retryable(IOError('Service unavailable')))
+        self.assertFalse(RowSpool.is_retryable(HTTPError(MockResponse(404), 'not found')))
+
+    def test_attempts_are_capped(self):
+        datasets = FailingDatasets()
+
+        with RowSpool(datasets, self.directory, flush_interval=0.01, retry_interval=0.001, max_attempts=3) as spool:
+            spool.append('dataset', 'table', [{'id': 1}])
+            self.assertTrue(spool.flush(timeout=5))
+            self.assertEqual(1, spool.dead_lettered)
+
+        self.assertEqual([['dataset', 'table', None, {'id': 1}, 'Service unavailable']], self.dead_letters())
+
+    def test_close_wait_is_bounded(self):
+        spool = RowSpool(FailingDatasets(), self.directory, flush_interval=0.01, retry_interval=0.01)
+        spool.append('dataset', 'table', [{'id': 1}])
+
+        start = time.monotonic()
+        with mock.patch.object(RowSpool, 'default_close_timeout', 0.1):
+            spool.close()
+
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual(1, spool.pending)
@@ -0,0 +1,133 @@
+# -*- coding: future_fstrings -*-
+
+import json
+from unittest import TestCase, mock
+
+from pypowerbi.client import PowerBIClient
+from pypowerbi.retry import RetryPolicy
+from pypowerbi.transport import Transport
+
+
+class MockResponse:
+    def __init__(self, status_code=200, text='{"value": []}', headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers if headers is not None else {}
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class MockSession:
+    def __init__(self, responses=None):
+        self.headers = {}
+        self.requests = []
+        self.responses = list(responses) if responses is not None else []
+        self.closed = False
+
+    def request(self, method, url, **kwargs):
+        self.requests.append((method, url, kwargs))
+        if self.responses:
+            return self.responses.pop(0)
+        return MockResponse()
+
+    def close(self):
+        self.closed = True
+
+
+class TransportTests(TestCase):
+    def test_pooled_adapter_mounted(self):
+        transport = Transport(pool_connections=4, pool_maxsize=32, pool_block=True)
+
+        adapter = transport.session.get_adapter('https://api.powerbi.com')
+        self.assertEqual(32, adapter._pool_maxsize)
+        self.assertEqual(4, adapter._pool_connections)
+        self.assertTrue(adapter._pool_block)
+
+    def test_keep_alive_disabled(self):
+        transport = Transport(keep_alive=False, session=MockSession())
+        self.assertEqual('close', transport.session.headers['Connection'])
+
+    def test_operation_modules_share_transport(self):
+        session = MockSession()
+        client = PowerBIClient('https://api.powerbi.com', {'accessToken': 'token'}, Transport(session=session))
+
+        client.datasets.get_datasets()
+        client.reports.get_reports()
+        client.groups.get_groups()
+        client.gateways.get_gateways()
+
+        self.assertEqual(4, len(session.requests))
+        for method, url, kwargs in session.requests:
+            self.assertEqual('GET', method)
+            self.assertEqual('Bearer token', kwargs['headers']['Authorization'])
+
+        with client:
+            pass
+        self.assertTrue(session.closed)
+
+
+class RetryPolicyTests(TestCase):
+    group_url = 'https://api.powerbi.com/v1.0/myorg/groups/f089354e-8366-4e18-aea3-4cb4a3a50b48/datasets'
+
+    def test_retry_after_seconds(self):
+        response = MockResponse(429, headers={'Retry-After': '7'})
+        self.assertEqual(7.0, RetryPolicy.retry_after(response))
+
+    def test_retry_after_missing(self):
+        self.assertIsNone(RetryPolicy.retry_after(MockResponse(429)))
+
+    def test_backoff_is_capped(self):
+        policy = RetryPolicy(backoff_factor=1, max_backoff=10, jitter=False)
+        self.assertEqual(1, policy.backoff(0))
+        self.assertEqual(8, policy.backoff(3))
+        self.assertEqual(10, policy.backoff(10))
+
+    def test_delay_respects_budget(self):
+        policy = RetryPolicy(max_retries=3, total_timeout=10)
+        response = MockResponse(429, headers={'Retry-After': '5'})
+
+        self.assertEqual(5, policy.get_retry_delay(0, response, 0))
+        self.assertIsNone(policy.get_retry_delay(0, response, 6))
+        self.assertIsNone(policy.get_retry_delay(3, response, 0))
+
+    def test_endpoint_key(self):
+        self.assertEqual('GET /v1.0/myorg/groups/{id}/datasets', RetryPolicy.endpoint_key('get', self.group_url))
+
+    @mock.patch('pypowerbi.transport.time.sleep')
+    def test_transport_retries_throttled_requests(self, sleep):
+        session = MockSession([
+            MockResponse(429, headers={'Retry-After': '2'}),
+            MockResponse(503, headers={'Retry-After': '3'}),
+            MockResponse(200),
+        ])
+        policy = RetryPolicy()
+        transport = Transport(session=session, retry_policy=policy)
+
+        response = transport.get(self.group_url)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(3, len(session.requests))
+        sleep.assert_has_calls([mock.call(2.0), mock.call(3.0)])
+        self.assertEqual({'GET /v1.0/myorg/groups/{id}/datasets': 2}, policy.retry_counts)
+
+    @mock.patch('pypowerbi.transport.time.sleep')
+    def test_unavailable_posts_are_not_retried(self, sleep):
+        session = MockSession([MockResponse(503), MockResponse(429), MockResponse(503), MockResponse(200)])
+        transport = Transport(session=session, retry_policy=RetryPolicy(jitter=False))
+
+        # the post may have been processed before the 503, throttled requests were not
+        self.assertEqual(503, transport.post(self.group_url).status_code)
+        self.assertEqual(503, transport.post(self.group_url).status_code)
+        self.assertEqual(200, transport.delete(self.group_url).status_code)
+        self.assertEqual(4, len(session.requests))
+
+    @mock.patch('pypowerbi.transport.time.sleep')
+    def test_transport_gives_up(self, sleep):
+        session = MockSession([MockResponse(429, headers={'Retry-After': '1'}) for _ in range(3)])
+        transport = Transport(session=session, retry_policy=RetryPolicy(max_retries=2))
+
+        response = transport.get(self.group_url)
+
+        self.assertEqual(429, response.status_code)
+        self.assertEqual(3, len(session.requests))
@@ -4,7 +4,6 @@ from unittest import TestCase
 import datetime
 
 from pypowerbi import utils
-from pypowerbi.utils import CredentialsBuilder
 
 
 class UtilsTests(TestCase):
@@ -64,3 +63,32 @@ class UtilsTests(TestCase):
 
         for converted, target in zip(converted_list, target_list):
             self.assertEqual(converted, target)
+
+    def test_convert_datetime_fields_in_place(self):
+        records = [{"startTime": "2019-03-05T03:09:31.493Z", "endTime": None}]
+
+        converted_list = utils.convert_datetime_fields(records, ["startTime", "endTime"], in_place=True)
+
+        self.assertIs(records, converted_list)
+        self.assertEqual(datetime.datetime(2019, 3, 5, 3, 9, 31, 493000), records[0]["startTime"])
+        self.assertIsNone(records[0]["endTime"])
+
+    def test_parse_powerbi_datetime(self):
+        expected = datetime.datetime(2019, 3, 5, 3, 9, 31)
+
+        for dstr, microsecond in [("2019-03-05T03:09:31Z", 0), ("2019-03-05T03:09:31", 0),
+                                  ("2019-03-05T03:09:31.5Z", 500000), ("2019-03-05T03:09:31.4930000Z", 493000),
+                                  ("2019-03-05T03:09:31.000123", 123)]:
+            self.assertEqual(expected.replace(microsecond=microsecond), utils.parse_powerbi_datetime(dstr))
+
+        self.assertEqual(expected.replace(tzinfo=datetime.timezone.utc),
+                         utils.parse_powerbi_datetime("2019-03-05T03:09:31Z", utc=True))
+
+        for dstr in ["", "2019-03-05", "2019-03-05 03:09:31", "2019-03-05T03:09:31.Z", "2019-03-05T03:09:31+01:00",
+                     "2019-13-05T03:09:31Z"]:
+            with self.assertRaises(ValueError):
+                utils.parse_powerbi_datetime(dstr)
+
+    def test_dates_from_powerbi_strs(self):
+        self.assertEqual([datetime.datetime(2019, 3, 5, 3, 9, 31), None, None],
+                         utils.dates_from_powerbi_strs(["2019-03-05T03:09:31Z", None, ""]))
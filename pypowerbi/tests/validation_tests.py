@@ -0,0 +1,82 @@
+# -*- coding: future_fstrings -*-
+
+import json
+import decimal
+import datetime
+from unittest import TestCase
+
+from pypowerbi.client import PowerBIClient
+from pypowerbi.dataset import Table, Column, Row
+from pypowerbi.transport import Transport
+from pypowerbi.validation import RowValidator
+from pypowerbi.tests.transport_tests import MockSession
+
+
+class RowValidatorTests(TestCase):
+    def setUp(self):
+        self.table = Table(name='sales', columns=[
+            Column(name='id', data_type='Int64'),
+            Column(name='amount', data_type='Double'),
+            Column(name='paid', data_type='Boolean'),
+            Column(name='sold', data_type='DateTime'),
+            Column(name='product', data_type='string'),
+        ])
+
+    def test_coercion(self):
+        validator = RowValidator(self.table)
+        result = validator.validate([
+            {'id': '1', 'amount': decimal.Decimal('2.5'), 'paid': 'true', 'sold': datetime.datetime(2019, 3, 5, 3, 9),
+             'product': 42},
+            Row(id=2.0, amount=3, paid=0, sold='2019-03-05T03:09:31.493Z', product=None),
+        ])
+
+        self.assertTrue(result.ok)
+        self.assertEqual([
+            {'id': 1, 'amount': 2.5, 'paid': True, 'sold': '2019-03-05T03:09:00', 'product': '42'},
+            {'id': 2, 'amount': 3.0, 'paid': False, 'sold': '2019-03-05T03:09:31.493000+00:00', 'product': None},
+        ], result.rows)
+
+    def test_bad_rows_are_rejected(self):
+        quarantined = []
+        validator = RowValidator(self.table, quarantine=quarantined.extend)
+
+        result = validator.validate([
+            {'id': 1},
+            {'id': 1.5},
+            {'id': 2, 'paid': 'maybe'},
+            {'id': 3, 'sold': 'yesterday'},
+            {'id': 4, 'colour': 'red'},
+            {'id': 2 ** 63},
+            {'id': 5},
+        ])
+
+        self.assertEqual([{'id': 1}, {'id': 5}], result.rows)
+        self.assertEqual([1, 2, 3, 4, 5], [rejection.index for rejection in result.rejected])
+        self.assertEqual(['id', 'paid', 'sold', 'colour', 'id'], [rejection.column for rejection in result.rejected])
+        self.assertEqual(result.rejected, quarantined)
+
+    def test_unknown_columns_allowed(self):
+        validator = RowValidator(self.table, allow_unknown_columns=True)
+
+        result = validator.validate([{'id': '1', 'colour': 'red'}])
+
+        self.assertEqual([{'id': 1, 'colour': 'red'}], result.rows)
+
+    def test_columnar_rows(self):
+        validator = RowValidator(self.table)
+
+        result = validator.validate({'id': [1, 'x', 3], 'amount': ['1.5', 2, float('nan')]})
+
+        self.assertEqual([{'id': 1, 'amount': 1.5}, {'id': 3, 'amount': None}], result.rows)
+        self.assertEqual(1, len(result.rejected))
+        self.assertEqual({'id': 'x', 'amount': 2}, result.rejected[0].row)
+
+    def test_post_validated_rows(self):
+        session = MockSession()
+        client = PowerBIClient('https://api.powerbi.com', {'accessToken': 'token'}, Transport(session=session))
+
+        result = client.datasets.post_rows('dataset', 'sales', [{'id': '1'}, {'id': 'x'}],
+                                           validator=RowValidator(self.table))
+
+        self.assertEqual(1, len(result.rejected))
+        self.assertEqual({'rows': [{'id': 1}]}, json.loads(session.requests[0][2]['data']))
@@ -0,0 +1,133 @@
+# -*- coding: future_fstrings -*-
+import time
+import requests
+
+from requests.adapters import HTTPAdapter
+
+
+class Transport:
+    """
+    Connection-pooled HTTP transport shared by every operation module of a PowerBIClient.
+
+    All requests made through a transport reuse the same requests.Session, so TCP and TLS connections to the
+    Power BI service are kept alive and reused between calls instead of being re-established for every call.
+    """
+    # the schemes the pooled adapter is mounted for
+    mounted_schemes = ['https://', 'http://']
+
+    default_pool_connections = 10
+    default_pool_maxsize = 10
+
+    def __init__(self, pool_connections=None, pool_maxsize=None, pool_block=False, keep_alive=True, session=None,
+                 retry_policy=None, rate_limiter=None):
+        """
+        Constructs a transport
+
+        :param pool_connections: The number of per-host connection pools to keep; defaults to 10
+        :param pool_maxsize: The maximum number of connections kept alive per host; defaults to 10
+        :param pool_block: If True, requests wait for a free connection once pool_maxsize connections to a host
+        are in use instead of opening throw-away connections
+        :param keep_alive: If False, connections are closed after every request
+        :param session: An optional, already configured requests.Session to use. No adapters are mounted on a
+        session passed in this way.
+        :param retry_policy: The optional RetryPolicy deciding which responses are retried; None disables retries
+        :param rate_limiter: The optional RateLimiter every request waits for; None disables rate limiting
+        """
+        if pool_connections is None:
+            pool_connections = self.default_pool_connections
+
+        if pool_maxsize is None:
+            pool_maxsize = self.default_pool_maxsize
+
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.keep_alive = keep_alive
+
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block)
+            for scheme in self.mounted_schemes:
+                session.mount(scheme, adapter)
+
+        if not keep_alive:
+            session.headers['Connection'] = 'close'
+
+        self.session = session
+        self.retry_policy = retry_policy
+        self.rate_limiter = rate_limiter
+
+    def request(self, method, url, **kwargs):
+        """
+        Sends a request over the pooled session, retrying it as long as the retry policy allows
+        :param method: The http method
+        :param url: The url to send the request to
+        :param kwargs: Any further arguments accepted by requests.Session.request
+        :return: The http response; the last one received if all retries were exhausted
+        """
+        start = time.monotonic()
+        file_positions = self._file_positions(kwargs.get('files'))
+        attempt = 0
+
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(method, url)
+
+            response = self.session.request(method, url, **kwargs)
+
+            if self.retry_policy is None or not self.retry_policy.is_retryable(response, method):
+                return response
+
+            delay = self.retry_policy.get_retry_delay(attempt, response, time.monotonic() - start)
+            if delay is None:
+                return response
+
+            self.retry_policy.record_retry(method, url)
+            time.sleep(delay)
+
+            # uploaded files were consumed by the previous attempt, rewind them before sending again
+            for file_obj, position in file_positions:
+                file_obj.seek(position)
+
+            attempt += 1
+
+    @staticmethod
+    def _file_positions(files):
+        if not files:
+            return []
+
+        positions = []
+        for value in files.values():
+            # values of the files argument are either file objects or (filename, file object, ...) tuples
+            file_obj = value[1] if isinstance(value, tuple) else value
+            if hasattr(file_obj, 'seek') and hasattr(file_obj, 'tell'):
+                positions.append((file_obj, file_obj.tell()))
+
+        return positions
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request('PUT', url, **kwargs)
+
+    def patch(self, url, **kwargs):
+        return self.request('PATCH', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+
+    def close(self):
+        """
+        Closes all pooled connections
+        """
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -1,5 +1,6 @@
 # -*- coding: future_fstrings -*-
 import datetime
+import functools
 
 
 """
@@ -12,6 +13,56 @@ _date_fmt_str = '%Y-%m-%dT%H:%M:%S.%fZ'
 _date_fmt_str2 = '%Y-%m-%dT%H:%M:%SZ'
 
 
+# the number of distinct datetime strings whose parsed value is cached; the service repeats timestamps a lot, e.g.
+# events logged within the same second or refreshes starting on the same schedule
+_parse_cache_size = 65536
+
+
+def _parse_fixed(dstr):
+    """
+    Parses the fixed layout of Power BI datetime strings, YYYY-MM-DDTHH:MM:SS with optional fractional seconds and
+    an optional trailing Z, by slicing rather than through strptime
+    """
+    length = len(dstr)
+    if length and dstr[length - 1] == 'Z':
+        length -= 1
+
+    if length < 19 or dstr[4] != '-' or dstr[7] != '-' or dstr[10] != 'T' or dstr[13] != ':' or dstr[16] != ':':
+        raise ValueError(f'{dstr!r} is not a Power BI datetime string')
+
+    microsecond = 0
+    if length > 19:
+        if dstr[19] != '.' or length == 20:
+            raise ValueError(f'{dstr!r} is not a Power BI datetime string')
+        if not dstr[20:length].isdigit():
+            raise ValueError(f'{dstr!r} is not a Power BI datetime string')
+        # .NET writes up to 7 fractional digits, python datetimes hold 6
+        fraction = dstr[20:min(length, 26)]
+        microsecond = int(fraction) * 10 ** (6 - len(fraction))
+
+    return datetime.datetime(int(dstr[0:4]), int(dstr[5:7]), int(dstr[8:10]),
+                             int(dstr[11:13]), int(dstr[14:16]), int(dstr[17:19]), microsecond)
+
+
+@functools.lru_cache(maxsize=_parse_cache_size)
+def _parse_cached(dstr, utc):
+    parsed = _parse_fixed(dstr)
+
+    return parsed.replace(tzinfo=datetime.timezone.utc) if utc else parsed
+
+
+def parse_powerbi_datetime(dstr, utc=False):
+    """
+    Fast conversion of a datetime string from the Power BI service, e.g. 2019-03-05T03:09:31.493Z, into a Python
+    datetime. Repeated strings are served from a cache.
+
+    :param dstr: A String retrieved from the Power BI Service that's a datetime
+    :param utc: If True, the datetime is returned timezone aware, in UTC; otherwise naive
+    :return: A Python datetime object generated from the parameter
+    """
+    return _parse_cached(dstr, utc)
+
+
 def date_from_powerbi_str(dstr):
     """
     Utility function to convert datetime strings from the Power BI service into Python Datetime objects
@@ -19,14 +70,31 @@ def date_from_powerbi_str(dstr):
     :param dstr: A String retrieved from the Power BI Service that's a datetime
     :return: A Python datetime object generated from the parameter
     """
-    if "." in dstr:
-        return datetime.datetime.strptime(dstr, _date_fmt_str)
-    else:
-        # Fractional seconds are not zero padded in the API and will not be included at all if 0, thus the second format
-        return datetime.datetime.strptime(dstr, _date_fmt_str2)
+    return parse_powerbi_datetime(dstr)
+
+
+def dates_from_powerbi_strs(dstrs, as_numpy=False):
+    """
+    Converts many datetime strings from the Power BI service at once
+
+    :param dstrs: An iterable of Strings retrieved from the Power BI Service that are datetimes, None or ''
+    :param as_numpy: If True, returns a NumPy datetime64[us] array, in which None and '' become NaT; requires numpy
+    :return: A list of naive Python datetimes, None for None or '', or the NumPy array
+    """
+    if as_numpy:
+        try:
+            import numpy
+        except ImportError:
+            raise ImportError('dates_from_powerbi_strs(as_numpy=True) requires numpy, install it with: pip install numpy')
+
+        # numpy parses the iso layout natively, in C, but deprecates the Z suffix; None and '' become NaT
+        return numpy.array([dstr[:-1] if dstr and dstr[-1] == 'Z' else (dstr or 'NaT') for dstr in dstrs],
+                           dtype='datetime64[us]')
 
+    return [parse_powerbi_datetime(dstr) if dstr else None for dstr in dstrs]
 
-def convert_datetime_fields(list_of_dicts, fields_to_convert):
+
+def convert_datetime_fields(list_of_dicts, fields_to_convert, in_place=False):
     """
     Takes in a list of dictionaries and for each dictionary it converts all fields in fields_to_convert to
     datetime objects from Power BI Datetime Strings. This is typically used when retrieving a list of records
@@ -36,15 +104,19 @@ def convert_datetime_fields(list_of_dicts, fields_to_convert):
 
     :param list_of_dicts: A list of dictionaries
     :param fields_to_convert: A list of fields to be converted to datetimes from Power BI Datetime Strings
+    :param in_place: If True, the dictionaries are converted in place instead of being copied
     :return: list of dictionaries with all fields specified in 'fields_to_convert' into python datetime objects
     """
-    new_list = []
-    for rec in list_of_dicts:
-        # Create a copy so we don't overwrite the original dictionary
-        new_rec = rec.copy()
-        new_list.append(new_rec)
+    if in_place:
+        new_list = list_of_dicts
+    else:
+        # Create copies so we don't overwrite the original dictionaries
+        new_list = [rec.copy() for rec in list_of_dicts]
+
+    for rec in new_list:
         for field in fields_to_convert:
-            if field in new_rec.keys() and new_rec[field] not in [None, '']:
-                new_rec[field] = date_from_powerbi_str(new_rec[field])
+            value = rec.get(field)
+            if value:
+                rec[field] = parse_powerbi_datetime(value)
 
     return new_list
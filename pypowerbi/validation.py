@@ -0,0 +1,257 @@
+# -*- coding: future_fstrings -*-
+import math
+import numbers
+import decimal
+import datetime
+
+from .columnar import is_columnar, columns_from_columnar, iter_row_dicts
+
+
+"""
+Validation and coercion of push rows against the columns of a push dataset Table.
+
+The push API rejects a whole request when a single row holds a value it cannot convert, so rows are checked and
+coerced on the client first, and only the rows that cannot be coerced are rejected.
+"""
+
+
+_int64_min = -2 ** 63
+_int64_max = 2 ** 63 - 1
+
+_true_strings = frozenset(['true', '1', 'yes'])
+_false_strings = frozenset(['false', '0', 'no'])
+
+
+def _coerce_int64(value):
+    if isinstance(value, bool):
+        raise TypeError('Boolean is not an Int64')
+
+    if isinstance(value, numbers.Integral):
+        value = int(value)
+    elif isinstance(value, (numbers.Real, decimal.Decimal)):
+        if not math.isfinite(value) or value != int(value):
+            raise ValueError(f'{value} is not an integer')
+        value = int(value)
+    elif isinstance(value, str):
+        value = int(value.strip())
+    else:
+        raise TypeError(f'{type(value).__name__} is not an Int64')
+
+    if not _int64_min <= value <= _int64_max:
+        raise ValueError(f'{value} is out of the Int64 range')
+
+    return value
+
+
+def _coerce_double(value):
+    if isinstance(value, bool):
+        raise TypeError('Boolean is not a Double')
+
+    if isinstance(value, (numbers.Real, decimal.Decimal)):
+        value = float(value)
+    elif isinstance(value, str):
+        value = float(value.strip())
+    else:
+        raise TypeError(f'{type(value).__name__} is not a Double')
+
+    # NaN has no json representation, send it as null
+    return value if math.isfinite(value) else None
+
+
+def _coerce_boolean(value):
+    if isinstance(value, bool):
+        return value
+
+    if isinstance(value, numbers.Integral) and value in (0, 1):
+        return bool(value)
+
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in _true_strings:
+            return True
+        if lowered in _false_strings:
+            return False
+
+    raise ValueError(f'{value!r} is not a Boolean')
+
+
+def _coerce_datetime(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        # pandas' NaT is a datetime but not equal to itself
+        if value != value:
+            return None
+        return value.isoformat()
+
+    if isinstance(value, str):
+        stripped = value.strip()
+        # fromisoformat does not accept the Z suffix the service itself uses
+        parsed = datetime.datetime.fromisoformat(stripped[:-1] + '+00:00' if stripped.endswith('Z') else stripped)
+        return parsed.isoformat()
+
+    raise TypeError(f'{type(value).__name__} is not a DateTime')
+
+
+def _coerce_string(value):
+    if isinstance(value, str):
+        return value
+
+    if isinstance(value, (numbers.Number, decimal.Decimal)):
+        return str(value)
+
+    raise TypeError(f'{type(value).__name__} is not a String')
+
+
+class RowRejection:
+    """
+    A row rejected by a RowValidator
+    """
+    def __init__(self, index, row, column, reason):
+        """
+        :param index: The position of the row in the validated batch
+        :param row: The row as given
+        :param column: The name of the column that failed, None if the row itself is invalid
+        :param reason: The reason the row was rejected
+        """
+        self.index = index
+        self.row = row
+        self.column = column
+        self.reason = reason
+
+    def __repr__(self):
+        return f'<RowRejection row {self.index} column {self.column}: {self.reason}>'
+
+
+class ValidationResult:
+    """
+    The rows of a batch that passed validation, coerced to their column types, and the rows that were rejected
+    """
+    def __init__(self, rows, rejected):
+        self.rows = rows
+        self.rejected = rejected
+
+    @property
+    def ok(self):
+        return not self.rejected
+
+    def __repr__(self):
+        return f'<ValidationResult {len(self.rows)} rows, {len(self.rejected)} rejected>'
+
+
+class RowValidator:
+    """
+    Validates and coerces batches of rows against the columns of a push dataset Table.
+
+    The table's columns are compiled once into a coercion function per column: Int64 and Double values are converted
+    to int and float, Boolean values from bools, 0/1 and 'true'/'false' strings, DateTime values to iso format strings
+    and String values from numbers. None is accepted for every column. Columns of an unknown data type are passed
+    through as they are.
+    """
+    coercers = {
+        'int64': _coerce_int64,
+        'double': _coerce_double,
+        'decimal': _coerce_double,
+        'boolean': _coerce_boolean,
+        'bool': _coerce_boolean,
+        'datetime': _coerce_datetime,
+        'string': _coerce_string,
+    }
+
+    def __init__(self, table, allow_unknown_columns=False, quarantine=None):
+        """
+        Compiles a validator for a table
+
+        :param table: The Table the rows are posted to, with its columns
+        :param allow_unknown_columns: If False, rows holding a column the table does not have are rejected
+        :param quarantine: An optional callable given the list of RowRejections of every validated batch
+        """
+        if not table.columns:
+            raise ValueError(f'Table {table.name} has no columns to validate against')
+
+        self.table = table
+        self.allow_unknown_columns = allow_unknown_columns
+        self.quarantine = quarantine
+
+        self._coercers = {column.name: self.coercers.get(str(column.data_type).lower()) for column in table.columns}
+
+    def validate(self, rows):
+        """
+        Validates and coerces a batch of rows
+        :param rows: Any rows accepted by Datasets.post_rows
+        :return: A ValidationResult holding the coerced row dicts and the rejected rows
+        """
+        if is_columnar(rows):
+            result = self._validate_columns(*columns_from_columnar(rows))
+        else:
+            result = self._validate_rows(iter_row_dicts(rows))
+
+        if result.rejected and self.quarantine is not None:
+            self.quarantine(result.rejected)
+
+        return result
+
+    def _validate_rows(self, rows):
+        coercers = self._coercers
+        valid_rows = []
+        rejected = []
+
+        for index, row in enumerate(rows):
+            coerced = {}
+            try:
+                for name, value in row.items():
+                    if name not in coercers:
+                        if not self.allow_unknown_columns:
+                            raise KeyError(name)
+                        coerced[name] = value
+                        continue
+
+                    coercer = coercers[name]
+                    coerced[name] = value if value is None or coercer is None else coercer(value)
+            except KeyError:
+                rejected.append(RowRejection(index, row, name, f'Table {self.table.name} has no column {name}'))
+            except (TypeError, ValueError, ArithmeticError) as e:
+                rejected.append(RowRejection(index, row, name, str(e)))
+            else:
+                valid_rows.append(coerced)
+
+        return ValidationResult(valid_rows, rejected)
+
+    def _validate_columns(self, names, columns):
+        # columnar batches are coerced a column at a time, then the rows holding no failed value are assembled
+        coercers = self._coercers
+        failures = {}
+        coerced_columns = []
+
+        for name, column in zip(names, columns):
+            if name not in coercers:
+                if not self.allow_unknown_columns:
+                    reason = f'Table {self.table.name} has no column {name}'
+                    for index in range(len(column)):
+                        failures.setdefault(index, (name, reason))
+                coerced_columns.append(column)
+                continue
+
+            coercer = coercers[name]
+            if coercer is None:
+                coerced_columns.append(column)
+                continue
+
+            coerced = []
+            for index, value in enumerate(column):
+                try:
+                    coerced.append(None if value is None else coercer(value))
+                except (TypeError, ValueError, ArithmeticError) as e:
+                    failures.setdefault(index, (name, str(e)))
+                    coerced.append(None)
+            coerced_columns.append(coerced)
+
+        valid_rows = []
+        rejected = []
+        for index, values in enumerate(zip(*coerced_columns)):
+            if index in failures:
+                column, reason = failures[index]
+                original = {name: column_values[index] for name, column_values in zip(names, columns)}
+                rejected.append(RowRejection(index, original, column, reason))
+            else:
+                valid_rows.append(dict(zip(names, values)))
+
+        return ValidationResult(valid_rows, rejected)
@@ -13,4 +13,8 @@ setup(name='pypowerbi',
             'adal',
             'future-fstrings',
       ],
+      extras_require={
+            'async': ['aiohttp'],
+            'fast': ['orjson'],
+      },
       zip_safe=False)